@@ -0,0 +1,121 @@
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, ContextManager, List, Tuple
+
+from sqlalchemy import insert
+
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.orm import ProductORM
+from warehouse_management.infrastructure.retry import (
+    RetryPolicy,
+    call_with_retry,
+    is_conflict,
+)
+from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
+
+POLICY = RetryPolicy(attempts=200, base_delay=0.001, max_delay=0.05)
+
+
+def seed(engine: Any, products: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            insert(ProductORM.__table__),
+            [
+                {"name": f"sku-{i}", "quantity": 1_000_000, "price": 1.0, "category": 1}
+                for i in range(products)
+            ],
+        )
+
+
+def worker(
+    service: WarehouseService,
+    lock: ContextManager[Any],
+    ops: int,
+    hot: int,
+    products: int,
+    write_ratio: float,
+    seed: int,
+) -> int:
+    # Mostly single-row reads, some stock adjustments on a few hot rows and
+    # an occasional whole-table report.
+    rng = random.Random(seed)
+    retries = 0
+    for op in range(ops):
+        if rng.random() < write_ratio:
+            product_id = rng.randint(1, hot)
+            delta = rng.choice((-1, 1))
+            with lock:
+                _, n = call_with_retry(
+                    lambda: service.adjust_stock(product_id, delta), is_conflict, POLICY
+                )
+            retries += n
+        elif op % 50 == 0:
+            with lock:
+                service.stock_value()
+        else:
+            with lock:
+                service.get_product(rng.randint(1, products))
+    return retries
+
+
+def run(
+    mode: str, threads: int, ops: int, hot: int, products: int, write_ratio: float
+) -> Tuple[float, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile="oltp"
+        )
+        init_db(engine)
+        seed(engine, products)
+        uow = SqlAlchemyUnitOfWork(build_session_factory(engine))
+        service = WarehouseService(uow=uow)
+        # "locked" serializes every operation, reads included, behind one
+        # process-wide lock; "optimistic" runs them all and retries conflicts.
+        lock: ContextManager[Any] = (
+            threading.Lock() if mode == "locked" else nullcontext()
+        )
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [
+                pool.submit(
+                    worker, service, lock, ops, hot, products, write_ratio, seed
+                )
+                for seed in range(threads)
+            ]
+            retries: List[int] = [f.result() for f in futures]
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+    return threads * ops / elapsed, sum(retries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Optimistic updates vs one lock")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops", type=int, default=500, help="per thread")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--hot", type=int, default=10, help="rows being adjusted")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'threads':>7} {'ops/s':>9} {'retries':>8}")
+    for threads in args.threads:
+        for mode in ("locked", "optimistic"):
+            throughput, retries = run(
+                mode, threads, args.ops, args.hot, args.products, args.write_ratio
+            )
+            print(f"{mode:>10} {threads:>7} {throughput:>9.0f} {retries:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from warehouse_management.domain.models import Product
+from warehouse_management.infrastructure.database import build_engine, init_db
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyProductRepository,
+)
+
+
+def small_transactions(engine: Engine, transactions: int, rows: int) -> int:
+    SessionFactory = sessionmaker(bind=engine)
+    for t in range(transactions):
+        with SessionFactory() as session:
+            product_repo = SqlAlchemyProductRepository(session)
+            for i in range(rows):
+                product_repo.add(
+                    Product(name=f"sku-{t}-{i}", quantity=1, price=1.0, category=t)
+                )
+            session.commit()
+    return transactions * rows
+
+
+def bulk_load(engine: Engine, transactions: int, rows: int) -> int:
+    SessionFactory = sessionmaker(bind=engine)
+    with SessionFactory() as session:
+        SqlAlchemyProductRepository(session).add_many(
+            Product(name=f"sku-{i}", quantity=1, price=1.0, category=i % 50)
+            for i in range(transactions * rows)
+        )
+        session.commit()
+    return transactions * rows
+
+
+def run(
+    label: str,
+    make_engine: Callable[[str], Engine],
+    workload: Callable[[Engine, int, int], int],
+    transactions: int,
+    rows: int,
+) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        init_db(engine)
+        started = time.perf_counter()
+        written = workload(engine, transactions, rows)
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+    rate = written / elapsed
+    print(f"{label:>10}: {written} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write throughput per engine profile")
+    parser.add_argument("--transactions", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=10, help="rows per transaction")
+    args = parser.parse_args()
+
+    engines: Dict[str, Callable[[str], Engine]] = {
+        "default": create_engine,
+        "oltp": lambda url: build_engine(url, profile="oltp"),
+        "bulk-load": lambda url: build_engine(url, profile="bulk-load"),
+    }
+    for workload in (small_transactions, bulk_load):
+        print(f"{workload.__name__} ({args.transactions} x {args.rows} rows)")
+        for label, make_engine in engines.items():
+            run(label, make_engine, workload, args.transactions, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from warehouse_management.domain.models import Product
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.orm import Base
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyProductRepository,
+)
+
+
+def make_products(rows: int) -> List[Product]:
+    return [
+        Product(name=f"sku-{i}", quantity=i % 100, price=9.99, category=i % 50)
+        for i in range(rows)
+    ]
+
+
+def per_row(session: Session, products: List[Product]) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    warehouse_service = WarehouseService(product_repo=product_repo)
+    for p in products:
+        warehouse_service.create_product(
+            name=p.name, quantity=p.quantity, price=p.price, category=p.category
+        )
+    session.commit()
+
+
+def bulk(session: Session, products: List[Product]) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    warehouse_service = WarehouseService(product_repo=product_repo)
+    warehouse_service.create_products(products)
+    session.commit()
+
+
+def run(name: str, load: Callable[[Session, List[Product]], None], rows: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        products = make_products(rows)
+        with sessionmaker(bind=engine)() as session:
+            started = time.perf_counter()
+            load(session, products)
+            elapsed = time.perf_counter() - started
+        engine.dispose()
+    print(f"{name:>8}: {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-row vs bulk product insert")
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    per_row_time = run("per-row", per_row, args.rows)
+    bulk_time = run("bulk", bulk, args.rows)
+    print(f"speedup: {per_row_time / bulk_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import dataclasses
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import Product
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.orm import ProductORM
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyProductRepository,
+    _product_from_orm,
+)
+
+SEED_CHUNK = 10_000
+
+# The same fields without __slots__, to show what slotting saves per object.
+UnslottedProduct = dataclasses.make_dataclass(
+    "UnslottedProduct",
+    [(f.name, f.type, f) for f in dataclasses.fields(Product)],
+)
+
+
+def orm_list(session: Session) -> List[Product]:
+    # The read path list() used before: full ORM instances, then a copy.
+    return [_product_from_orm(p) for p in session.query(ProductORM)]
+
+
+def row_list(session: Session) -> List[Product]:
+    return SqlAlchemyProductRepository(session).list()
+
+
+def seed(session: Session, rows: int) -> None:
+    for start in range(0, rows, SEED_CHUNK):
+        session.execute(
+            insert(ProductORM.__table__),
+            [
+                {"name": f"sku-{i}", "quantity": i % 100, "price": 9.99, "category": i}
+                for i in range(start, min(start + SEED_CHUNK, rows))
+            ],
+        )
+    session.commit()
+
+
+def run(session: Session, name: str, read: Callable[[Session], List[Product]]) -> None:
+    session.expunge_all()
+    started = time.perf_counter()
+    count = len(read(session))
+    elapsed = time.perf_counter() - started
+    session.expunge_all()
+
+    tracemalloc.start()
+    products = read(session)
+    retained, peak = tracemalloc.get_traced_memory()
+    del products
+    tracemalloc.stop()
+    session.expunge_all()
+    print(
+        f"{name:>5}: {count} rows in {elapsed:.2f}s ({count / elapsed:,.0f} rows/s), "
+        f"peak {peak / 2**20:,.0f} MiB, result {retained / 2**20:,.0f} MiB"
+    )
+
+
+def object_size(make: Callable[[], object], count: int = 10_000) -> float:
+    tracemalloc.start()
+    objects = [make() for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ORM vs row read path for list()")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile="bulk-load"
+        )
+        init_db(engine)
+        with build_session_factory(engine)() as session:
+            seed(session, args.rows)
+            run(session, "orm", orm_list)
+            run(session, "rows", row_list)
+        engine.dispose()
+
+    fields = dict(name="sku", quantity=1, price=1.0, category=1, id=1)
+    print(
+        f"bytes per product: {object_size(lambda: UnslottedProduct(**fields)):.0f} "
+        f"unslotted, {object_size(lambda: Product(**fields)):.0f} slotted"
+    )
+
+
+if __name__ == "__main__":
+    main()
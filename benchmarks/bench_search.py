@@ -0,0 +1,139 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, List, Sequence, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import Customer, Product
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.orm import CustomerORM, ProductORM
+from warehouse_management.infrastructure.repositories import (
+    CUSTOMER_COLUMNS,
+    PRODUCT_COLUMNS,
+    SqlAlchemyCustomerRepository,
+    SqlAlchemyProductRepository,
+)
+
+SEED_CHUNK = 10_000
+PAGE = 20
+
+WORDS = [
+    "steel", "brass", "copper", "plastic", "bolt", "nut", "washer", "screw",
+    "hinge", "bracket", "drill", "saw", "hammer", "clamp", "anvil", "valve",
+    "pipe", "fitting", "cable", "relay", "switch", "socket", "lamp", "fan",
+]
+FIRST_NAMES = ["john", "jane", "maria", "ivan", "olga", "peter", "anna", "li"]
+LAST_NAMES = ["smith", "ivanov", "garcia", "chen", "novak", "kowalski", "ito"]
+
+
+def seed(session: Session, rows: int, rng: random.Random) -> None:
+    # One name in 10,000 gets "tungsten", so the rare query has a few hits
+    # scattered across the whole table.
+    for start in range(0, rows, SEED_CHUNK):
+        products = []
+        customers = []
+        for i in range(start, min(start + SEED_CHUNK, rows)):
+            words = rng.sample(WORDS, 3)
+            if i % 10_000 == 7:
+                words[0] = "tungsten"
+            products.append(
+                {"name": " ".join(words), "quantity": 1, "price": 1.0, "category": 1}
+            )
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            customers.append(
+                {
+                    "first_name": first.title(),
+                    "last_name": last.title(),
+                    "address": "",
+                    "phone": f"+1 555-{i:07d}",
+                    "email": f"{first}.{last}{i}@example.com",
+                    "staff_id": 1,
+                }
+            )
+        session.execute(insert(ProductORM.__table__), products)
+        session.execute(insert(CustomerORM.__table__), customers)
+    session.commit()
+
+
+def like_products(session: Session, term: str) -> List[Product]:
+    statement = (
+        select(*PRODUCT_COLUMNS)
+        .where(ProductORM.name.like(f"%{term}%"))
+        .order_by(ProductORM.id)
+        .limit(PAGE)
+    )
+    return [Product(*row) for row in session.execute(statement)]
+
+
+def like_customers(session: Session, term: str) -> List[Customer]:
+    pattern = f"%{term}%"
+    statement = (
+        select(*CUSTOMER_COLUMNS)
+        .where(
+            CustomerORM.first_name.like(pattern)
+            | CustomerORM.last_name.like(pattern)
+            | CustomerORM.email.like(pattern)
+            | CustomerORM.phone.like(pattern)
+        )
+        .order_by(CustomerORM.id)
+        .limit(PAGE)
+    )
+    return [Customer(*row) for row in session.execute(statement)]
+
+
+def timed(run: Callable[[], Sequence[object]], repeat: int) -> Tuple[float, int]:
+    hits = len(run())
+    started = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - started) / repeat * 1000, hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FTS5 search vs LIKE scan")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile="bulk-load"
+        )
+        init_db(engine)
+        with build_session_factory(engine)() as session:
+            started = time.perf_counter()
+            seed(session, args.rows, random.Random(0))
+            print(
+                f"seeded {args.rows:,} products and customers, with the search "
+                f"triggers, in {time.perf_counter() - started:.1f}s"
+            )
+            products = SqlAlchemyProductRepository(session)
+            customers = SqlAlchemyCustomerRepository(session)
+            cases = [
+                ("product", "bolt", products.search, like_products),
+                ("product", "tungsten", products.search, like_products),
+                ("product", "zinc", products.search, like_products),
+                ("customer", "garcia", customers.search, like_customers),
+                ("customer", "0424242", customers.search, like_customers),
+            ]
+            for kind, term, search, like in cases:
+                fts_ms, fts_hits = timed(lambda: search(term), args.repeat)
+                like_ms, like_hits = timed(lambda: like(session, term), args.repeat)
+                print(
+                    f"{kind:>8} {term!r:>11}: fts {fts_ms:8.2f} ms ({fts_hits} hits), "
+                    f"like {like_ms:8.2f} ms ({like_hits} hits), "
+                    f"{like_ms / fts_ms:,.1f}x"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
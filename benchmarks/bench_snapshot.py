@@ -0,0 +1,70 @@
+import argparse
+import os
+import tempfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict
+
+from sqlalchemy.orm import Session
+
+from benchmarks.bench_product_list import seed
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyProductRepository,
+)
+from warehouse_management.infrastructure.snapshot import (
+    ProductSnapshot,
+    np,
+    write_snapshot,
+)
+
+
+def report_from_list(session: Session) -> None:
+    # What the reporting jobs do today: load every product, then aggregate.
+    quantities: Dict[int, int] = defaultdict(int)
+    for product in SqlAlchemyProductRepository(session).list():
+        quantities[product.category] += product.quantity
+
+
+def report_from_snapshot(path: str) -> Callable[[], None]:
+    def run() -> None:
+        with ProductSnapshot(path) as snapshot:
+            snapshot.stock_by_category()
+            snapshot.low_stock(5)
+
+    return run
+
+
+def timed(name: str, run: Callable[[], None]) -> None:
+    started = time.perf_counter()
+    run()
+    print(f"{name:>26}: {time.perf_counter() - started:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="list() vs mapped snapshot")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"numpy: {'yes' if np is not None else 'no, memoryview fallback'}")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile="bulk-load"
+        )
+        init_db(engine)
+        path = os.path.join(tmp, "catalog.snap")
+        with build_session_factory(engine)() as session:
+            seed(session, args.rows)
+            timed("list() + aggregate", lambda: report_from_list(session))
+            timed("write snapshot", lambda: write_snapshot(session, path))
+        print(f"{'snapshot size':>26}: {os.path.getsize(path) / 2**20:.1f} MiB")
+        timed("open + by category + low", report_from_snapshot(path))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import random
+import tempfile
+from typing import List
+
+from sqlalchemy import insert
+
+from warehouse_management.infrastructure.database import build_engine, init_db
+from warehouse_management.infrastructure.orm import ProductORM
+from warehouse_management.infrastructure.worker_pool import (
+    DEFAULT_BATCH_SIZE,
+    OrderRequest,
+    format_report,
+    run_pool,
+)
+
+
+def make_requests(orders: int, products: int, seed: int = 0) -> List[OrderRequest]:
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(orders):
+        product_ids = rng.sample(range(1, products + 1), rng.randint(1, 5))
+        quantities = [rng.randint(1, 3) for _ in product_ids]
+        requests.append(OrderRequest(product_ids=product_ids, quantities=quantities))
+    return requests
+
+
+def seed(url: str, products: int, stock: int) -> None:
+    engine = build_engine(url, profile="bulk-load")
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(ProductORM.__table__),
+            [
+                {"name": f"sku-{i}", "quantity": stock, "price": 1.0, "category": 1}
+                for i in range(products)
+            ],
+        )
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Orders/s per worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    requests = make_requests(args.orders, args.products)
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            seed(url, args.products, stock=args.orders)
+            report = run_pool(url, requests, workers, args.batch_size)
+        print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
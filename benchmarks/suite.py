@@ -0,0 +1,427 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import sqlalchemy
+from sqlalchemy import Engine, insert
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import (
+    Category,
+    Customer,
+    Order,
+    Product,
+    Role,
+    Staff,
+)
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.orm import (
+    CategoryORM,
+    CustomerORM,
+    OrderORM,
+    ProductORM,
+    RoleORM,
+    StaffORM,
+    order_product_assocoations,
+    product_category_assocoations,
+    role_staff_assocoations,
+    staff_customer_assocoations,
+)
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyCategoryRepository,
+    SqlAlchemyCustomerRepository,
+    SqlAlchemyOrderRepository,
+    SqlAlchemyProductRepository,
+    SqlAlchemyRoleRepository,
+    SqlAlchemyStaffRepository,
+)
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+SEED_CHUNK = 10_000
+ORDER_LINES = 5
+
+
+@dataclass
+class Dataset:
+    products: int
+    customers: int
+    staffs: int
+    roles: int
+    orders: int
+    categories: int
+
+    @classmethod
+    def scaled(cls, size: int) -> "Dataset":
+        return cls(
+            products=size,
+            customers=size,
+            staffs=max(size // 100, 1),
+            roles=max(size // 10_000, 1),
+            orders=max(size // 10, 1),
+            categories=max(size // 1_000, 1),
+        )
+
+
+@dataclass
+class Measurement:
+    size: int
+    repository: str
+    operation: str
+    ops: int
+    seconds: float
+    ops_per_sec: float
+    peak_memory_bytes: int
+
+
+def _rows(
+    count: int, make: Callable[[int], Dict[str, Any]]
+) -> Iterator[List[Dict[str, Any]]]:
+    for start in range(0, count, SEED_CHUNK):
+        yield [make(i) for i in range(start, min(start + SEED_CHUNK, count))]
+
+
+def seed(engine: Engine, data: Dataset) -> None:
+    # Seeding goes straight through Core so that it is not what gets measured.
+    tables: List[Tuple[Any, int, Callable[[int], Dict[str, Any]]]] = [
+        (
+            ProductORM.__table__,
+            data.products,
+            lambda i: {
+                "name": f"sku-{i}",
+                "quantity": 1_000,
+                "price": 9.99,
+                "category": i % data.categories,
+            },
+        ),
+        (
+            RoleORM.__table__,
+            data.roles,
+            lambda i: {"name": f"r{i}", "description": ""},
+        ),
+        (
+            StaffORM.__table__,
+            data.staffs,
+            lambda i: {
+                "first_name": "f",
+                "last_name": "l",
+                "address": "a",
+                "phone": "p",
+                "email": "e",
+                "user_name": f"u{i}",
+                "role_id": i % data.roles + 1,
+            },
+        ),
+        (
+            CustomerORM.__table__,
+            data.customers,
+            lambda i: {
+                "first_name": "f",
+                "last_name": "l",
+                "address": "a",
+                "phone": "p",
+                "email": "e",
+                "staff_id": i % data.staffs + 1,
+            },
+        ),
+        (OrderORM.__table__, data.orders, lambda i: {"id": i + 1}),
+        (
+            CategoryORM.__table__,
+            data.categories,
+            lambda i: {"name": f"c{i}", "description": ""},
+        ),
+        (
+            order_product_assocoations,
+            data.orders * ORDER_LINES,
+            lambda i: {
+                "order_id": i // ORDER_LINES + 1,
+                "product_id": (i * 7919) % data.products + 1,
+            },
+        ),
+        (
+            product_category_assocoations,
+            data.products,
+            lambda i: {"product_id": i + 1, "category_id": i % data.categories + 1},
+        ),
+        (
+            staff_customer_assocoations,
+            data.customers,
+            lambda i: {"staff_id": i % data.staffs + 1, "customer_id": i + 1},
+        ),
+        (
+            role_staff_assocoations,
+            data.staffs,
+            lambda i: {"role_id": i % data.roles + 1, "staff_id": i + 1},
+        ),
+    ]
+    with engine.begin() as conn:
+        for table, count, make in tables:
+            for chunk in _rows(count, make):
+                conn.execute(insert(table), chunk)
+
+
+def _measure(
+    size: int,
+    repository: str,
+    operation: str,
+    ops: int,
+    make_run: Callable[[], Callable[[], None]],
+) -> Measurement:
+    # tracemalloc slows Python code down several times over, so throughput is
+    # taken from an untraced pass and peak memory from a second, traced one.
+    run = make_run()
+    started = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - started
+    run = make_run()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return Measurement(
+        size=size,
+        repository=repository,
+        operation=operation,
+        ops=ops,
+        seconds=round(seconds, 6),
+        ops_per_sec=round(ops / seconds, 2) if seconds else 0.0,
+        peak_memory_bytes=peak,
+    )
+
+
+def _product(product_id: int = 0) -> Product:
+    return Product(name="new", quantity=1_000, price=1.0, category=1, id=product_id)
+
+
+def _customer(customer_id: int = 0) -> Customer:
+    return Customer(
+        first_name="f",
+        last_name="l",
+        address="a",
+        phone="p",
+        email="e",
+        staff_id=1,
+        id=customer_id,
+    )
+
+
+def _staff(customers: List[Customer], staff_id: int = 0) -> Staff:
+    return Staff(
+        first_name="f",
+        last_name="l",
+        address="a",
+        phone="p",
+        email="e",
+        user_name="u",
+        role_id=1,
+        customers=customers,
+        id=staff_id,
+    )
+
+
+def benchmark_size(
+    session: Session, size: int, data: Dataset, ops: int
+) -> List[Measurement]:
+    rng = random.Random(size)
+    counts = {
+        "product": data.products,
+        "order": data.orders,
+        "category": data.categories,
+        "customer": data.customers,
+        "role": data.roles,
+        "staff": data.staffs,
+    }
+    repositories: Dict[str, Any] = {
+        "product": SqlAlchemyProductRepository(session),
+        "order": SqlAlchemyOrderRepository(session),
+        "category": SqlAlchemyCategoryRepository(session),
+        "customer": SqlAlchemyCustomerRepository(session),
+        "role": SqlAlchemyRoleRepository(session),
+        "staff": SqlAlchemyStaffRepository(session),
+    }
+    warehouse_service = WarehouseService(
+        product_repo=repositories["product"], order_repo=repositories["order"]
+    )
+
+    def pick(kind: str, count: int) -> List[int]:
+        return rng.sample(range(1, counts[kind] + 1), min(count, counts[kind]))
+
+    def lines() -> List[Product]:
+        return [_product(i) for i in pick("product", ORDER_LINES)]
+
+    new_entity: Dict[str, Callable[[], Any]] = {
+        "product": _product,
+        "order": lambda: Order(products=lines()),
+        "category": lambda: Category(name="new", description="", products=lines()),
+        "customer": _customer,
+        "role": lambda: Role(
+            name="new",
+            description="",
+            staffs=[_staff([], i) for i in pick("staff", 2)],
+        ),
+        "staff": lambda: _staff([_customer(i) for i in pick("customer", 2)]),
+    }
+
+    def add(name: str) -> Callable[[], None]:
+        def run() -> None:
+            for _ in range(ops):
+                repositories[name].add(new_entity[name]())
+            session.commit()
+
+        return run
+
+    def get(name: str) -> Callable[[], None]:
+        ids = [rng.randint(1, counts[name]) for _ in range(ops)]
+
+        def run() -> None:
+            for i in ids:
+                repositories[name].get(i)
+
+        return run
+
+    def list_all(name: str) -> Callable[[], None]:
+        def run() -> None:
+            repositories[name].list()
+
+        return run
+
+    def create_orders() -> Callable[[], None]:
+        def run() -> None:
+            for _ in range(ops):
+                warehouse_service.create_order(lines())
+            session.commit()
+
+        return run
+
+    results = []
+    for name in repositories:
+        results.append(_measure(size, name, "add", ops, lambda: add(name)))
+        counts[name] += 2 * ops
+        session.expunge_all()
+        results.append(_measure(size, name, "get", ops, lambda: get(name)))
+        session.expunge_all()
+        results.append(
+            _measure(size, name, "list", counts[name], lambda: list_all(name))
+        )
+        session.expunge_all()
+    results.append(_measure(size, "service", "create_order", ops, create_orders))
+    return results
+
+
+def run_suite(sizes: Sequence[int], ops: int, directory: str) -> Dict[str, Any]:
+    measurements: List[Measurement] = []
+    for size in sizes:
+        path = os.path.join(directory, f"bench-{size}.db")
+        if os.path.exists(path):
+            os.remove(path)
+        url = f"sqlite:///{path}"
+        loader = build_engine(url, profile="bulk-load")
+        init_db(loader)
+        data = Dataset.scaled(size)
+        seed(loader, data)
+        loader.dispose()
+
+        engine = build_engine(url, profile="oltp")
+        with build_session_factory(engine)() as session:
+            measurements.extend(benchmark_size(session, size, data, min(ops, size)))
+        engine.dispose()
+        os.remove(path)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": [asdict(m) for m in measurements],
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    def key(m: Dict[str, Any]) -> Tuple[int, str, str]:
+        return m["size"], m["repository"], m["operation"]
+
+    previous = {key(m): m for m in baseline["results"]}
+    regressions = []
+    for current in results["results"]:
+        before = previous.get(key(current))
+        if before is None:
+            continue
+        label = "{} {}.{}".format(*key(current))
+        if current["ops_per_sec"] < before["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{label}: {current['ops_per_sec']:,.0f} ops/s "
+                f"(baseline {before['ops_per_sec']:,.0f})"
+            )
+        peak_limit = before["peak_memory_bytes"] * (1 + threshold)
+        if current["peak_memory_bytes"] > peak_limit:
+            regressions.append(
+                f"{label}: peak {current['peak_memory_bytes']:,} B "
+                f"(baseline {before['peak_memory_bytes']:,} B)"
+            )
+    return regressions
+
+
+def report(results: Dict[str, Any]) -> None:
+    print(
+        f"{'size':>9} {'repository':<10} {'operation':<13} "
+        f"{'ops/s':>12} {'peak MiB':>9}"
+    )
+    for m in results["results"]:
+        print(
+            f"{m['size']:>9} {m['repository']:<10} {m['operation']:<13} "
+            f"{m['ops_per_sec']:>12,.0f} {m['peak_memory_bytes'] / 2**20:>9.1f}"
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Repository benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--ops", type=int, default=1_000, help="operations per step")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed relative slowdown"
+    )
+    parser.add_argument("--workdir", help="where to build the databases")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as directory:
+        results = run_suite(args.sizes, args.ops, directory)
+    report(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, skipping comparison")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,32 +1,27 @@
 from warehouse_management.domain.services import WarehouseService
-from warehouse_management.infrastructure.orm import Base
-from warehouse_management.infrastructure.repositories import SqlAlchemyOrderRepository, SqlAlchemyProductRepository
+from warehouse_management.infrastructure.database import (
+    DATABASE_URL,
+    build_engine,
+    build_session_factory,
+)
+from warehouse_management.infrastructure.migrations import migrate
 from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = r"sqlite:///warehouse.db"
-
-engine = create_engine(DATABASE_URL)
-SessionFactory = sessionmaker(bind=engine)
-Base.metadata.create_all(engine)
+engine = build_engine(DATABASE_URL, profile="oltp")
+SessionFactory = build_session_factory(engine)
+# Unlike init_db, also upgrades a warehouse.db from an older version.
+migrate(engine)
 
 
 def main() -> None:
-    session = SessionFactory()
-    product_repo = SqlAlchemyProductRepository(session)
-    order_repo = SqlAlchemyOrderRepository(session)
-
-    warehouse_service = WarehouseService(product_repo, order_repo)
-    with SqlAlchemyUnitOfWork(session) as uow:
-        new_product = warehouse_service.create_product(name="test-1", quantity=1, price=100, category=10)
-        uow.commit()
-        _product = product_repo.get(1)
-        print(_product)
-        print(f"create product: {new_product}")
-        # TODO add some actions
+    # Each service call opens and commits its own session, so one service
+    # can be shared by every thread of the server.
+    warehouse_service = WarehouseService(uow=SqlAlchemyUnitOfWork(SessionFactory))
+    new_product = warehouse_service.create_product(name="test-1", quantity=1, price=100, category=10)
+    _product = warehouse_service.get_product(1)
+    print(_product)
+    print(f"create product: {new_product}")
 
 
 if __name__ == "__main__":
     main()
-
@@ -5,9 +5,12 @@ CUR_PATH = os.path.dirname(__file__)
 sys.path.append(os.path.join(CUR_PATH, '..'))
 
 from typing import Generator
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
-from warehouse_management.infrastructure.orm import Base
+from sqlalchemy.orm import Session
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
 
 
 @pytest.fixture(scope="module")
@@ -15,8 +18,8 @@ def session() -> Generator[Session, None, None]:
 
     DATABASE_URL = "sqlite:///:memory:"
 
-    engine = create_engine(DATABASE_URL)
-    SessionFactory = sessionmaker(bind=engine)
-    Base.metadata.create_all(engine)
+    engine = build_engine(DATABASE_URL)
+    SessionFactory = build_session_factory(engine)
+    init_db(engine)
     session = SessionFactory()
     yield session
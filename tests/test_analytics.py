@@ -0,0 +1,107 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import (
+    CategoryStock,
+    LowStockItem,
+    Order,
+    Product,
+    ProductOrderCount,
+)
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.instrumentation import QueryStats, collect
+from warehouse_management.infrastructure.orm import ProductORM
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyOrderRepository,
+    SqlAlchemyProductRepository,
+)
+
+
+@pytest.fixture(scope="module")
+def service(session: Session) -> WarehouseService:
+    product_repo = SqlAlchemyProductRepository(session)
+    order_repo = SqlAlchemyOrderRepository(session)
+    warehouse_service = WarehouseService(
+        product_repo=product_repo, order_repo=order_repo
+    )
+    assert warehouse_service.stock_value() == 0.0
+
+    products = [
+        Product(name="bolt", quantity=100, price=0.5, category=1),
+        Product(name="nut", quantity=3, price=0.25, category=1),
+        Product(name="drill", quantity=2, price=80.0, category=2),
+        Product(name="saw", quantity=10, price=20.0, category=2),
+    ]
+    product_repo.add_many(products)
+    bolt, nut, drill, saw = products
+    for lines in ([bolt, nut], [bolt, drill], [bolt, nut], [saw]):
+        order_repo.add(Order(products=lines))
+    session.commit()
+    return warehouse_service
+
+
+def test_stock_value(service: WarehouseService) -> None:
+    assert service.stock_value() == pytest.approx(50 + 0.75 + 160 + 200)
+
+
+def test_stock_by_category(service: WarehouseService) -> None:
+    assert service.stock_by_category() == [
+        CategoryStock(category=1, quantity=103, value=pytest.approx(50.75)),
+        CategoryStock(category=2, quantity=12, value=pytest.approx(360.0)),
+    ]
+
+
+def test_low_stock(service: WarehouseService) -> None:
+    assert service.low_stock(threshold=10) == [
+        LowStockItem(id=3, name="drill", quantity=2),
+        LowStockItem(id=2, name="nut", quantity=3),
+    ]
+    assert service.low_stock(threshold=0) == []
+
+
+def test_top_ordered_products(service: WarehouseService) -> None:
+    assert service.top_ordered_products(limit=3) == [
+        ProductOrderCount(id=1, name="bolt", orders=3),
+        ProductOrderCount(id=2, name="nut", orders=2),
+        ProductOrderCount(id=3, name="drill", orders=1),
+    ]
+
+
+def test_analytics_run_one_query_each(service: WarehouseService) -> None:
+    stats = QueryStats()
+    with collect(stats):
+        service.stock_value()
+        service.stock_by_category()
+        service.low_stock(threshold=10)
+        service.top_ordered_products(limit=3)
+
+    for method in ("stock_value", "stock_by_category", "low_stock", "top_ordered"):
+        operation = stats[f"SqlAlchemyProductRepository.{method}"]
+        assert operation.statements == 1
+    assert stats["SqlAlchemyProductRepository.stock_value"].rows == 1
+
+
+def test_stock_by_category_counts_missing_values_as_zero() -> None:
+    engine = build_engine("sqlite:///:memory:")
+    init_db(engine)
+    with build_session_factory(engine)() as session:
+        session.execute(
+            insert(ProductORM),
+            [{"name": "unpriced", "quantity": None, "price": None, "category": 4}],
+        )
+
+        stock = SqlAlchemyProductRepository(session).stock_by_category()
+
+    assert stock == [CategoryStock(category=4, quantity=0, value=0.0)]
+    engine.dispose()
@@ -0,0 +1,194 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import asyncio
+from pathlib import Path
+from typing import List
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from warehouse_management.domain.exceptions import EntitiesNotFound, InsufficientStock
+from warehouse_management.domain.models import (
+    Customer,
+    Order,
+    OrderLine,
+    Product,
+    Role,
+)
+from warehouse_management.domain.services import AsyncWarehouseService
+from warehouse_management.infrastructure.async_repositories import (
+    AsyncSqlAlchemyCustomerRepository,
+    AsyncSqlAlchemyOrderRepository,
+    AsyncSqlAlchemyProductRepository,
+    AsyncSqlAlchemyRoleRepository,
+    AsyncSqlAlchemyStaffRepository,
+)
+from warehouse_management.infrastructure.database import (
+    build_async_engine,
+    build_async_session_factory,
+    init_async_db,
+)
+from warehouse_management.infrastructure.unit_of_work import AsyncSqlAlchemyUnitOfWork
+
+
+def _service(session: AsyncSession) -> AsyncWarehouseService:
+    return AsyncWarehouseService(
+        product_repo=AsyncSqlAlchemyProductRepository(session),
+        order_repo=AsyncSqlAlchemyOrderRepository(session),
+        role_repo=AsyncSqlAlchemyRoleRepository(session),
+        staff_repo=AsyncSqlAlchemyStaffRepository(session),
+        customer_repo=AsyncSqlAlchemyCustomerRepository(session),
+    )
+
+
+def test_async_service_round_trip(tmp_path: Path) -> None:
+    async def scenario() -> None:
+        engine = build_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'w.db'}")
+        await init_async_db(engine)
+        SessionFactory = build_async_session_factory(engine)
+
+        async with AsyncSqlAlchemyUnitOfWork(SessionFactory()) as uow:
+            warehouse_service = _service(uow.session)
+            ids = await warehouse_service.create_products(
+                Product(name=f"p{i}", quantity=5, price=2, category=1)
+                for i in range(3)
+            )
+            await warehouse_service.create_customer(
+                first_name="a",
+                last_name="b",
+                address="c",
+                phone="d",
+                email="e",
+                staff_id=1,
+            )
+            await uow.commit()
+            customer = await warehouse_service.get_customer(1)
+            await warehouse_service.create_staff(
+                first_name="a",
+                last_name="b",
+                address="c",
+                phone="d",
+                email="e",
+                user_name="u",
+                role_id=1,
+                customers=[customer],
+            )
+            order = await warehouse_service.create_order(
+                [await warehouse_service.get_product(i) for i in ids]
+            )
+            await uow.commit()
+            staff = await warehouse_service.get_staff(1)
+            await warehouse_service.create_role(
+                name="r", description="d", staffs=[staff]
+            )
+            await uow.commit()
+
+        async with SessionFactory() as session:
+            warehouse_service = _service(session)
+            order = await warehouse_service.get_order(1)
+            role = await warehouse_service.get_role(1)
+        await engine.dispose()
+
+        assert isinstance(order, Order)
+        assert [p.id for p in order.products] == ids
+        assert isinstance(role, Role)
+        assert role.staffs[0].customers == [customer]
+        assert isinstance(customer, Customer)
+
+    asyncio.run(scenario())
+
+
+def test_async_get_of_missing_id_raises_entities_not_found(tmp_path: Path) -> None:
+    async def scenario() -> None:
+        engine = build_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'w.db'}")
+        await init_async_db(engine)
+        try:
+            async with build_async_session_factory(engine)() as session:
+                warehouse_service = _service(session)
+                for get in (
+                    warehouse_service.get_product,
+                    warehouse_service.get_order,
+                    warehouse_service.get_customer,
+                    warehouse_service.get_role,
+                    warehouse_service.get_staff,
+                ):
+                    with pytest.raises(EntitiesNotFound) as raised:
+                        await get(404)
+                    assert raised.value.ids == [404]
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_async_reserve_bumps_versions(tmp_path: Path) -> None:
+    async def scenario() -> None:
+        engine = build_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'w.db'}")
+        await init_async_db(engine)
+        try:
+            async with build_async_session_factory(engine)() as session:
+                products = AsyncSqlAlchemyProductRepository(session)
+                bolt, saw = Product("bolt", 5, 0.5, 1), Product("saw", 1, 20.0, 2)
+                await products.add_many([bolt, saw])
+                assert (bolt.version, saw.version) == (1, 1)
+
+                await products.reserve([OrderLine(bolt.id, 2), OrderLine(bolt.id, 1)])
+                with pytest.raises(InsufficientStock) as raised:
+                    await products.reserve(
+                        [OrderLine(bolt.id, 1), OrderLine(saw.id, 2)]
+                    )
+                assert raised.value.product_ids == [saw.id]
+                with pytest.raises(EntitiesNotFound):
+                    await products.reserve([OrderLine(404, 1)])
+                await session.commit()
+
+                reserved = await products.get(bolt.id)
+                untouched = await products.get(saw.id)
+        finally:
+            await engine.dispose()
+
+        assert (reserved.quantity, reserved.version) == (2, 2)
+        assert (untouched.quantity, untouched.version) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_requests_share_pool_without_blocking_loop(tmp_path: Path) -> None:
+    async def scenario() -> None:
+        engine = build_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'w.db'}")
+        await init_async_db(engine)
+        SessionFactory = build_async_session_factory(engine)
+        async with SessionFactory() as session:
+            await _service(session).create_products(
+                Product(name=f"p{i}", quantity=1, price=1, category=1)
+                for i in range(100)
+            )
+            await session.commit()
+
+        ticks: List[int] = []
+        done = asyncio.Event()
+
+        async def heartbeat() -> None:
+            while not done.is_set():
+                ticks.append(1)
+                await asyncio.sleep(0)
+
+        async def request(product_id: int) -> Product:
+            async with SessionFactory() as session:
+                return await _service(session).get_product(product_id)
+
+        beat = asyncio.create_task(heartbeat())
+        products = await asyncio.gather(*(request(i % 100 + 1) for i in range(200)))
+        done.set()
+        await beat
+        checked_out = engine.sync_engine.pool.checkedout()  # type: ignore
+        await engine.dispose()
+
+        assert len(products) == 200
+        assert len(ticks) > 10
+        assert checked_out == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import copy
+from pathlib import Path
+
+from benchmarks.suite import compare, run_suite
+
+
+def test_suite_measures_every_repository(tmp_path: Path) -> None:
+    results = run_suite(sizes=[20], ops=3, directory=str(tmp_path))
+
+    measured = {(m["repository"], m["operation"]) for m in results["results"]}
+    for repository in ("product", "order", "category", "customer", "role", "staff"):
+        assert {(repository, op) for op in ("add", "get", "list")} <= measured
+    assert ("service", "create_order") in measured
+    assert all(m["ops_per_sec"] > 0 for m in results["results"])
+    assert not list(tmp_path.iterdir())
+
+
+def test_compare_flags_slowdowns_and_memory_growth() -> None:
+    baseline = {
+        "results": [
+            {
+                "size": 1000,
+                "repository": "product",
+                "operation": "get",
+                "ops_per_sec": 1000.0,
+                "peak_memory_bytes": 1000,
+            }
+        ]
+    }
+    current = copy.deepcopy(baseline)
+    assert compare(current, baseline, threshold=0.2) == []
+
+    current["results"][0]["ops_per_sec"] = 700.0
+    current["results"][0]["peak_memory_bytes"] = 1300
+    regressions = compare(current, baseline, threshold=0.2)
+
+    assert len(regressions) == 2
+    assert all(r.startswith("1000 product.get") for r in regressions)
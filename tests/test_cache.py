@@ -0,0 +1,206 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import pytest
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.exceptions import EntitiesNotFound
+from warehouse_management.domain.models import Customer, LazyList, Order, Product
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.cache import (
+    CachedCustomerRepository,
+    CachedProductRepository,
+    EntityCache,
+)
+from warehouse_management.infrastructure.orm import ProductORM
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyCustomerRepository,
+    SqlAlchemyProductRepository,
+)
+from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = EntityCache(max_size=2, ttl=None)
+    cache.put(("products", 1), "a")
+    cache.put(("products", 2), "b")
+    cache.get(("products", 1))
+    cache.put(("products", 3), "c")
+
+    assert cache.get(("products", 2)) is None
+    assert cache.get(("products", 1)) == "a"
+    assert cache.stats.evictions == 1
+    assert len(cache) == 2
+
+
+def test_cache_expires_entries_after_ttl() -> None:
+    clock = FakeClock()
+    cache = EntityCache(ttl=5, clock=clock)
+    cache.put(("customer", 1), "x")
+    clock.now = 4.9
+    assert cache.get(("customer", 1)) == "x"
+    clock.now = 5
+    assert cache.get(("customer", 1)) is None
+
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.expirations) == (1, 1, 1)
+
+
+def test_cache_invalidation_cascades_to_dependents() -> None:
+    cache = EntityCache()
+    cache.put(("products", 1), "product")
+    cache.put(("orders", 1), "order", depends_on=[("products", 1)])
+    cache.put(("orders", 2), "other order", depends_on=[("products", 2)])
+
+    cache.invalidate([("products", 1)])
+
+    assert cache.get(("orders", 1)) is None
+    assert cache.get(("orders", 2)) == "other order"
+    assert cache.stats.invalidations == 2
+
+
+def test_cache_returns_copies() -> None:
+    cache = EntityCache()
+    cache.put(("orders", 1), Order(id=1))
+    cache.get(("orders", 1)).add_product(  # type: ignore
+        Product(name="x", quantity=1, price=1, category=1)
+    )
+
+    assert cache.get(("orders", 1)) == Order(id=1)
+
+
+def test_cache_copies_lazy_collections_as_plain_lists() -> None:
+    cache = EntityCache()
+    product = Product(name="x", quantity=1, price=1, category=1)
+    cache.put(("orders", 1), Order(id=1, products=LazyList(lambda: [product])))
+
+    cached = cache.get(("orders", 1))
+
+    assert type(cached.products) is list  # type: ignore
+    assert cached == Order(id=1, products=[product])
+
+
+def test_cached_get_reads_through_once(session: Session) -> None:
+    cache = EntityCache()
+    product_repo = SqlAlchemyProductRepository(session)
+    customer_repo = SqlAlchemyCustomerRepository(session)
+    warehouse_service = WarehouseService(
+        product_repo=CachedProductRepository(product_repo, cache),
+        customer_repo=CachedCustomerRepository(customer_repo, cache),
+    )
+    with SqlAlchemyUnitOfWork(lambda: session, cache=cache) as uow:
+        product = warehouse_service.create_product(
+            name="hot", quantity=3, price=5, category=1
+        )
+        warehouse_service.create_customer(
+            first_name="a", last_name="b", address="c", phone="d", email="e", staff_id=1
+        )
+        uow.commit()
+
+        for _ in range(3):
+            product = warehouse_service.get_product(1)
+            customer = warehouse_service.get_customer(1)
+
+    assert isinstance(product, Product)
+    assert isinstance(customer, Customer)
+    assert (cache.stats.hits, cache.stats.misses) == (4, 2)
+
+
+def test_commit_invalidates_written_entities(session: Session) -> None:
+    cache = EntityCache()
+    with SqlAlchemyUnitOfWork(lambda: session, cache=cache) as uow:
+        products, orders, customers = uow.products, uow.orders, uow.customers
+        orders.add(Order(products=[products.get(1)]))
+        uow.commit()
+        order_id = orders.repository.list()[-1].id  # type: ignore
+        orders.get(order_id)
+        customers.get(1)
+
+        session.get(ProductORM, 1).quantity = 42  # type: ignore
+        uow.commit()
+
+        assert (ProductORM.__tablename__, 1) not in cache
+        assert ("orders", order_id) not in cache
+        assert ("customer", 1) in cache
+        assert products.get(1).quantity == 42
+
+
+def test_rollback_invalidates_flushed_entities(session: Session) -> None:
+    cache = EntityCache()
+    with SqlAlchemyUnitOfWork(lambda: session, cache=cache) as uow:
+        session.get(ProductORM, 1).quantity = 7  # type: ignore
+        session.flush()
+        assert uow.products.get(1).quantity == 7
+        uow.rollback()
+
+        assert uow.products.get(1).quantity == 42
+
+
+def test_transaction_that_wrote_reads_around_the_cache(session: Session) -> None:
+    cache = EntityCache()
+    with SqlAlchemyUnitOfWork(lambda: session, cache=cache) as uow:
+        product = uow.products.get(1)
+        committed = product.quantity
+        uow.orders.get(1)
+        product.quantity = 0
+        uow.products.update(product)
+
+        assert uow.products.get(1).quantity == 0
+        assert uow.orders.get(1).products[0].quantity == 0
+        # The write dropped the committed copies and the reads after it put
+        # nothing uncommitted in their place.
+        assert (ProductORM.__tablename__, 1) not in cache
+        assert ("orders", 1) not in cache
+        uow.rollback()
+
+        assert uow.products.get(1).quantity == committed
+
+
+def test_bulk_inserted_rows_are_not_cached_past_rollback(session: Session) -> None:
+    cache = EntityCache()
+    with SqlAlchemyUnitOfWork(lambda: session, cache=cache) as uow:
+        (product_id,) = uow.products.add_many(
+            [Product(name="bulk", quantity=1, price=1, category=1)]
+        )
+        assert uow.products.get(product_id).name == "bulk"
+        uow.rollback()
+
+    with SqlAlchemyUnitOfWork(lambda: session, cache=cache) as uow:
+        with pytest.raises(EntitiesNotFound):
+            uow.products.get(product_id)
+
+
+def test_cache_drops_put_after_invalidation() -> None:
+    cache = EntityCache()
+    generation = cache.generation
+    cache.invalidate([("product", 1)])
+    cache.put(("product", 1), "stale", generation=generation)
+
+    assert ("product", 1) not in cache
+
+
+def test_invalidation_during_load_keeps_the_row_out(session: Session) -> None:
+    cache = EntityCache()
+
+    class RacingProductRepository(SqlAlchemyProductRepository):
+        def get(self, product_id: int) -> Product:
+            product = super().get(product_id)
+            # Another unit of work commits a change to the row meanwhile.
+            cache.invalidate([(ProductORM.__tablename__, product_id)])
+            return product
+
+    with SqlAlchemyUnitOfWork(lambda: session, cache=cache):
+        products = CachedProductRepository(RacingProductRepository(session), cache)
+        products.get(1)
+
+    assert (ProductORM.__tablename__, 1) not in cache
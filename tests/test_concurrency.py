@@ -0,0 +1,80 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Generator, List
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from warehouse_management.domain.models import Product
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.retry import (
+    RetryPolicy,
+    call_in_unit_of_work,
+    call_with_retry,
+    is_conflict,
+)
+from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
+
+
+@pytest.fixture
+def SessionFactory(tmp_path: Path) -> Generator["sessionmaker[Session]", None, None]:
+    engine = build_engine(f"sqlite:///{tmp_path / 'warehouse.db'}")
+    init_db(engine)
+    yield build_session_factory(engine)
+    engine.dispose()
+
+
+def test_concurrent_adjustments_are_not_lost(
+    SessionFactory: "sessionmaker[Session]",
+) -> None:
+    service = WarehouseService(uow=SqlAlchemyUnitOfWork(SessionFactory))
+    service.create_products([Product("bolt", 100, 0.5, 1)])
+    policy = RetryPolicy(attempts=100, base_delay=0.001, max_delay=0.01)
+
+    def adjust(delta: int) -> int:
+        _, retries = call_with_retry(
+            lambda: service.adjust_stock(1, delta), is_conflict, policy
+        )
+        return retries
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(adjust, [1, -1, 2] * 40))
+
+    product = service.get_product(1)
+    assert product.quantity == 100 + 2 * 40
+    # Every adjustment bumped the version exactly once.
+    assert product.version == 1 + 3 * 40
+
+
+def test_call_in_unit_of_work_starts_over_on_a_conflict(
+    SessionFactory: "sessionmaker[Session]",
+) -> None:
+    uow = SqlAlchemyUnitOfWork(SessionFactory)
+    other = WarehouseService(uow=SqlAlchemyUnitOfWork(SessionFactory))
+    other.create_products([Product("bolt", 10, 0.5, 1)])
+    seen: List[int] = []
+
+    def restock(uow: SqlAlchemyUnitOfWork) -> int:
+        product = uow.products.get(1)
+        seen.append(product.version)
+        if len(seen) == 1:
+            # Someone else writes between our read and our update.
+            other.adjust_stock(1, -3)
+        product.quantity += 5
+        uow.products.update(product)
+        return product.quantity
+
+    quantity, retries = call_in_unit_of_work(uow, restock, sleep=lambda _: None)
+
+    assert (quantity, retries, seen) == (12, 1, [1, 2])
+    assert other.get_product(1).quantity == 12
@@ -0,0 +1,174 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import csv
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from warehouse_management.domain.models import Customer, Product
+from warehouse_management.infrastructure.csv_transfer import (
+    ImportReport,
+    export_customers,
+    export_products,
+    import_customers,
+    import_products,
+)
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyCustomerRepository,
+    SqlAlchemyProductRepository,
+)
+from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
+
+
+@pytest.fixture
+def SessionFactory(tmp_path: Path) -> Iterator["sessionmaker[Session]"]:
+    engine = build_engine(f"sqlite:///{tmp_path / 'transfer.db'}")
+    init_db(engine)
+    yield build_session_factory(engine)
+    engine.dispose()
+
+
+def _write(path: Path, rows: List[List[str]]) -> None:
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def _read(path: Path) -> List[List[str]]:
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_import_commits_chunks_and_reports_rejects(
+    SessionFactory: "sessionmaker[Session]", tmp_path: Path
+) -> None:
+    source = tmp_path / "catalog.csv"
+    _write(
+        source,
+        [
+            ["id", "name", "quantity", "price", "category"],
+            ["7", "bolt", "10", "0.5", "1"],
+            ["", "", "1", "1.0", "1"],
+            ["", "nut", "many", "0.1", "1"],
+            ["", "drill\nwith case", "2", "80", "2"],
+            ["", "saw", "3", "20"],
+            ["", "clamp", "4", "12.5", "2"],
+        ],
+    )
+    rejects = tmp_path / "rejected.csv"
+    seen: List[int] = []
+
+    with SqlAlchemyUnitOfWork(SessionFactory) as uow:
+        report = import_products(
+            uow,
+            str(source),
+            chunk_size=2,
+            rejects_path=str(rejects),
+            progress=lambda r: seen.append(r.imported),
+        )
+
+    assert (report.imported, report.rejected, report.chunks) == (3, 3, 3)
+    assert seen == [1, 2, 3]
+    assert report.offset == report.total_bytes
+    assert _read(rejects) == [
+        ["line", "error", "id", "name", "quantity", "price", "category"],
+        ["3", "name is empty", "", "", "1", "1.0", "1"],
+        ["4", "quantity is not an integer: 'many'", "", "nut", "many", "0.1", "1"],
+        ["7", "expected 5 values, got 4", "", "saw", "3", "20"],
+    ]
+    with SessionFactory() as session:
+        assert SqlAlchemyProductRepository(session).list() == [
+            Product("bolt", 10, 0.5, 1, id=1),
+            Product("drill\nwith case", 2, 80.0, 2, id=2),
+            Product("clamp", 4, 12.5, 2, id=3),
+        ]
+
+
+def test_import_resumes_after_the_last_committed_chunk(
+    SessionFactory: "sessionmaker[Session]", tmp_path: Path
+) -> None:
+    source = tmp_path / "catalog.csv"
+    rows = [["name", "quantity", "price", "category"]]
+    rows += [[f"item {i}\n(boxed)", str(i), "1.0", "1"] for i in range(10)]
+    _write(source, rows)
+
+    def crash(report: ImportReport) -> None:
+        if report.chunks == 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        with SqlAlchemyUnitOfWork(SessionFactory) as uow:
+            import_products(uow, str(source), chunk_size=3, progress=crash)
+
+    with SqlAlchemyUnitOfWork(SessionFactory) as uow:
+        report = import_products(uow, str(source), chunk_size=3)
+        again = import_products(uow, str(source), chunk_size=3)
+
+    assert report.resumed
+    assert (report.imported, report.chunks) == (10, 2)
+    assert report.line == 21
+    assert (again.imported, again.chunks) == (10, 0)
+    with SessionFactory() as session:
+        names = [p.name for p in SqlAlchemyProductRepository(session).list()]
+    assert names == [f"item {i}\n(boxed)" for i in range(10)]
+
+    with SqlAlchemyUnitOfWork(SessionFactory) as uow:
+        restarted = import_products(uow, str(source), chunk_size=3, restart=True)
+    assert (restarted.imported, restarted.resumed) == (10, False)
+
+
+def test_customers_round_trip_through_export(
+    SessionFactory: "sessionmaker[Session]", tmp_path: Path
+) -> None:
+    customers = [
+        Customer("Ann", "Lee", "1 Main St, Apt 2", "+1 555", "ann@x.io", 1),
+        Customer("Bob", "O'Neil", 'The "Yard"', "", "", 2),
+        Customer("Cy", "Young", "", "", "cy@x.io", 1),
+    ]
+    with SessionFactory() as session:
+        SqlAlchemyCustomerRepository(session).add_many(customers)
+        session.commit()
+    exported = tmp_path / "customers.csv"
+
+    with SqlAlchemyUnitOfWork(SessionFactory) as uow:
+        report = export_customers(uow, str(exported), chunk_size=2)
+        assert (report.rows, report.chunks) == (3, 2)
+        assert import_customers(uow, str(exported)).imported == 3
+
+    assert not (tmp_path / "customers.csv.part").exists()
+    with SessionFactory() as session:
+        stored = SqlAlchemyCustomerRepository(session).list()
+    assert [c.id for c in stored] == [1, 2, 3, 4, 5, 6]
+    assert [(c.last_name, c.address) for c in stored[3:]] == [
+        (c.last_name, c.address) for c in customers
+    ]
+
+
+def test_export_then_import_products(
+    SessionFactory: "sessionmaker[Session]", tmp_path: Path
+) -> None:
+    with SessionFactory() as session:
+        SqlAlchemyProductRepository(session).add_many(
+            Product(f"p{i}", i, 1.25, i % 3) for i in range(25)
+        )
+        session.commit()
+    exported = tmp_path / "products.csv"
+
+    with SqlAlchemyUnitOfWork(SessionFactory) as uow:
+        assert export_products(uow, str(exported), chunk_size=10).chunks == 3
+        report = import_products(uow, str(exported), chunk_size=10)
+
+    assert (report.imported, report.rejected) == (25, 0)
+    assert _read(exported)[:2] == [
+        ["id", "name", "quantity", "price", "category"],
+        ["1", "p0", "0", "1.25", "0"],
+    ]
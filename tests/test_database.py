@@ -0,0 +1,55 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import pytest
+from pathlib import Path
+from typing import Any, Dict
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from warehouse_management.infrastructure.database import (
+    PROFILES,
+    build_engine,
+    init_db,
+)
+
+
+def _pragma(engine, name: str):  # type: ignore
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+@pytest.mark.parametrize(
+    "profile, expected",
+    [
+        ("oltp", {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000}),
+        ("bulk-load", {"journal_mode": "wal", "synchronous": 0, "temp_store": 2}),
+        ("read-only", {"query_only": 1, "cache_size": -128 * 1024}),
+    ],
+)
+def test_profile_pragmas_are_applied(
+    tmp_path: Path, profile: str, expected: Dict[str, Any]
+) -> None:
+    url = f"sqlite:///{tmp_path / 'warehouse.db'}"
+    init_db(build_engine(url, profile="oltp"))
+    engine = build_engine(url, profile=profile)
+
+    assert {name: _pragma(engine, name) for name in expected} == expected
+    assert engine.pool.size() == PROFILES[profile].pool_size  # type: ignore
+
+
+def test_read_only_profile_rejects_writes(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'warehouse.db'}"
+    init_db(build_engine(url))
+    engine = build_engine(url, profile="read-only")
+
+    with pytest.raises(OperationalError):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO orders DEFAULT VALUES"))
+
+
+def test_unknown_profile() -> None:
+    with pytest.raises(ValueError):
+        build_engine("sqlite:///:memory:", profile="turbo")
@@ -0,0 +1,94 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from warehouse_management.domain.models import Product
+from warehouse_management.infrastructure.memory import (
+    InMemoryProductRepository,
+    InMemorySession,
+    InMemoryStore,
+)
+from warehouse_management.infrastructure.migrations import (
+    apply_columns,
+    apply_indexes,
+    apply_outbox,
+)
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyProductRepository,
+)
+
+
+def test_sync_reads_the_change_seq_index(session: Session) -> None:
+    repository = SqlAlchemyProductRepository(session)
+    repository.add_many([Product(f"sku-{i}", 5, 1.0, 1) for i in range(20)])
+    session.commit()
+    _, watermark = repository.list_changed_since(0, limit=100)
+
+    plan = session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT id FROM products WHERE change_seq > :w "
+            "ORDER BY change_seq LIMIT 10"
+        ),
+        {"w": watermark},
+    )
+    assert "ix_products_change_seq" in " ".join(row[-1] for row in plan)
+
+    product = repository.get(7)
+    product.quantity = 6
+    repository.update(product)
+    session.commit()
+    changed, latest = repository.list_changed_since(watermark)
+    assert [p.id for p in changed] == [7]
+    assert repository.list_changed_since(latest) == ([], latest)
+
+
+def test_rows_from_before_the_upgrade_are_synced() -> None:
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE products (id INTEGER NOT NULL, name VARCHAR, "
+                "quantity INTEGER, price FLOAT, category INTEGER, PRIMARY KEY (id))"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO products VALUES (1, 'a', 1, 1.0, 1), (2, 'b', 2, 1.0, 1)")
+        )
+
+    apply_columns(engine)
+    assert "ix_products_change_seq" in apply_indexes(engine)
+    apply_outbox(engine)
+
+    with sessionmaker(bind=engine)() as session:
+        repository = SqlAlchemyProductRepository(session)
+        legacy, watermark = repository.list_changed_since(0)
+        assert [p.name for p in legacy] == ["a", "b"]
+        repository.add(Product("c", 3, 1.0, 1))
+        session.commit()
+        assert [p.name for p in repository.list_changed_since(watermark)[0]] == ["c"]
+        # Backfilling recorded one insert per legacy row and no updates.
+        outbox = session.execute(text("SELECT entity_id, operation FROM outbox"))
+        assert list(outbox) == [(1, "insert"), (2, "insert"), (3, "insert")]
+
+
+def test_in_memory_sync_log_stays_bounded_by_live_rows() -> None:
+    store = InMemoryStore()
+    session = InMemorySession(store)
+    repository = InMemoryProductRepository(session)
+    repository.add_many([Product(f"sku-{i}", 5, 1.0, 1) for i in range(4)])
+    session.commit()
+    _, watermark = repository.list_changed_since(0)
+
+    for quantity in range(20):
+        product = repository.get(2)
+        product.quantity = quantity
+        repository.update(product)
+        session.commit()
+
+    changed, _ = repository.list_changed_since(watermark)
+    assert [(p.id, p.quantity) for p in changed] == [(2, 19)]
+    assert len(store.change_log["products"]) <= 2 * len(store.changes["products"])
@@ -0,0 +1,106 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import json
+import logging
+
+import pytest
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import Order, Product
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.instrumentation import QueryStats, collect
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyOrderRepository,
+    SqlAlchemyProductRepository,
+)
+from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
+
+
+def _product(name: str) -> Product:
+    return Product(name=name, quantity=1, price=1.0, category=1)
+
+
+def test_statements_are_attributed_to_repository_methods(session: Session) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    ids = product_repo.add_many(_product(f"stats-{i}") for i in range(5))
+    session.commit()
+
+    stats = QueryStats()
+    with collect(stats):
+        product_repo.get(ids[0])
+        products = product_repo.list()
+
+    get = stats["SqlAlchemyProductRepository.get"]
+    assert get.statements == 1
+    assert get.rows == 1
+    assert get.db_time > 0
+    assert get.slowest_statement is not None
+    assert get.slowest_statement.startswith("SELECT")
+    assert stats["SqlAlchemyProductRepository.list"].rows == len(products)
+    assert stats.statements == 2
+
+
+def test_generator_methods_are_attributed_while_iterating(session: Session) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    product_repo.add_many(_product(f"iter-{i}") for i in range(5))
+    session.commit()
+
+    stats = QueryStats()
+    with collect(stats):
+        count = sum(1 for _ in product_repo.iter(batch_size=2))
+
+    assert set(stats.operations) == {"SqlAlchemyProductRepository.iter"}
+    assert stats.rows == count
+
+
+def test_nothing_is_recorded_outside_a_collector(session: Session) -> None:
+    stats = QueryStats()
+    SqlAlchemyProductRepository(session).list()
+    assert stats.statements == 0
+
+
+def test_unit_of_work_exposes_stats_after_each_unit(session: Session) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    service = WarehouseService(
+        product_repo=product_repo, order_repo=SqlAlchemyOrderRepository(session)
+    )
+    ids = product_repo.add_many(_product(f"uow-{i}") for i in range(3))
+    session.commit()
+
+    uow = SqlAlchemyUnitOfWork(lambda: session)
+    with uow:
+        service.create_order(
+            [Product(name="", quantity=1, price=1.0, category=1, id=i) for i in ids]
+        )
+        uow.commit()
+    first = uow.stats
+
+    assert first["SqlAlchemyOrderRepository.add"].statements == 1
+    assert first["SqlAlchemyOrderRepository.add"].rows == len(ids)
+    assert first["SqlAlchemyUnitOfWork.commit"].statements >= 2
+
+    with uow:
+        service.get_order(1)
+    assert uow.stats is not first
+    assert set(uow.stats.operations) == {"SqlAlchemyOrderRepository.get"}
+
+
+def test_stats_export_as_structured_logs(
+    session: Session, caplog: pytest.LogCaptureFixture
+) -> None:
+    stats = QueryStats()
+    with collect(stats):
+        SqlAlchemyOrderRepository(session).add(Order(products=[]))
+        session.flush()
+    session.rollback()
+
+    with caplog.at_level(logging.INFO):
+        stats.log()
+
+    records = [r.db_stats for r in caplog.records]  # type: ignore
+    assert [r["operation"] for r in records] == list(stats.operations)
+    assert json.loads(caplog.records[0].getMessage()) == records[0]
+    assert {"statements", "db_time", "rows", "slowest_statement"} <= set(records[0])
@@ -0,0 +1,113 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import Product
+from warehouse_management.infrastructure.migrations import (
+    apply_columns,
+    apply_indexes,
+    migrate,
+)
+from warehouse_management.infrastructure.orm import order_product_assocoations
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyProductRepository,
+)
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE products (id INTEGER NOT NULL, name VARCHAR, quantity INTEGER, "
+    "price FLOAT, category INTEGER, PRIMARY KEY (id))",
+    "CREATE TABLE orders (id INTEGER NOT NULL, PRIMARY KEY (id))",
+    "CREATE TABLE order_product_assocoations (order_id INTEGER, product_id INTEGER, "
+    "FOREIGN KEY(order_id) REFERENCES orders (id), "
+    "FOREIGN KEY(product_id) REFERENCES products (id))",
+]
+
+
+def test_association_rejects_duplicate_links(session: Session) -> None:
+    session.execute(text("INSERT INTO orders (id) VALUES (1000)"))
+    link = {"order_id": 1000, "product_id": 1}
+    session.execute(order_product_assocoations.insert(), link)
+
+    with pytest.raises(IntegrityError):
+        session.execute(order_product_assocoations.insert(), link)
+    session.rollback()
+
+
+def test_apply_indexes_upgrades_legacy_database() -> None:
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO orders (id) VALUES (1)"))
+        conn.execute(
+            text("INSERT INTO products (id, name) VALUES (1, 'a'), (2, 'b')")
+        )
+        conn.execute(
+            text(
+                "INSERT INTO order_product_assocoations VALUES (1, 1), (1, 1), (1, 2)"
+            )
+        )
+
+    created = apply_indexes(engine)
+
+    assert "ux_order_product_assocoations_order_id_product_id" in created
+    assert "ix_order_product_assocoations_product_id_order_id" in created
+    assert {"ix_products_name", "ix_products_category"} <= set(created)
+    with engine.connect() as conn:
+        links = conn.execute(text("SELECT * FROM order_product_assocoations"))
+        assert sorted(links) == [(1, 1), (1, 2)]
+    assert apply_indexes(engine) == []
+
+
+def test_apply_columns_adds_order_line_quantity() -> None:
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO order_product_assocoations VALUES (1, 1)"))
+        conn.execute(text("INSERT INTO products (id, name) VALUES (1, 'a')"))
+
+    assert sorted(apply_columns(engine)) == [
+        "order_product_assocoations.quantity",
+        "products.change_seq",
+        "products.version",
+    ]
+    with engine.connect() as conn:
+        links = conn.execute(text("SELECT * FROM order_product_assocoations"))
+        assert list(links) == [(1, 1, 1)]
+        versions = conn.execute(text("SELECT id, version FROM products"))
+        assert list(versions) == [(1, 1)]
+    assert apply_columns(engine) == []
+
+
+def test_migrate_makes_a_legacy_database_writable() -> None:
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+
+    assert "products.version" in migrate(engine)
+    with Session(engine) as session:
+        products = SqlAlchemyProductRepository(session)
+        products.add(Product("bolt", 1, 100.0, 10))
+        session.commit()
+        assert products.get(1).version == 1
+    assert migrate(engine) == []
+
+
+def test_apply_indexes_is_noop_on_current_schema(session: Session) -> None:
+    engine = session.get_bind()
+
+    assert apply_indexes(engine) == []  # type: ignore
+    assert apply_columns(engine) == []  # type: ignore
+    indexes = inspect(engine).get_indexes("customer")
+    assert sorted(index["column_names"] for index in indexes) == [
+        ["change_seq"],
+        ["staff_id"],
+    ]
@@ -0,0 +1,139 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import random
+import threading
+from pathlib import Path
+from typing import List
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.exceptions import EntitiesNotFound, InsufficientStock
+from warehouse_management.domain.models import OrderLine, Product
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.orm import order_product_assocoations
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyOrderRepository,
+    SqlAlchemyProductRepository,
+)
+from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
+
+
+def _service(session: Session) -> WarehouseService:
+    return WarehouseService(
+        product_repo=SqlAlchemyProductRepository(session),
+        order_repo=SqlAlchemyOrderRepository(session),
+    )
+
+
+def _stock(session: Session, quantities: List[int]) -> List[Product]:
+    products = [
+        Product(name=f"stock-{q}", quantity=q, price=1.0, category=1)
+        for q in quantities
+    ]
+    SqlAlchemyProductRepository(session).add_many(products)
+    session.commit()
+    return products
+
+
+def test_create_order_reserves_stock_per_line(session: Session) -> None:
+    service = _service(session)
+    bolt, nut = _stock(session, [10, 10])
+
+    order = service.create_order([bolt, nut, bolt], quantities=[3, 1, 2])
+    session.commit()
+
+    assert order.lines == [
+        OrderLine(product_id=bolt.id, quantity=5),
+        OrderLine(product_id=nut.id, quantity=1),
+    ]
+    assert service.get_product(bolt.id).quantity == 5
+    assert service.get_product(nut.id).quantity == 9
+    stored = service.order_repo.list()[-1]  # type: ignore
+    assert stored.lines == order.lines
+    assert [p.id for p in stored.products] == [bolt.id, nut.id]
+    assert service.get_order(stored.id) == stored
+
+
+def test_short_line_reserves_nothing(session: Session) -> None:
+    service = _service(session)
+    plenty, scarce, empty = _stock(session, [10, 1, 0])
+    orders_before = len(service.order_repo.list())  # type: ignore
+
+    with SqlAlchemyUnitOfWork(lambda: session) as uow:
+        with pytest.raises(InsufficientStock) as exc_info:
+            service.create_order([plenty, scarce, empty], quantities=[5, 2, 1])
+        uow.commit()
+
+    assert exc_info.value.product_ids == [scarce.id, empty.id]
+    remaining = [service.get_product(p.id).quantity for p in (plenty, scarce, empty)]
+    assert remaining == [10, 1, 0]
+    assert len(service.order_repo.list()) == orders_before  # type: ignore
+
+
+def test_unknown_product_is_not_reported_as_short(session: Session) -> None:
+    ghost = Product(name="ghost", quantity=0, price=0, category=0, id=999_999)
+
+    with pytest.raises(EntitiesNotFound):
+        _service(session).create_order([ghost])
+    session.rollback()
+
+
+def test_concurrent_orders_never_oversell(tmp_path: Path) -> None:
+    engine = build_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+    init_db(engine)
+    SessionFactory = build_session_factory(engine)
+    stock = 50
+    with SessionFactory() as session:
+        products = _stock(session, [stock] * 3)
+
+    writers, orders_per_writer = 8, 25
+    placed: List[int] = []
+    rejected: List[int] = []
+    errors: List[BaseException] = []
+
+    def writer(seed: int) -> None:
+        rng = random.Random(seed)
+        try:
+            for _ in range(orders_per_writer):
+                lines = rng.sample(products, 2)
+                quantities = [rng.randint(1, 3) for _ in lines]
+                with SessionFactory() as session:
+                    try:
+                        _service(session).create_order(lines, quantities)
+                        session.commit()
+                        placed.append(sum(quantities))
+                    except InsufficientStock:
+                        session.rollback()
+                        rejected.append(seed)
+        except BaseException as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(placed) + len(rejected) == writers * orders_per_writer
+    assert rejected, "the stock should run out under this load"
+    with SessionFactory() as session:
+        remaining = [
+            SqlAlchemyProductRepository(session).get(p.id).quantity for p in products
+        ]
+        ordered = session.execute(
+            select(func.sum(order_product_assocoations.c.quantity))
+        ).scalar_one()
+    assert all(quantity >= 0 for quantity in remaining)
+    assert ordered == sum(placed) == stock * len(products) - sum(remaining)
+    engine.dispose()
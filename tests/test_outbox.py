@@ -0,0 +1,143 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+from pathlib import Path
+from typing import Generator, List, Tuple
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from warehouse_management.domain.exceptions import InsufficientStock
+from warehouse_management.domain.models import Product
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.migrations import apply_outbox
+from warehouse_management.infrastructure.outbox import (
+    Change,
+    OutboxConsumer,
+    compact,
+    drop_consumer,
+)
+from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
+
+
+@pytest.fixture
+def uow(tmp_path: Path) -> Generator[SqlAlchemyUnitOfWork, None, None]:
+    engine = build_engine(f"sqlite:///{tmp_path / 'warehouse.db'}")
+    init_db(engine)
+    yield SqlAlchemyUnitOfWork(build_session_factory(engine))
+    engine.dispose()
+
+
+def keys(changes: List[Change]) -> List[Tuple[str, int, str]]:
+    return [(c.entity, c.entity_id, c.operation) for c in changes]
+
+
+def test_writes_are_recorded_in_their_transaction(uow: SqlAlchemyUnitOfWork) -> None:
+    service = WarehouseService(uow=uow)
+    service.create_products([Product("bolt", 10, 0.5, 1), Product("nut", 1, 0.25, 1)])
+    service.create_customer("Ann", "Lee", "Main St", "555", "ann@x.io", 1)
+    bolt = service.get_product(1)
+    bolt.price = 0.75
+    service.update_product(bolt)
+    service.create_order([service.get_product(1)], [3])
+    with pytest.raises(InsufficientStock):
+        service.create_order([service.get_product(2)], [5])
+
+    consumer = OutboxConsumer(uow, "search")
+    assert keys(consumer.poll()) == [
+        ("products", 1, "insert"),
+        ("products", 2, "insert"),
+        ("customer", 1, "insert"),
+        ("products", 1, "update"),
+        ("products", 1, "update"),
+        ("orders", 1, "insert"),
+    ]
+
+
+def test_consumer_tails_from_its_stored_offset(uow: SqlAlchemyUnitOfWork) -> None:
+    service = WarehouseService(uow=uow)
+    service.create_products([Product(f"sku-{i}", 1, 1.0, 1) for i in range(5)])
+    batches: List[List[int]] = []
+
+    def handle(changes: List[Change]) -> None:
+        batches.append([c.entity_id for c in changes])
+
+    consumer = OutboxConsumer(uow, "warmer", batch_size=2)
+    assert consumer.run(handle) == 5
+    assert batches == [[1, 2], [3, 4], [5]]
+
+    service.create_product("sku-5", 1, 1.0, 1)
+    # A new instance under the same name resumes where the last one stopped.
+    assert OutboxConsumer(uow, "warmer", batch_size=2).run(handle) == 1
+    assert batches[-1] == [6]
+    consumer.acknowledge(2)
+    assert consumer.offset() == 6
+
+    late = OutboxConsumer(uow, "late", from_end=True)
+    assert (late.offset(), late.poll()) == (6, [])
+
+
+def test_unacknowledged_batch_is_delivered_again(uow: SqlAlchemyUnitOfWork) -> None:
+    WarehouseService(uow=uow).create_product("bolt", 1, 1.0, 1)
+    consumer = OutboxConsumer(uow, "search")
+
+    def fail(changes: List[Change]) -> None:
+        raise RuntimeError("index is down")
+
+    with pytest.raises(RuntimeError):
+        consumer.run(fail)
+    assert keys(consumer.poll()) == [("products", 1, "insert")]
+
+
+def test_compaction_keeps_what_consumers_still_need(
+    uow: SqlAlchemyUnitOfWork,
+) -> None:
+    service = WarehouseService(uow=uow)
+    service.create_products([Product("bolt", 10, 0.5, 1), Product("nut", 10, 0.5, 1)])
+    fast = OutboxConsumer(uow, "fast")
+    slow = OutboxConsumer(uow, "slow")
+    slow.offset()
+    for _ in range(3):
+        service.adjust_stock(1, 1)
+    fast.run(lambda changes: None)
+
+    report = compact(uow, chunk_size=2)
+
+    # Nothing was acknowledged by both; bolt's insert and first two updates
+    # are superseded by its last update.
+    assert (report.consumed, report.superseded) == (0, 3)
+    assert keys(slow.poll()) == [("products", 2, "insert"), ("products", 1, "update")]
+    assert fast.poll() == []
+
+    drop_consumer(uow, "slow")
+    report = compact(uow)
+    assert (report.consumed, report.superseded) == (2, 0)
+    service.adjust_stock(2, 1)
+    assert keys(fast.poll()) == [("products", 2, "update")]
+    # Ids of compacted changes are never handed out again.
+    assert fast.poll()[0].offset == 6
+
+
+def test_apply_outbox_upgrades_existing_database() -> None:
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(
+            text("CREATE TABLE products (id INTEGER NOT NULL, PRIMARY KEY (id))")
+        )
+
+    created = apply_outbox(engine)
+
+    assert created == ["outbox", "outbox_consumers", "outbox_products"]
+    assert apply_outbox(engine) == []
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO products (id) VALUES (7)"))
+    uow = SqlAlchemyUnitOfWork(sessionmaker(bind=engine))
+    assert keys(OutboxConsumer(uow, "search").poll()) == [("products", 7, "insert")]
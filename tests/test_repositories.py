@@ -0,0 +1,334 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.domain.exceptions import EntitiesNotFound
+from warehouse_management.domain.models import (
+    Category,
+    Customer,
+    Order,
+    Product,
+    Role,
+    Staff,
+)
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyCategoryRepository,
+    SqlAlchemyCustomerRepository,
+    SqlAlchemyOrderRepository,
+    SqlAlchemyProductRepository,
+    SqlAlchemyRoleRepository,
+    SqlAlchemyStaffRepository,
+)
+
+
+@contextmanager
+def capture_statements(session: Session) -> Iterator[List[str]]:
+    statements: List[str] = []
+
+    def capture(conn, cursor, statement, *args) -> None:  # type: ignore
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def test_product_add_many_returns_ids_in_input_order(session: Session) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    products = [
+        Product(name=f"bulk-{i}", quantity=i, price=1.5, category=7)
+        for i in range(25)
+    ]
+
+    ids = product_repo.add_many(products, chunk_size=10)
+    session.commit()
+
+    assert len(ids) == 25
+    assert [p.id for p in products] == ids
+    assert product_repo.get(ids[13]) == products[13]
+
+
+def test_product_add_many_uses_one_statement_per_chunk(session: Session) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    with capture_statements(session) as statements:
+        product_repo.add_many(
+            (Product(name="x", quantity=1, price=1, category=1) for _ in range(25)),
+            chunk_size=10,
+        )
+    session.commit()
+
+    assert len([s for s in statements if s.startswith("INSERT")]) == 3
+
+
+def test_services_create_products(session: Session) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    warehouse_service = WarehouseService(product_repo=product_repo)
+
+    ids = warehouse_service.create_products(
+        Product(name=f"feed-{i}", quantity=1, price=10, category=3) for i in range(3)
+    )
+    session.commit()
+
+    assert [warehouse_service.get_product(i).name for i in ids] == [
+        "feed-0",
+        "feed-1",
+        "feed-2",
+    ]
+
+
+def test_order_add_resolves_products_in_one_query(session: Session) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    order_repo = SqlAlchemyOrderRepository(session)
+    products = [
+        Product(name="line", quantity=5, price=2, category=1) for _ in range(200)
+    ]
+    product_repo.add_many(products)
+    session.commit()
+
+    with capture_statements(session) as statements:
+        order_repo.add(Order(products=products))
+        session.flush()
+    session.commit()
+
+    assert len([s for s in statements if s.startswith("SELECT")]) == 1
+
+
+def test_add_with_missing_ids_lists_all_of_them(session: Session) -> None:
+    category_repo = SqlAlchemyCategoryRepository(session)
+    product = SqlAlchemyProductRepository(session).get(1)
+    missing = [
+        Product(id=id_, name="ghost", quantity=0, price=0, category=0)
+        for id_ in (999_001, 999_002)
+    ]
+
+    with pytest.raises(EntitiesNotFound) as exc_info:
+        category_repo.add(
+            Category(name="ghosts", description="", products=[product, *missing])
+        )
+    session.rollback()
+
+    assert exc_info.value.entity == "Product"
+    assert exc_info.value.ids == [999_001, 999_002]
+
+
+@pytest.fixture(scope="module")
+def aggregates(session: Session) -> int:
+    count = 20
+    customer_repo = SqlAlchemyCustomerRepository(session)
+    staff_repo = SqlAlchemyStaffRepository(session)
+    role_repo = SqlAlchemyRoleRepository(session)
+    order_repo = SqlAlchemyOrderRepository(session)
+    category_repo = SqlAlchemyCategoryRepository(session)
+    products = [Product(name="agg", quantity=1, price=1, category=1) for _ in range(3)]
+    SqlAlchemyProductRepository(session).add_many(products)
+    for _ in range(count):
+        order_repo.add(Order(products=products))
+        category_repo.add(Category(name="c", description="d", products=products))
+        customer_repo.add(
+            Customer(
+                first_name="f",
+                last_name="l",
+                address="a",
+                phone="p",
+                email="e",
+                staff_id=1,
+            )
+        )
+    session.flush()
+    customers = customer_repo.list()
+    for _ in range(count):
+        staff_repo.add(
+            Staff(
+                first_name="f",
+                last_name="l",
+                address="a",
+                phone="p",
+                email="e",
+                user_name="u",
+                role_id=1,
+                customers=customers[:2],
+            )
+        )
+    session.flush()
+    staffs = staff_repo.list()
+    for _ in range(count):
+        role_repo.add(Role(name="r", description="d", staffs=staffs[:2]))
+    session.commit()
+    return count
+
+
+@pytest.mark.parametrize(
+    "repository_class, loading, expected_queries",
+    [
+        (SqlAlchemyOrderRepository, "selectin", 2),
+        (SqlAlchemyOrderRepository, "joined", 1),
+        (SqlAlchemyOrderRepository, "none", 1),
+        (SqlAlchemyCategoryRepository, "selectin", 2),
+        (SqlAlchemyCategoryRepository, "joined", 1),
+        (SqlAlchemyStaffRepository, "selectin", 2),
+        (SqlAlchemyStaffRepository, "joined", 1),
+        (SqlAlchemyRoleRepository, "selectin", 3),
+        (SqlAlchemyRoleRepository, "joined", 1),
+        (SqlAlchemyRoleRepository, "none", 1),
+    ],
+)
+def test_list_runs_fixed_number_of_queries(
+    session: Session,
+    aggregates: int,
+    repository_class: type,
+    loading: str,
+    expected_queries: int,
+) -> None:
+    session.expunge_all()
+    repository = repository_class(session)
+
+    with capture_statements(session) as statements:
+        result = repository.list(loading=loading)
+
+    assert len(result) >= aggregates
+    assert len(statements) == expected_queries
+
+
+def test_list_loading_strategies_return_same_aggregates(
+    session: Session, aggregates: int
+) -> None:
+    role_repo = SqlAlchemyRoleRepository(session)
+    session.expunge_all()
+    selectin = role_repo.list(loading="selectin")
+    session.expunge_all()
+    joined = role_repo.list(loading="joined")
+    session.expunge_all()
+    bare = role_repo.list(loading="none")
+
+    assert selectin == joined
+    assert selectin[0].staffs[0].customers
+    assert all(role.staffs == [] for role in bare)
+
+
+@pytest.mark.parametrize("depth, expected_queries", [(0, 1), (1, 2), (2, 3), (None, 3)])
+def test_get_reads_collections_down_to_depth(
+    session: Session, aggregates: int, depth: int, expected_queries: int
+) -> None:
+    role_repo = SqlAlchemyRoleRepository(session)
+
+    with capture_statements(session) as statements:
+        role = role_repo.get(1, depth=depth)
+
+    assert len(statements) == expected_queries
+    assert role == role_repo.get(1)
+
+
+def test_lazy_collections_load_for_the_whole_read_on_first_touch(
+    session: Session, aggregates: int
+) -> None:
+    role_repo = SqlAlchemyRoleRepository(session)
+    roles = role_repo.list(depth=0)
+
+    with capture_statements(session) as statements:
+        assert len(roles[0].staffs) == 2
+        assert all(len(role.staffs) == 2 for role in roles)
+    assert len(statements) == 1
+    with capture_statements(session) as statements:
+        customers = [s.customers for role in roles for s in role.staffs]
+        assert all(len(c) == 2 for c in customers)
+    assert len(statements) == 1
+    assert roles == role_repo.list()
+
+
+@pytest.mark.parametrize("depth", [0, 1])
+def test_partial_reads_give_each_aggregate_its_own_collections(
+    session: Session, aggregates: int, depth: int
+) -> None:
+    # Every role links the same two staff members.
+    first, second = SqlAlchemyRoleRepository(session).list(depth=depth)[:2]
+
+    assert first.staffs[0].id == second.staffs[0].id
+    assert first.staffs is not second.staffs
+    assert first.staffs[0] is not second.staffs[0]
+    assert first.staffs[0].customers is not second.staffs[0].customers
+    first.staffs[0].customers.clear()
+    assert len(second.staffs[0].customers) == 2
+
+
+def test_projection_selects_only_the_named_columns(
+    session: Session, aggregates: int
+) -> None:
+    order_repo = SqlAlchemyOrderRepository(session)
+
+    with capture_statements(session) as statements:
+        order = order_repo.get(1, fields=("name",), depth=0)
+        names = [(p.id, p.name, p.price) for p in order.products]
+
+    assert names == [(p.id, p.name, None) for p in order_repo.get(1).products]
+    assert "products.price" not in statements[-1]
+    assert "products.name" in statements[-1]
+
+
+def test_product_iter_pages_by_id(session: Session) -> None:
+    product_repo = SqlAlchemyProductRepository(session)
+    expected = [p.id for p in product_repo.list()]
+
+    with capture_statements(session) as statements:
+        ids = [p.id for p in product_repo.iter(batch_size=10)]
+
+    assert ids == sorted(expected)
+    assert len(statements) == len(expected) // 10 + 1
+    assert all("products.id > ?" in s and "LIMIT" in s for s in statements)
+
+
+def test_iter_resumes_after_id(session: Session, aggregates: int) -> None:
+    role_repo = SqlAlchemyRoleRepository(session)
+    roles = role_repo.list()
+
+    resumed = list(role_repo.iter(batch_size=3, after_id=roles[4].id))
+
+    assert resumed == roles[5:]
+
+
+def test_iter_is_lazy(session: Session) -> None:
+    customer_repo = SqlAlchemyCustomerRepository(session)
+
+    with capture_statements(session) as statements:
+        customers = customer_repo.iter(batch_size=2)
+        assert statements == []
+        first = next(customers)
+
+    assert first.id == customer_repo.list()[0].id
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize(
+    "repository_class",
+    [
+        SqlAlchemyProductRepository,
+        SqlAlchemyOrderRepository,
+        SqlAlchemyCategoryRepository,
+        SqlAlchemyCustomerRepository,
+        SqlAlchemyRoleRepository,
+        SqlAlchemyStaffRepository,
+    ],
+)
+def test_get_reads_rows_without_orm_instances(
+    session: Session, aggregates: int, repository_class: type
+) -> None:
+    repository = repository_class(session)
+    expected = repository.list()[-1]
+    session.expunge_all()
+
+    loaded = repository.get(expected.id)
+
+    assert loaded == expected
+    assert len(session.identity_map) == 0
+    assert not hasattr(loaded, "__dict__")
@@ -0,0 +1,524 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+import pytest
+
+from warehouse_management.domain.exceptions import (
+    ConcurrencyConflict,
+    EntitiesNotFound,
+    InsufficientStock,
+    ProjectedEntity,
+)
+from warehouse_management.domain.models import (
+    Category,
+    CategoryStock,
+    CategorySummary,
+    Customer,
+    LazyList,
+    LowStockItem,
+    Order,
+    OrderLine,
+    Product,
+    ProductOrderCount,
+    Role,
+    Staff,
+)
+from warehouse_management.domain.repositories import (
+    CategoryRepository,
+    CustomerRepository,
+    OrderRepository,
+    ProductRepository,
+    RoleRepository,
+    StaffRepository,
+)
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.domain.unit_of_work import UnitOfWork
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.memory import (
+    InMemoryCategoryRepository,
+    InMemoryCustomerRepository,
+    InMemoryOrderRepository,
+    InMemoryProductRepository,
+    InMemoryRoleRepository,
+    InMemorySession,
+    InMemoryStaffRepository,
+    InMemoryStore,
+    InMemoryUnitOfWork,
+)
+from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
+
+
+@dataclass
+class Backend:
+    products: ProductRepository
+    orders: OrderRepository
+    categories: CategoryRepository
+    customers: CustomerRepository
+    roles: RoleRepository
+    staffs: StaffRepository
+    uow: UnitOfWork
+
+
+def _sqlalchemy(uow: SqlAlchemyUnitOfWork) -> Backend:
+    return Backend(
+        uow.products,
+        uow.orders,
+        uow.categories,
+        uow.customers,
+        uow.roles,
+        uow.staffs,
+        uow,
+    )
+
+
+def _in_memory(session: InMemorySession) -> Backend:
+    return Backend(
+        InMemoryProductRepository(session),
+        InMemoryOrderRepository(session),
+        InMemoryCategoryRepository(session),
+        InMemoryCustomerRepository(session),
+        InMemoryRoleRepository(session),
+        InMemoryStaffRepository(session),
+        InMemoryUnitOfWork(session),
+    )
+
+
+# Every test below runs against both backends. open_backend() starts a new
+# session on the same store, the way a second request would.
+@pytest.fixture(params=["sqlalchemy", "memory"])
+def open_backend(
+    request: pytest.FixtureRequest, tmp_path: Path
+) -> Iterator[Callable[[], Backend]]:
+    opened: List[Backend] = []
+    stack = ExitStack()
+    if request.param == "sqlalchemy":
+        # A file database: sessions on one :memory: connection would see
+        # each other's uncommitted writes.
+        engine = build_engine(f"sqlite:///{tmp_path / 'contract.db'}")
+        init_db(engine)
+        SessionFactory = build_session_factory(engine)
+
+        def open_session() -> Backend:
+            # Kept on one session, so that a nested block in a test shares
+            # the backend's transaction the way InMemoryUnitOfWork does.
+            session = SessionFactory()
+            uow = SqlAlchemyUnitOfWork(lambda: session)
+            return _sqlalchemy(stack.enter_context(uow))
+    else:
+        store = InMemoryStore()
+
+        def open_session() -> Backend:
+            return _in_memory(InMemorySession(store))
+
+    def open_backend() -> Backend:
+        opened.append(open_session())
+        return opened[-1]
+
+    yield open_backend
+    for backend in opened:
+        backend.uow.rollback()
+    stack.close()
+    if request.param == "sqlalchemy":
+        engine.dispose()
+
+
+@pytest.fixture
+def backend(open_backend: Callable[[], Backend]) -> Backend:
+    return open_backend()
+
+
+def _product(name: str = "bolt", quantity: int = 10, category: int = 1) -> Product:
+    return Product(name=name, quantity=quantity, price=2.0, category=category)
+
+
+def _customer(first_name: str, staff_id: int = 1) -> Customer:
+    return Customer(first_name, "Doe", "Main St", "555", "c@x.io", staff_id)
+
+
+def _staff(
+    user_name: str, role_id: int = 1, customers: Optional[List[Customer]] = None
+) -> Staff:
+    staff = Staff("Ann", "Lee", "Elm St", "556", "s@x.io", user_name, role_id)
+    staff.customers = customers or []
+    return staff
+
+
+def test_added_entities_read_back(backend: Backend) -> None:
+    backend.products.add(_product())
+    backend.customers.add(_customer("John"))
+    backend.uow.commit()
+
+    assert backend.products.get(1) == Product("bolt", 10, 2.0, 1, id=1)
+    assert backend.customers.get(1) == Customer(
+        "John", "Doe", "Main St", "555", "c@x.io", 1, id=1
+    )
+    assert backend.products.list() == [backend.products.get(1)]
+
+
+def test_add_many_assigns_ids_in_order(backend: Backend) -> None:
+    products = [_product(f"p{i}") for i in range(5)]
+
+    ids = backend.products.add_many(products)
+    backend.uow.commit()
+
+    assert ids == [1, 2, 3, 4, 5]
+    assert [p.id for p in products] == ids
+    assert [p.name for p in backend.products.list()] == [p.name for p in products]
+
+    customers = [_customer("John"), _customer("Jane")]
+    assert backend.customers.add_many(customers) == [1, 2]
+    backend.uow.commit()
+    assert backend.customers.list() == customers
+
+
+def test_get_unknown_id_raises_entities_not_found(backend: Backend) -> None:
+    for repository in (
+        backend.products,
+        backend.orders,
+        backend.categories,
+        backend.customers,
+        backend.roles,
+        backend.staffs,
+    ):
+        with pytest.raises(EntitiesNotFound) as exc_info:
+            repository.get(42)
+        assert exc_info.value.ids == [42]
+
+
+def test_links_to_unknown_entities_are_rejected(backend: Backend) -> None:
+    backend.products.add(_product())
+    backend.uow.commit()
+    known = backend.products.get(1)
+    ghosts = [Product("ghost", 0, 0.0, 0, id=i) for i in (8, 9)]
+
+    with pytest.raises(EntitiesNotFound) as exc_info:
+        backend.orders.add(Order(products=[known, *ghosts]))
+    assert (exc_info.value.entity, exc_info.value.ids) == ("Product", [8, 9])
+    with pytest.raises(EntitiesNotFound):
+        backend.categories.add(Category("tools", "", products=ghosts))
+    with pytest.raises(EntitiesNotFound):
+        backend.staffs.add(_staff("ann", customers=[_customer("x")]))
+    backend.uow.rollback()
+    assert backend.orders.list() == backend.categories.list() == []
+
+
+def test_aggregates_read_back_with_their_links(backend: Backend) -> None:
+    backend.products.add_many([_product("bolt"), _product("nut")])
+    backend.customers.add(_customer("John"))
+    backend.customers.add(_customer("Jane"))
+    backend.uow.commit()
+    bolt, nut = backend.products.list()
+    john, jane = backend.customers.list()
+
+    order = Order()
+    order.add_product(nut, 2)
+    order.add_product(bolt)
+    backend.orders.add(order)
+    backend.categories.add(Category("tools", "hand tools", products=[nut, bolt]))
+    backend.staffs.add(_staff("ann", customers=[jane, john]))
+    backend.uow.commit()
+    ann = backend.staffs.get(1)
+    backend.roles.add(Role("clerk", "front desk", staffs=[ann]))
+    backend.uow.commit()
+
+    assert backend.orders.get(1) == Order(
+        id=1,
+        products=[bolt, nut],
+        lines=[OrderLine(bolt.id, 1), OrderLine(nut.id, 2)],
+    )
+    assert backend.orders.list() == [backend.orders.get(1)]
+    assert backend.categories.get(1).products == [bolt, nut]
+    assert ann.customers == [john, jane]
+    assert backend.roles.get(1) == Role("clerk", "front desk", id=1, staffs=[ann])
+    assert backend.roles.list() == [backend.roles.get(1)]
+    assert backend.staffs.list() == [ann]
+
+
+def test_partial_reads_project_fields_and_defer_collections(
+    backend: Backend,
+) -> None:
+    backend.products.add(_product("bolt"))
+    backend.customers.add(_customer("John"))
+    backend.uow.commit()
+    bolt, john = backend.products.get(1), backend.customers.get(1)
+    backend.orders.add(Order(products=[bolt]))
+    backend.staffs.add(_staff("ann", customers=[john]))
+    backend.uow.commit()
+    backend.roles.add(Role("clerk", "front desk", staffs=[backend.staffs.get(1)]))
+    backend.uow.commit()
+
+    role = backend.roles.get(1, fields=("name", "user_name", "first_name"), depth=1)
+
+    assert (role.name, role.description) == ("clerk", None)
+    (ann,) = role.staffs
+    assert (ann.id, ann.user_name, ann.email) == (1, "ann", None)
+    assert isinstance(ann.customers, LazyList) and not ann.customers.loaded
+    assert [(c.id, c.first_name, c.email) for c in ann.customers] == [
+        (1, "John", None)
+    ]
+    order = backend.orders.list(depth=0)[0]
+    assert order.lines == [OrderLine(bolt.id, 1)]
+    assert isinstance(order.products, LazyList) and not order.products.loaded
+    assert order.products == [bolt]
+    assert backend.roles.get(1, depth=0) == backend.roles.get(1)
+    assert backend.staffs.list(depth=0)[0].customers == [john]
+    assert [s.user_name for s in backend.staffs.list(["user_name"])] == ["ann"]
+
+
+def test_projected_entities_cannot_be_written_back(backend: Backend) -> None:
+    backend.staffs.add(_staff("ann"))
+    backend.uow.commit()
+
+    for fields in (("user_name",), ("user_name", "version")):
+        ann = backend.staffs.get(1, fields=fields)
+        assert ann.version is None
+        with pytest.raises(ProjectedEntity):
+            backend.staffs.update(ann)
+    assert backend.staffs.get(1).email == "s@x.io"
+
+
+def test_iter_pages_after_id(backend: Backend) -> None:
+    backend.products.add_many(_product(f"p{i}") for i in range(7))
+    for name in ("a", "b", "c"):
+        backend.customers.add(_customer(name))
+    backend.uow.commit()
+
+    assert [p.id for p in backend.products.iter(batch_size=3)] == list(range(1, 8))
+    assert [p.id for p in backend.products.iter(batch_size=2, after_id=4)] == [5, 6, 7]
+    assert [c.first_name for c in backend.customers.iter(after_id=1)] == ["b", "c"]
+
+
+def test_secondary_lookups(backend: Backend) -> None:
+    backend.products.add_many(
+        [_product("bolt", category=1), _product("nut", category=2)]
+    )
+    backend.products.add(_product("bolt", category=2))
+    backend.customers.add(_customer("John", staff_id=1))
+    backend.customers.add(_customer("Jane", staff_id=2))
+    backend.staffs.add(_staff("ann", role_id=1))
+    backend.staffs.add(_staff("bob", role_id=1))
+    backend.uow.commit()
+    # Rows written but not yet committed are found by their own session.
+    backend.products.add(_product("nut", category=1))
+
+    assert [p.id for p in backend.products.list_by_category(1)] == [1, 4]
+    assert [p.id for p in backend.products.list_by_category(2)] == [2, 3]
+    assert [p.id for p in backend.products.find_by_name("bolt")] == [1, 3]
+    assert backend.products.find_by_name("washer") == []
+    assert [c.first_name for c in backend.customers.list_by_staff(2)] == ["Jane"]
+    assert [s.user_name for s in backend.staffs.list_by_role(1)] == ["ann", "bob"]
+    assert backend.staffs.list_by_role(7) == []
+
+
+def test_reserve_is_all_or_nothing(backend: Backend) -> None:
+    backend.products.add_many([_product("bolt", 5), _product("nut", 1)])
+    backend.uow.commit()
+
+    backend.products.reserve([OrderLine(1, 2), OrderLine(1, 1)])
+    assert backend.products.get(1).quantity == 2
+    with pytest.raises(InsufficientStock) as exc_info:
+        backend.products.reserve([OrderLine(1, 1), OrderLine(2, 2)])
+    assert exc_info.value.product_ids == [2]
+    with pytest.raises(EntitiesNotFound):
+        backend.products.reserve([OrderLine(1, 1), OrderLine(99, 1)])
+    backend.uow.commit()
+
+    assert [p.quantity for p in backend.products.list()] == [2, 1]
+
+
+def test_analytics(backend: Backend) -> None:
+    backend.products.add_many(
+        [_product("bolt", 10, 1), _product("nut", 3, 1), _product("saw", 1, 2)]
+    )
+    backend.uow.commit()
+    service = WarehouseService(backend.products, backend.orders)
+    bolt, nut, saw = backend.products.list()
+    for products in ([bolt, nut], [bolt], [saw, bolt], [nut]):
+        service.create_order(products)
+    backend.uow.commit()
+
+    assert backend.products.stock_value() == (7 + 1 + 0) * 2.0
+    assert backend.products.stock_by_category() == [
+        CategoryStock(1, 8, 16.0),
+        CategoryStock(2, 0, 0.0),
+    ]
+    assert backend.products.category_summary() == [
+        CategorySummary(1, 2, 8, 16.0),
+        CategorySummary(2, 1, 0, 0.0),
+    ]
+    assert backend.products.low_stock(2) == [
+        LowStockItem(3, "saw", 0),
+        LowStockItem(2, "nut", 1),
+    ]
+    assert backend.products.top_ordered(2) == [
+        ProductOrderCount(1, "bolt", 3),
+        ProductOrderCount(2, "nut", 2),
+    ]
+
+
+def test_commit_publishes_and_rollback_discards(
+    open_backend: Callable[[], Backend]
+) -> None:
+    writer, reader = open_backend(), open_backend()
+    writer.products.add_many([_product("bolt", 5)])
+    writer.uow.commit()
+
+    writer.products.add(_product("nut"))
+    writer.products.reserve([OrderLine(1, 3)])
+    assert reader.products.list() == [Product("bolt", 5, 2.0, 1, id=1)]
+    writer.uow.rollback()
+    reader.uow.rollback()
+
+    assert writer.products.list() == [Product("bolt", 5, 2.0, 1, id=1)]
+    writer.products.reserve([OrderLine(1, 3)])
+    writer.uow.commit()
+    assert reader.products.get(1).quantity == 2
+
+
+def test_leaving_the_unit_of_work_discards_uncommitted(
+    open_backend: Callable[[], Backend]
+) -> None:
+    backend = open_backend()
+    with backend.uow:
+        backend.customers.add(_customer("John"))
+        backend.uow.commit()
+        backend.customers.add(_customer("Jane"))
+
+    assert [c.first_name for c in open_backend().customers.list()] == ["John"]
+
+
+def test_update_writes_back_and_bumps_the_version(backend: Backend) -> None:
+    backend.products.add_many([_product("bolt", 5, category=1)])
+    backend.customers.add_many([_customer("John", staff_id=1)])
+    backend.staffs.add(_staff("ann", customers=[backend.customers.get(1)]))
+    backend.uow.commit()
+
+    product = backend.products.get(1)
+    assert product.version == 1
+    product.quantity, product.category = 7, 2
+    backend.products.update(product)
+    customer = backend.customers.get(1)
+    customer.staff_id = 2
+    backend.customers.update(customer)
+    staff = backend.staffs.get(1)
+    staff.user_name = "ann.lee"
+    backend.staffs.update(staff)
+    backend.uow.commit()
+
+    assert (product.version, customer.version, staff.version) == (2, 2, 2)
+    assert backend.products.get(1) == Product("bolt", 7, 2.0, 2, id=1)
+    assert backend.products.get(1).version == 2
+    assert backend.products.list_by_category(1) == []
+    assert [c.id for c in backend.customers.list_by_staff(2)] == [1]
+    assert backend.staffs.get(1).user_name == "ann.lee"
+    assert backend.staffs.get(1).customers == [backend.customers.get(1)]
+
+
+def test_stale_update_conflicts(open_backend: Callable[[], Backend]) -> None:
+    first, second = open_backend(), open_backend()
+    first.products.add_many([_product("bolt", 5)])
+    first.uow.commit()
+    mine, theirs = first.products.get(1), second.products.get(1)
+    second.uow.rollback()
+
+    mine.quantity = 7
+    first.products.update(mine)
+    first.uow.commit()
+    theirs.quantity = 9
+    with pytest.raises(ConcurrencyConflict) as exc_info:
+        second.products.update(theirs)
+    second.uow.rollback()
+
+    assert (exc_info.value.expected, exc_info.value.actual) == (1, 2)
+    assert second.products.get(1).quantity == 7
+
+
+def test_reserve_moves_the_version(backend: Backend) -> None:
+    backend.products.add_many([_product("bolt", 5)])
+    backend.uow.commit()
+    before = backend.products.get(1)
+
+    backend.products.reserve([OrderLine(1, 2)])
+    backend.uow.commit()
+    with pytest.raises(ConcurrencyConflict):
+        backend.products.update(before)
+    backend.uow.rollback()
+
+    current = backend.products.get(1)
+    assert (current.quantity, current.version) == (3, 2)
+    current.quantity += 1
+    backend.products.update(current)
+    backend.uow.commit()
+    assert backend.products.get(1).quantity == 4
+
+
+def test_list_changed_since_resumes_from_the_watermark(backend: Backend) -> None:
+    backend.products.add_many(_product(f"p{i}") for i in range(4))
+    backend.customers.add(_customer("John"))
+    backend.staffs.add(_staff("ann"))
+    backend.uow.commit()
+
+    first, watermark = backend.products.list_changed_since(0, limit=3)
+    rest, watermark = backend.products.list_changed_since(watermark, limit=3)
+    assert [p.name for p in first + rest] == ["p0", "p1", "p2", "p3"]
+    assert backend.products.list_changed_since(watermark) == ([], watermark)
+
+    product = backend.products.get(3)
+    product.price = 3.0
+    backend.products.update(product)
+    backend.products.reserve([OrderLine(1, 1)])
+    backend.uow.commit()
+
+    # In the order of the changes, each product once.
+    changed, latest = backend.products.list_changed_since(watermark)
+    assert [(p.id, p.version) for p in changed] == [(3, 2), (1, 2)]
+    assert latest > watermark
+    customers, _ = backend.customers.list_changed_since(0)
+    staffs, _ = backend.staffs.list_changed_since(0)
+    assert [c.first_name for c in customers] == ["John"]
+    assert [s.user_name for s in staffs] == ["ann"]
+
+
+def test_update_unknown_id_raises_entities_not_found(backend: Backend) -> None:
+    with pytest.raises(EntitiesNotFound):
+        backend.products.update(Product("ghost", 1, 1.0, 1, id=42))
+    with pytest.raises(EntitiesNotFound):
+        backend.customers.update(Customer("a", "b", "c", "d", "e", 1, id=42))
+    with pytest.raises(EntitiesNotFound):
+        backend.staffs.update(_staff("ghost"))
+
+
+def test_search_is_ranked_and_paged(backend: Backend) -> None:
+    backend.products.add_many(
+        [
+            _product("Steel bolt M8"),
+            _product("Bolt"),
+            _product("Nut M8"),
+            _product("Bolt cutter with long handles"),
+        ]
+    )
+    backend.customers.add(
+        Customer("John", "Smith", "Main St", "+1 555-0100", "js@example.com", 1)
+    )
+    backend.customers.add(_customer("Johanna"))
+    backend.uow.commit()
+
+    assert [p.id for p in backend.products.search("bol")] == [2, 1, 4]
+    assert [p.id for p in backend.products.search("BOLT m8")] == [1]
+    assert [p.id for p in backend.products.search("bolt", limit=1, offset=1)] == [1]
+    assert backend.products.search("olt") == []
+    assert backend.products.search('" OR *') == []
+    assert [c.id for c in backend.customers.search("jo smi")] == [1]
+    assert [c.id for c in backend.customers.search("555 0100")] == [1]
+    assert [c.id for c in backend.customers.search("joh")] == [2, 1]
@@ -0,0 +1,82 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+from sqlalchemy import create_engine, text, update
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import Customer, Product
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.instrumentation import QueryStats, collect
+from warehouse_management.infrastructure.migrations import apply_search_indexes
+from warehouse_management.infrastructure.orm import Base, ProductORM
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyCustomerRepository,
+    SqlAlchemyProductRepository,
+)
+from warehouse_management.infrastructure.search import match_expression
+
+
+def test_match_expression_quotes_every_term() -> None:
+    assert match_expression("Jo  SMITH-x") == '"jo"* "smith"* "x"*'
+    assert match_expression('name:"a" OR NEAR(b)') == (
+        '"name"* "a"* "or"* "near"* "b"*'
+    )
+    assert match_expression(" -- ") is None
+
+
+def test_index_follows_every_write(session: Session) -> None:
+    service = WarehouseService(
+        product_repo=SqlAlchemyProductRepository(session),
+        customer_repo=SqlAlchemyCustomerRepository(session),
+    )
+    service.create_products([Product("Anvil", 5, 90.0, 3)])
+    service.create_product("Anvil stand", 5, 40.0, 3)
+    service.create_customer("Wile", "Coyote", "Desert", "555", "wile@acme.io", 1)
+    session.commit()
+    assert [p.name for p in service.search_products("anv")] == ["Anvil", "Anvil stand"]
+    assert [c.last_name for c in service.search_customers("acme")] == ["Coyote"]
+
+    session.execute(
+        update(ProductORM).where(ProductORM.name == "Anvil").values(name="Rocket")
+    )
+    session.execute(text("DELETE FROM products WHERE name = 'Anvil stand'"))
+    session.commit()
+
+    assert service.search_products("anvil") == []
+    assert [p.name for p in service.search_products("rock")] == ["Rocket"]
+
+
+def test_search_reads_one_page_in_one_query(session: Session) -> None:
+    repository = SqlAlchemyProductRepository(session)
+    repository.add_many(Product(f"Widget {i}", 1, 1.0, 1) for i in range(50))
+    session.commit()
+
+    stats = QueryStats()
+    with collect(stats):
+        page = repository.search("widget", limit=10, offset=20)
+
+    assert len(page) == 10
+    assert stats["SqlAlchemyProductRepository.search"].statements == 1
+    assert stats["SqlAlchemyProductRepository.search"].rows == 10
+
+
+def test_apply_search_indexes_fills_existing_rows() -> None:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO products (name, quantity) VALUES ('Old lamp', 1)")
+        )
+
+    assert apply_search_indexes(engine) == ["products_fts", "customer_fts"]
+    assert apply_search_indexes(engine) == []
+    with Session(engine) as session:
+        found = SqlAlchemyProductRepository(session).search("lamp")
+        assert [p.name for p in found] == ["Old lamp"]
+        SqlAlchemyCustomerRepository(session).add(
+            Customer("Ada", "Byron", "", "", "ada@x.io", 1)
+        )
+        session.flush()
+        assert len(SqlAlchemyCustomerRepository(session).search("byron")) == 1
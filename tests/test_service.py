@@ -3,17 +3,26 @@ import os
 CUR_PATH = os.path.dirname(__file__)
 sys.path.append(os.path.join(CUR_PATH, '..'))
 
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 from sqlalchemy.orm import Session
 
 from warehouse_management.domain.services import WarehouseService
 from warehouse_management.domain.models import (
     Category,
+    CategoryStock,
     Customer,
     Order,
     Product,
     Role,
     Staff,
 )
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
 from warehouse_management.infrastructure.repositories import (
     SqlAlchemyOrderRepository,
     SqlAlchemyProductRepository,
@@ -45,7 +54,7 @@ def test_services_create_order(session: Session) -> None:
     warehouse_service = WarehouseService(
         product_repo=product_repo, order_repo=order_repo
     )
-    with SqlAlchemyUnitOfWork(session) as uow:
+    with SqlAlchemyUnitOfWork(lambda: session) as uow:
         _ = warehouse_service.create_product(
             name="test1",
             quantity=1,
@@ -67,7 +76,7 @@ def test_services_create_category(session: Session) -> None:
         product_repo=product_repo, category_repo=category_repo
     )
 
-    with SqlAlchemyUnitOfWork(session) as uow:
+    with SqlAlchemyUnitOfWork(lambda: session) as uow:
         _ = warehouse_service.create_product(
             name="test1",
             quantity=1,
@@ -108,7 +117,7 @@ def test_services_create_role(session: Session) -> None:
         staff_repo=staff_repo, role_repo=role_repo, customer_repo=customer_repo
     )
 
-    with SqlAlchemyUnitOfWork(session) as uow:
+    with SqlAlchemyUnitOfWork(lambda: session) as uow:
         _ = warehouse_service.create_customer(
             first_name="Dmitry",
             last_name="Chernyshev",
@@ -147,7 +156,7 @@ def test_services_create_staff(session: Session) -> None:
         staff_repo=staff_repo, customer_repo=customer_repo
     )
 
-    with SqlAlchemyUnitOfWork(session) as uow:
+    with SqlAlchemyUnitOfWork(lambda: session) as uow:
         _ = warehouse_service.create_customer(
             first_name="Dmitry",
             last_name="Chernyshev",
@@ -212,3 +221,31 @@ def test_get_staff(session: Session) -> None:
     warehouse_service = WarehouseService(staff_repo=staff_repo)
     _staff = warehouse_service.get_staff(1)
     assert isinstance(_staff, Staff)
+
+
+def test_service_is_shared_by_a_thread_pool(tmp_path: Path) -> None:
+    engine = build_engine(f"sqlite:///{tmp_path / 'warehouse.db'}")
+    init_db(engine)
+    service = WarehouseService(uow=SqlAlchemyUnitOfWork(build_session_factory(engine)))
+    ids = service.create_products(
+        Product(name=f"p{i}", quantity=1000, price=1.0, category=i % 3)
+        for i in range(10)
+    )
+    orders = 400
+
+    def place(i: int) -> int:
+        product = service.get_product(ids[i % len(ids)])
+        service.create_order([product], quantities=[2])
+        return service.get_product(product.id).id
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        placed = list(pool.map(place, range(orders)))
+
+    assert sorted(placed) == sorted(ids[i % len(ids)] for i in range(orders))
+    assert service.stock_by_category() == [
+        CategoryStock(0, 4 * 920, 4 * 920.0),
+        CategoryStock(1, 3 * 920, 3 * 920.0),
+        CategoryStock(2, 3 * 920, 3 * 920.0),
+    ]
+    assert service.top_ordered_products(1)[0].orders == 40
+    engine.dispose()
@@ -0,0 +1,129 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.exceptions import EntitiesNotFound
+from warehouse_management.domain.models import Product
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyProductRepository,
+)
+from warehouse_management.infrastructure.snapshot import (
+    ProductSnapshot,
+    write_snapshot,
+)
+
+
+@pytest.fixture(params=[False, True], ids=["memoryview", "numpy"])
+def use_numpy(request: pytest.FixtureRequest) -> bool:
+    if request.param:
+        pytest.importorskip("numpy")
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def repository(session: Session) -> SqlAlchemyProductRepository:
+    repository = SqlAlchemyProductRepository(session)
+    repository.add_many(
+        [
+            Product("bolt", 100, 0.5, 1),
+            Product("гайка", 3, 0.25, 1),
+            Product("", 2, 80.0, 2),
+            Product("saw ⚙", 3, 20.0, 2),
+            Product("drill", 0, 95.5, 3),
+        ]
+    )
+    session.commit()
+    return repository
+
+
+def test_snapshot_matches_the_repository(
+    repository: SqlAlchemyProductRepository, tmp_path: Path, use_numpy: bool
+) -> None:
+    path = str(tmp_path / "catalog.snap")
+    # Batches smaller than the table exercise the spooling.
+    assert write_snapshot(repository.session, path, batch_size=2) == 5
+
+    with ProductSnapshot(path, use_numpy=use_numpy) as snapshot:
+        assert len(snapshot) == 5
+        assert snapshot.products(range(5)) == repository.list()
+        assert snapshot.get(2) == repository.get(2)
+        assert snapshot.stock_value() == pytest.approx(repository.stock_value())
+        assert snapshot.stock_by_category() == repository.stock_by_category()
+        assert snapshot.low_stock(4) == repository.low_stock(4)
+        assert list(snapshot.select(category=2, quantity_below=3)) == [2]
+        assert list(snapshot.select(min_price=20.0, max_price=90.0)) == [2, 3]
+        with pytest.raises(EntitiesNotFound):
+            snapshot.get(99)
+
+
+def test_snapshot_of_an_empty_catalog(tmp_path: Path, use_numpy: bool) -> None:
+    engine = build_engine("sqlite:///:memory:")
+    init_db(engine)
+    path = str(tmp_path / "empty.snap")
+    with build_session_factory(engine)() as session:
+        assert write_snapshot(session, path) == 0
+
+    with ProductSnapshot(path, use_numpy=use_numpy) as snapshot:
+        assert len(snapshot) == 0
+        assert snapshot.stock_value() == 0.0
+        assert snapshot.stock_by_category() == []
+        assert snapshot.low_stock(10) == []
+
+
+def test_snapshot_stores_null_columns_as_zero(
+    tmp_path: Path, use_numpy: bool
+) -> None:
+    engine = build_engine("sqlite:///:memory:")
+    init_db(engine)
+    path = str(tmp_path / "nulls.snap")
+    with build_session_factory(engine)() as session:
+        repository = SqlAlchemyProductRepository(session)
+        unpriced = Product("unpriced", 6, None, 1)  # type: ignore
+        repository.add_many([Product("bolt", 4, 0.5, 1), unpriced])
+        session.commit()
+        assert write_snapshot(session, path) == 2
+        stock_value = repository.stock_value()
+        stock_by_category = repository.stock_by_category()
+
+    with ProductSnapshot(path, use_numpy=use_numpy) as snapshot:
+        assert snapshot.get(2) == Product("unpriced", 6, 0.0, 1, id=2)
+        assert snapshot.stock_value() == pytest.approx(stock_value)
+        assert snapshot.stock_by_category() == stock_by_category
+
+
+def test_rewrite_leaves_open_readers_on_the_old_snapshot(
+    repository: SqlAlchemyProductRepository, tmp_path: Path
+) -> None:
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(repository.session, path)
+    old = ProductSnapshot(path)
+    repository.add(Product("clamp", 7, 12.5, 3))
+    repository.session.commit()
+
+    write_snapshot(repository.session, path)
+
+    with ProductSnapshot(path) as new:
+        assert (len(old), len(new)) == (5, 6)
+        assert new.product(5).name == "clamp"
+    assert old.product(4).name == "drill"
+    old.close()
+    assert sorted(os.listdir(tmp_path)) == ["catalog.snap"]
+
+
+def test_rejects_other_files(tmp_path: Path) -> None:
+    path = tmp_path / "not.snap"
+    path.write_bytes(b"\0" * 256)
+
+    with pytest.raises(ValueError):
+        ProductSnapshot(str(path))
@@ -0,0 +1,124 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from warehouse_management.domain.exceptions import InsufficientStock
+from warehouse_management.domain.models import CategorySummary, Product
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.migrations import apply_category_summary
+from warehouse_management.infrastructure.summary import (
+    SummaryDrift,
+    check_category_summary,
+    recompute,
+)
+from warehouse_management.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
+
+
+@pytest.fixture
+def uow(tmp_path: Path) -> Generator[SqlAlchemyUnitOfWork, None, None]:
+    engine = build_engine(f"sqlite:///{tmp_path / 'warehouse.db'}")
+    init_db(engine)
+    yield SqlAlchemyUnitOfWork(build_session_factory(engine))
+    engine.dispose()
+
+
+def test_summary_follows_every_product_write(uow: SqlAlchemyUnitOfWork) -> None:
+    service = WarehouseService(uow=uow)
+    service.create_products(
+        [Product("bolt", 100, 0.5, 1), Product("nut", 3, 0.25, 1)]
+    )
+    service.create_product("drill", 2, 80.0, 2)
+    service.create_order([service.get_product(1)], [10])
+    with pytest.raises(InsufficientStock):
+        service.create_order([service.get_product(3)], [5])
+    drill = service.get_product(3)
+    drill.category = 1
+    drill.price = 75.0
+    service.update_product(drill)
+
+    assert service.category_summary() == [
+        CategorySummary(1, 3, 95, pytest.approx(45.75 + 150.0)),
+    ]
+    with uow:
+        assert uow.products.category_summary() == recompute(uow.session)
+    assert check_category_summary(uow) == []
+
+
+def test_summary_is_read_without_scanning_products(
+    uow: SqlAlchemyUnitOfWork,
+) -> None:
+    service = WarehouseService(uow=uow)
+    service.create_products([Product(f"sku-{i}", i, 1.0, i % 3) for i in range(30)])
+    summary = service.category_summary()
+
+    assert [s.skus for s in summary] == [10, 10, 10]
+    # The unit of work keeps the statements of its last block.
+    operation = uow.stats["SqlAlchemyProductRepository.category_summary"]
+    assert (operation.statements, operation.rows) == (1, 3)
+
+
+def test_checker_reports_and_repairs_drift(uow: SqlAlchemyUnitOfWork) -> None:
+    service = WarehouseService(uow=uow)
+    service.create_products([Product("bolt", 10, 1.0, 1), Product("saw", 1, 9.0, 2)])
+    with uow:
+        # Writes that went around the triggers.
+        uow.session.execute(text("DROP TRIGGER category_summary_au"))
+        uow.session.execute(text("UPDATE products SET quantity = 4 WHERE id = 1"))
+        uow.session.execute(
+            text("INSERT INTO category_summary VALUES (7, 1, 1, 1.0)")
+        )
+        uow.commit()
+
+    drift = check_category_summary(uow)
+
+    assert drift == [
+        SummaryDrift(
+            1, CategorySummary(1, 1, 4, 4.0), CategorySummary(1, 1, 10, 10.0)
+        ),
+        SummaryDrift(7, None, CategorySummary(7, 1, 1, 1.0)),
+    ]
+    assert check_category_summary(uow, repair=True) == drift
+    assert check_category_summary(uow) == []
+    assert service.category_summary() == [
+        CategorySummary(1, 1, 4, 4.0),
+        CategorySummary(2, 1, 1, 9.0),
+    ]
+
+
+def test_apply_category_summary_fills_it_from_products() -> None:
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE products (id INTEGER NOT NULL, name VARCHAR, "
+                "quantity INTEGER, price FLOAT, category INTEGER, PRIMARY KEY (id))"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO products VALUES (1, 'a', 2, 1.5, 1), "
+                "(2, 'b', NULL, 3.0, 1), (3, 'c', 1, 1.0, NULL)"
+            )
+        )
+
+    assert apply_category_summary(engine) == [
+        "category_summary",
+        "category_summary triggers",
+    ]
+    assert apply_category_summary(engine) == []
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO products VALUES (4, 'd', 1, 2.0, 2)"))
+        rows = conn.execute(text("SELECT * FROM category_summary ORDER BY category"))
+        assert list(rows) == [(1, 2, 2, 3.0), (2, 1, 1, 2.0)]
@@ -0,0 +1,102 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+from pathlib import Path
+from typing import Any, Generator, List, Tuple
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from warehouse_management.domain.models import Product
+from warehouse_management.domain.services import WarehouseService
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_read_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyProductRepository,
+)
+from warehouse_management.infrastructure.unit_of_work import RoutingUnitOfWork
+
+Factories = Tuple["sessionmaker[Session]", "sessionmaker[Session]"]
+
+
+@pytest.fixture
+def factories(tmp_path: Path) -> Generator[Factories, None, None]:
+    url = f"sqlite:///{tmp_path / 'warehouse.db'}"
+    writer = build_engine(url)
+    init_db(writer)
+    reader = build_read_engine(url)
+    yield build_session_factory(writer), build_session_factory(reader)
+    reader.dispose()
+    writer.dispose()
+
+
+def test_reads_and_writes_use_separate_engines(factories: Factories) -> None:
+    with RoutingUnitOfWork(*factories) as uow:
+        uow.write(SqlAlchemyProductRepository).add(Product("bolt", 5, 0.5, 1))
+        products = uow.read(SqlAlchemyProductRepository)
+        # Uncommitted writes stay on the writer.
+        assert products.list() == []
+        uow.commit()
+
+        assert uow.reader.get_bind() is not uow.session.get_bind()
+        assert [p.name for p in products.list()] == ["bolt"]
+        assert products.get(1) == uow.write(SqlAlchemyProductRepository).get(1)
+        assert uow.stats.statements > 0
+
+
+def test_read_repositories_reject_writes(factories: Factories) -> None:
+    with RoutingUnitOfWork(*factories) as uow:
+        uow.read(SqlAlchemyProductRepository).add(Product("bolt", 5, 0.5, 1))
+        with pytest.raises(OperationalError):
+            uow.reader.flush()
+
+
+def test_open_read_does_not_block_writers(factories: Factories) -> None:
+    with RoutingUnitOfWork(*factories) as report:
+        products = report.read(SqlAlchemyProductRepository)
+        assert products.list() == []
+
+        # The report's read transaction is still open.
+        with RoutingUnitOfWork(*factories) as uow:
+            uow.write(SqlAlchemyProductRepository).add(Product("saw", 1, 20.0, 2))
+            uow.commit()
+
+        assert products.list() == []
+        report.commit()
+        assert [p.name for p in products.list()] == ["saw"]
+
+
+def test_service_reads_run_on_the_read_engine(factories: Factories) -> None:
+    warehouse_service = WarehouseService(uow=RoutingUnitOfWork(*factories))
+    warehouse_service.create_product("bolt", 5, 0.5, 1)
+    executed: List[str] = []
+    for name, factory in zip(("writer", "reader"), factories):
+
+        def record(*args: Any, name: str = name) -> None:
+            executed.append(name)
+
+        event.listen(factory.kw["bind"], "before_cursor_execute", record)
+
+    assert warehouse_service.get_product(1).name == "bolt"
+    assert warehouse_service.stock_value() == 2.5
+    assert [item.id for item in warehouse_service.low_stock(10)] == [1]
+    assert executed and set(executed) == {"reader"}
+
+
+def test_use_outside_with_block(factories: Factories) -> None:
+    uow = RoutingUnitOfWork(*factories)
+    with pytest.raises(RuntimeError):
+        uow.read(SqlAlchemyProductRepository)
+
+
+def test_read_engine_needs_a_file() -> None:
+    with pytest.raises(ValueError):
+        build_read_engine("sqlite:///:memory:")
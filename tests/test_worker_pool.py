@@ -0,0 +1,104 @@
+import sys
+import os
+CUR_PATH = os.path.dirname(__file__)
+sys.path.append(os.path.join(CUR_PATH, '..'))
+
+import sqlite3
+from pathlib import Path
+from typing import List
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from warehouse_management.domain.models import Product
+from warehouse_management.infrastructure.database import (
+    build_engine,
+    build_session_factory,
+    init_db,
+)
+from warehouse_management.infrastructure.orm import order_product_assocoations
+from warehouse_management.infrastructure.repositories import (
+    SqlAlchemyProductRepository,
+)
+from warehouse_management.infrastructure.retry import (
+    RetryPolicy,
+    call_with_retry,
+    is_lock_error,
+)
+from warehouse_management.infrastructure.worker_pool import OrderRequest, run_pool
+
+
+def _locked() -> OperationalError:
+    return OperationalError(
+        "UPDATE products", {}, sqlite3.OperationalError("database is locked")
+    )
+
+
+def test_pool_places_every_request_once(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = build_engine(url)
+    init_db(engine)
+    SessionFactory = build_session_factory(engine)
+    with SessionFactory() as session:
+        SqlAlchemyProductRepository(session).add_many(
+            Product(name=f"p{i}", quantity=20, price=1.0, category=1)
+            for i in range(3)
+        )
+        session.commit()
+    requests = [
+        OrderRequest(product_ids=[i % 3 + 1, (i + 1) % 3 + 1], quantities=[1, 2])
+        for i in range(40)
+    ]
+
+    report = run_pool(url, requests, workers=2, batch_size=7)
+
+    assert report.placed + report.rejected == len(requests)
+    assert report.failed == 0
+    assert report.rejected > 0
+    assert report.orders_per_sec > 0
+    with SessionFactory() as session:
+        remaining = sum(p.quantity for p in SqlAlchemyProductRepository(session).list())
+        ordered = session.execute(
+            select(func.sum(order_product_assocoations.c.quantity))
+        ).scalar_one()
+    assert ordered == report.placed * 3 == 60 - remaining
+    engine.dispose()
+
+
+def test_retry_backs_off_on_lock_errors() -> None:
+    attempts: List[int] = []
+    delays: List[float] = []
+
+    def flaky() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _locked()
+        return "done"
+
+    result, retries = call_with_retry(
+        flaky, is_lock_error, RetryPolicy(attempts=5), sleep=delays.append
+    )
+
+    assert (result, retries) == ("done", 2)
+    assert len(delays) == 2
+
+
+def test_retry_gives_up_and_passes_other_errors_through() -> None:
+    def locked() -> None:
+        raise _locked()
+
+    def broken() -> None:
+        raise ValueError("not a lock")
+
+    delays: List[float] = []
+    with pytest.raises(OperationalError):
+        call_with_retry(
+            locked, is_lock_error, RetryPolicy(attempts=3), sleep=delays.append
+        )
+    assert len(delays) == 2
+
+    delays.clear()
+    with pytest.raises(ValueError):
+        call_with_retry(broken, is_lock_error, sleep=delays.append)
+    assert delays == []
@@ -0,0 +1,49 @@
+from typing import Iterable, List
+
+
+class DomainError(Exception):
+    pass
+
+
+class EntitiesNotFound(DomainError):
+    def __init__(self, entity: str, ids: Iterable[int]):
+        self.entity = entity
+        self.ids: List[int] = list(ids)
+        super().__init__(
+            f"{entity} not found: {', '.join(str(i) for i in self.ids)}"
+        )
+
+
+class InsufficientStock(DomainError):
+    def __init__(self, product_ids: Iterable[int]):
+        self.product_ids: List[int] = list(product_ids)
+        super().__init__(
+            "insufficient stock for products: "
+            f"{', '.join(str(i) for i in self.product_ids)}"
+        )
+
+
+class ConcurrencyConflict(DomainError):
+    # An optimistic update found the row at another version than the one
+    # the caller read: someone else changed it in between.
+    def __init__(self, entity: str, entity_id: int, expected: int, actual: int):
+        self.entity = entity
+        self.entity_id = entity_id
+        self.expected = expected
+        self.actual = actual
+        super().__init__(
+            f"{entity} {entity_id} was changed concurrently: "
+            f"expected version {expected}, found {actual}"
+        )
+
+
+class ProjectedEntity(DomainError):
+    # The entity was read with a projection: the fields left out are None,
+    # and writing it back would overwrite them.
+    def __init__(self, entity: str, entity_id: int):
+        self.entity = entity
+        self.entity_id = entity_id
+        super().__init__(
+            f"{entity} {entity_id} was read with a projection and cannot be "
+            "written back"
+        )
@@ -1,37 +1,121 @@
+import copy
 from dataclasses import dataclass, field
-from typing import List
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    TypeVar,
+)
 
+T = TypeVar("T")
 
-@dataclass
+
+class LazyList(MutableSequence[T]):
+    # A collection an aggregate was read without. ``load`` runs on first
+    # access and is usually shared by every aggregate of the same read, so
+    # touching one loads the collection for all of them in one query; it
+    # must run while the unit of work that read them is still open. Copies
+    # and pickles are plain lists, which keeps cached and serialized
+    # aggregates free of loaders.
+    __slots__ = ("_load", "_items")
+
+    def __init__(self, load: Callable[[], List[T]]):
+        self._load: Optional[Callable[[], List[T]]] = load
+        self._items: Optional[List[T]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._items is not None
+
+    def _list(self) -> List[T]:
+        if self._items is None:
+            assert self._load is not None
+            self._items, self._load = list(self._load()), None
+        return self._items
+
+    def __getitem__(self, index: Any) -> Any:
+        return self._list()[index]
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        self._list()[index] = value
+
+    def __delitem__(self, index: Any) -> None:
+        del self._list()[index]
+
+    def __len__(self) -> int:
+        return len(self._list())
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._list())
+
+    def insert(self, index: int, value: T) -> None:
+        self._list().insert(index, value)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyList):
+            other = other._list()
+        return self._list() == other
+
+    def __repr__(self) -> str:
+        return repr(self._items) if self._items is not None else "LazyList(...)"
+
+    def __reduce__(self) -> Any:
+        return list, (self._list(),)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> List[T]:
+        return copy.deepcopy(self._list(), memo)
+
+
+@dataclass(slots=True)
 class Product:
     name: str
     quantity: int
     price: float
     category: int
     id: int = 0
+    # The row version this copy was read at. Left out of equality: it is
+    # bookkeeping for optimistic updates, not part of the value.
+    version: int = field(default=0, compare=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class Category:
     name: str
     description: str
-    products: List[Product] = field(default_factory=list)
+    products: MutableSequence[Product] = field(default_factory=list)
     id: int = 0
 
     def add_product(self, product: Product) -> None:
         self.products.append(product)
 
 
-@dataclass
+@dataclass(slots=True)
+class OrderLine:
+    product_id: int
+    quantity: int = 1
+
+
+@dataclass(slots=True)
 class Order:
     id: int = 0
-    products: List[Product] = field(default_factory=list)
+    products: MutableSequence[Product] = field(default_factory=list)
+    # Quantity per entry in ``products``; a product without a line counts once.
+    lines: List[OrderLine] = field(default_factory=list)
 
-    def add_product(self, product: Product) -> None:
+    def add_product(self, product: Product, quantity: int = 1) -> None:
+        for line in self.lines:
+            if line.product_id == product.id:
+                line.quantity += quantity
+                return
         self.products.append(product)
+        self.lines.append(OrderLine(product_id=product.id, quantity=quantity))
 
 
-@dataclass
+@dataclass(slots=True)
 class Customer:
     first_name: str
     last_name: str
@@ -40,9 +124,10 @@ class Customer:
     email: str
     staff_id: int
     id: int = 0
+    version: int = field(default=0, compare=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class Staff:
     first_name: str
     last_name: str
@@ -52,12 +137,42 @@ class Staff:
     user_name: str
     role_id: int
     id: int = 0
-    customers: List[Customer] = field(default_factory=list)
+    version: int = field(default=0, compare=False)
+    customers: MutableSequence[Customer] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Role:
     name: str
     description: str
     id: int = 0
-    staffs: List[Staff] = field(default_factory=list)
+    staffs: MutableSequence[Staff] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class CategoryStock:
+    category: int
+    quantity: int
+    value: float
+
+
+@dataclass(slots=True)
+class CategorySummary:
+    category: int
+    skus: int
+    quantity: int
+    value: float
+
+
+@dataclass(slots=True)
+class LowStockItem:
+    id: int
+    name: str
+    quantity: int
+
+
+@dataclass(slots=True)
+class ProductOrderCount:
+    id: int
+    name: str
+    orders: int
@@ -1,7 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Collection, Iterable, Iterator, List, Optional, Tuple
 
-from .models import Category, Customer, Order, Product, Role, Staff
+from .models import (
+    Category,
+    CategoryStock,
+    CategorySummary,
+    Customer,
+    LowStockItem,
+    Order,
+    OrderLine,
+    Product,
+    ProductOrderCount,
+    Role,
+    Staff,
+)
 
 
 class ProductRepository(ABC):
@@ -9,6 +21,16 @@ class ProductRepository(ABC):
     def add(self, product: Product) -> None:
         pass
 
+    @abstractmethod
+    def add_many(self, products: Iterable[Product]) -> List[int]:
+        pass
+
+    @abstractmethod
+    def update(self, product: Product) -> None:
+        # Writes the product back if it is still at ``product.version`` and
+        # bumps it, or raises ConcurrencyConflict.
+        pass
+
     @abstractmethod
     def get(self, product_id: int) -> Product:
         pass
@@ -17,6 +39,56 @@ class ProductRepository(ABC):
     def list(self) -> List[Product]:
         pass
 
+    @abstractmethod
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Product]:
+        pass
+
+    @abstractmethod
+    def list_changed_since(
+        self, watermark: int, limit: int = 1000
+    ) -> Tuple[List[Product], int]:
+        # Products inserted or updated after ``watermark``, oldest change
+        # first, and the watermark to pass next time; start from 0.
+        pass
+
+    @abstractmethod
+    def list_by_category(self, category: int) -> List[Product]:
+        pass
+
+    @abstractmethod
+    def find_by_name(self, name: str) -> List[Product]:
+        pass
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[Product]:
+        pass
+
+    @abstractmethod
+    def reserve(self, lines: Iterable[OrderLine]) -> None:
+        pass
+
+    @abstractmethod
+    def stock_value(self) -> float:
+        pass
+
+    @abstractmethod
+    def stock_by_category(self) -> List[CategoryStock]:
+        pass
+
+    @abstractmethod
+    def category_summary(self) -> List[CategorySummary]:
+        # The same totals as stock_by_category, with SKU counts, read from a
+        # summary maintained on every write instead of aggregated per call.
+        pass
+
+    @abstractmethod
+    def low_stock(self, threshold: int) -> List[LowStockItem]:
+        pass
+
+    @abstractmethod
+    def top_ordered(self, limit: int = 10) -> List[ProductOrderCount]:
+        pass
+
 
 class OrderRepository(ABC):
     @abstractmethod
@@ -24,11 +96,30 @@ class OrderRepository(ABC):
         pass
 
     @abstractmethod
-    def get(self, order_id: int) -> Order:
+    def get(
+        self,
+        order_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Order:
+        # ``fields`` names the scalar fields to read on every entity of the
+        # aggregate that has them; the id is always read and the others are
+        # None. Collections more than ``depth`` levels down are LazyLists
+        # loaded on first access; None reads the whole aggregate. An order's
+        # lines are always read. list() takes the same options. Projected
+        # entities are read-only: update() raises ProjectedEntity for them.
+        pass
+
+    @abstractmethod
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> List[Order]:
         pass
 
     @abstractmethod
-    def list(self) -> List[Order]:
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Order]:
         pass
 
 
@@ -38,11 +129,24 @@ class CategoryRepository(ABC):
         pass
 
     @abstractmethod
-    def get(self, category_id: int) -> Category:
+    def get(
+        self,
+        category_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Category:
         pass
 
     @abstractmethod
-    def list(self) -> List[Category]:
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> List[Category]:
+        pass
+
+    @abstractmethod
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Category]:
         pass
 
 
@@ -51,6 +155,14 @@ class CustomerRepository(ABC):
     def add(self, customer: Customer) -> None:
         pass
 
+    @abstractmethod
+    def add_many(self, customers: Iterable[Customer]) -> List[int]:
+        pass
+
+    @abstractmethod
+    def update(self, customer: Customer) -> None:
+        pass
+
     @abstractmethod
     def get(self, customer_id: int) -> Customer:
         pass
@@ -59,6 +171,24 @@ class CustomerRepository(ABC):
     def list(self) -> List[Customer]:
         pass
 
+    @abstractmethod
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Customer]:
+        pass
+
+    @abstractmethod
+    def list_changed_since(
+        self, watermark: int, limit: int = 1000
+    ) -> Tuple[List[Customer], int]:
+        pass
+
+    @abstractmethod
+    def list_by_staff(self, staff_id: int) -> List[Customer]:
+        pass
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[Customer]:
+        pass
+
 
 class RoleRepository(ABC):
     @abstractmethod
@@ -66,11 +196,24 @@ class RoleRepository(ABC):
         pass
 
     @abstractmethod
-    def get(self, role_id: int) -> Role:
+    def get(
+        self,
+        role_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Role:
+        pass
+
+    @abstractmethod
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> List[Role]:
         pass
 
     @abstractmethod
-    def list(self) -> List[Role]:
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Role]:
         pass
 
 
@@ -80,9 +223,128 @@ class StaffRepository(ABC):
         pass
 
     @abstractmethod
-    def get(self, staff_id: int) -> Staff:
+    def update(self, staff: Staff) -> None:
+        pass
+
+    @abstractmethod
+    def get(
+        self,
+        staff_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Staff:
         pass
 
     @abstractmethod
-    def list(self) -> List[Staff]:
-        pass
\ No newline at end of file
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> List[Staff]:
+        pass
+
+    @abstractmethod
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Staff]:
+        pass
+
+    @abstractmethod
+    def list_changed_since(
+        self, watermark: int, limit: int = 1000
+    ) -> Tuple[List[Staff], int]:
+        pass
+
+    @abstractmethod
+    def list_by_role(self, role_id: int) -> List[Staff]:
+        pass
+
+
+class AsyncProductRepository(ABC):
+    @abstractmethod
+    async def add(self, product: Product) -> None:
+        pass
+
+    @abstractmethod
+    async def add_many(self, products: Iterable[Product]) -> List[int]:
+        pass
+
+    @abstractmethod
+    async def get(self, product_id: int) -> Product:
+        pass
+
+    @abstractmethod
+    async def list(self) -> List[Product]:
+        pass
+
+    @abstractmethod
+    async def reserve(self, lines: Iterable[OrderLine]) -> None:
+        pass
+
+
+class AsyncOrderRepository(ABC):
+    @abstractmethod
+    async def add(self, order: Order) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, order_id: int) -> Order:
+        pass
+
+    @abstractmethod
+    async def list(self) -> List[Order]:
+        pass
+
+
+class AsyncCategoryRepository(ABC):
+    @abstractmethod
+    async def add(self, category: Category) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, category_id: int) -> Category:
+        pass
+
+    @abstractmethod
+    async def list(self) -> List[Category]:
+        pass
+
+
+class AsyncCustomerRepository(ABC):
+    @abstractmethod
+    async def add(self, customer: Customer) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, customer_id: int) -> Customer:
+        pass
+
+    @abstractmethod
+    async def list(self) -> List[Customer]:
+        pass
+
+
+class AsyncRoleRepository(ABC):
+    @abstractmethod
+    async def add(self, role: Role) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, role_id: int) -> Role:
+        pass
+
+    @abstractmethod
+    async def list(self) -> List[Role]:
+        pass
+
+
+class AsyncStaffRepository(ABC):
+    @abstractmethod
+    async def add(self, staff: Staff) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, staff_id: int) -> Staff:
+        pass
+
+    @abstractmethod
+    async def list(self) -> List[Staff]:
+        pass
@@ -1,7 +1,28 @@
-from typing import List, Optional
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Any, Iterable, Iterator, List, Optional
 
-from .models import Category, Customer, Order, Product, Role, Staff
+from .exceptions import InsufficientStock
+from .models import (
+    Category,
+    CategoryStock,
+    CategorySummary,
+    Customer,
+    LowStockItem,
+    Order,
+    Product,
+    ProductOrderCount,
+    Role,
+    Staff,
+)
 from .repositories import (
+    AsyncCategoryRepository,
+    AsyncCustomerRepository,
+    AsyncOrderRepository,
+    AsyncProductRepository,
+    AsyncRoleRepository,
+    AsyncStaffRepository,
     CategoryRepository,
     CustomerRepository,
     OrderRepository,
@@ -9,6 +30,29 @@ from .repositories import (
     RoleRepository,
     StaffRepository,
 )
+from .unit_of_work import UnitOfWork
+
+
+def _build_order(products: List[Product], quantities: Optional[List[int]]) -> Order:
+    # Repeated products are merged into one line with the summed quantity.
+    if quantities is not None and len(quantities) != len(products):
+        raise ValueError("expected one quantity per product")
+    order = Order()
+    for product, quantity in zip(products, quantities or repeat(1)):
+        if quantity <= 0:
+            raise ValueError(f"quantity must be positive, got {quantity}")
+        order.add_product(product, quantity)
+    return order
+
+
+@dataclass
+class _Repositories:
+    products: Optional[ProductRepository]
+    orders: Optional[OrderRepository]
+    categories: Optional[CategoryRepository]
+    roles: Optional[RoleRepository]
+    staffs: Optional[StaffRepository]
+    customers: Optional[CustomerRepository]
 
 
 class WarehouseService:
@@ -20,6 +64,7 @@ class WarehouseService:
         role_repo: Optional[RoleRepository] = None,
         staff_repo: Optional[StaffRepository] = None,
         customer_repo: Optional[CustomerRepository] = None,
+        uow: Optional[UnitOfWork] = None,
     ):
         self.product_repo = product_repo
         self.order_repo = order_repo
@@ -27,33 +72,70 @@ class WarehouseService:
         self.role_repo = role_repo
         self.staff_repo = staff_repo
         self.customer_repo = customer_repo
+        self.uow = uow
+
+    @contextmanager
+    def _unit(self, commit: bool = False) -> Iterator[Any]:
+        # With a unit of work every call runs in a block of its own, on the
+        # session that block opens, so the service keeps no session and can
+        # be shared by a thread pool. Blocks that do not commit only read and
+        # use the unit of work's read repositories. Without one it works on
+        # the given repositories and leaves committing to the caller.
+        if self.uow is None:
+            yield _Repositories(
+                self.product_repo,
+                self.order_repo,
+                self.category_repo,
+                self.role_repo,
+                self.staff_repo,
+                self.customer_repo,
+            )
+            return
+        with self.uow as uow:
+            yield uow if commit else uow.reads
+            if commit:
+                uow.commit()
 
     def create_product(
         self, name: str, quantity: int, price: float, category: int
     ) -> Product:
         product = Product(name=name, quantity=quantity, price=price, category=category)
-        if self.product_repo:
-            self.product_repo.add(product)
+        with self._unit(commit=True) as repos:
+            if repos.products:
+                repos.products.add(product)
         return product
 
-    def create_order(self, products: List[Product]) -> Order:
-        order = Order(products=products)
-        if self.order_repo:
-            self.order_repo.add(order)
+    def create_products(self, products: Iterable[Product]) -> List[int]:
+        with self._unit(commit=True) as repos:
+            if repos.products:
+                return repos.products.add_many(products)
+        return []
+
+    def create_order(
+        self, products: List[Product], quantities: Optional[List[int]] = None
+    ) -> Order:
+        order = _build_order(products, quantities)
+        with self._unit(commit=True) as repos:
+            if repos.products:
+                repos.products.reserve(order.lines)
+            if repos.orders:
+                repos.orders.add(order)
         return order
 
     def create_category(
         self, name: str, description: str, products: List[Product]
     ) -> Category:
         category = Category(name=name, description=description, products=products)
-        if self.category_repo:
-            self.category_repo.add(category)
+        with self._unit(commit=True) as repos:
+            if repos.categories:
+                repos.categories.add(category)
         return category
 
     def create_role(self, name: str, description: str, staffs: List[Staff]) -> Role:
         role = Role(name=name, description=description, staffs=staffs)
-        if self.role_repo:
-            self.role_repo.add(role)
+        with self._unit(commit=True) as repos:
+            if repos.roles:
+                repos.roles.add(role)
         return role
 
     def create_staff(
@@ -77,8 +159,9 @@ class WarehouseService:
             role_id=role_id,
             customers=customers,
         )
-        if self.staff_repo:
-            self.staff_repo.add(staff)
+        with self._unit(commit=True) as repos:
+            if repos.staffs:
+                repos.staffs.add(staff)
         return staff
 
     def create_customer(
@@ -98,24 +181,210 @@ class WarehouseService:
             email=email,
             staff_id=staff_id,
         )
-        if self.customer_repo:
-            self.customer_repo.add(customer)
+        with self._unit(commit=True) as repos:
+            if repos.customers:
+                repos.customers.add(customer)
         return customer
 
+    def update_product(self, product: Product) -> None:
+        with self._unit(commit=True) as repos:
+            repos.products.update(product)
+
+    def update_customer(self, customer: Customer) -> None:
+        with self._unit(commit=True) as repos:
+            repos.customers.update(customer)
+
+    def update_staff(self, staff: Staff) -> None:
+        with self._unit(commit=True) as repos:
+            repos.staffs.update(staff)
+
+    def adjust_stock(self, product_id: int, delta: int) -> Product:
+        # Read-modify-write without a lock: raises ConcurrencyConflict when
+        # another writer got in between, and the caller retries the call.
+        # With a unit of work the read and the write are separate blocks, so
+        # no transaction stays open in between; SQLite would otherwise
+        # refuse the write after any commit to the database, not just to
+        # this row.
+        product = self.get_product(product_id)
+        if product.quantity + delta < 0:
+            raise InsufficientStock([product_id])
+        product.quantity += delta
+        self.update_product(product)
+        return product
+
     def get_product(self, product_id: int) -> Product:
-        return self.product_repo.get(product_id)  # type: ignore
+        with self._unit() as repos:
+            return repos.products.get(product_id)
 
     def get_order(self, order_id: int) -> Order:
-        return self.order_repo.get(order_id)  # type: ignore
+        with self._unit() as repos:
+            return repos.orders.get(order_id)
 
     def get_category(self, category_id: int) -> Category:
-        return self.category_repo.get(category_id)  # type: ignore
+        with self._unit() as repos:
+            return repos.categories.get(category_id)
 
     def get_role(self, role_id: int) -> Role:
-        return self.role_repo.get(role_id)  # type: ignore
+        with self._unit() as repos:
+            return repos.roles.get(role_id)
 
     def get_customer(self, customer_id: int) -> Customer:
-        return self.customer_repo.get(customer_id)  # type: ignore
+        with self._unit() as repos:
+            return repos.customers.get(customer_id)
 
     def get_staff(self, staff_id: int) -> Staff:
-        return self.staff_repo.get(staff_id)  # type: ignore
\ No newline at end of file
+        with self._unit() as repos:
+            return repos.staffs.get(staff_id)
+
+    def stock_value(self) -> float:
+        with self._unit() as repos:
+            return repos.products.stock_value()
+
+    def stock_by_category(self) -> List[CategoryStock]:
+        with self._unit() as repos:
+            return repos.products.stock_by_category()
+
+    def category_summary(self) -> List[CategorySummary]:
+        with self._unit() as repos:
+            return repos.products.category_summary()
+
+    def low_stock(self, threshold: int) -> List[LowStockItem]:
+        with self._unit() as repos:
+            return repos.products.low_stock(threshold)
+
+    def top_ordered_products(self, limit: int = 10) -> List[ProductOrderCount]:
+        with self._unit() as repos:
+            return repos.products.top_ordered(limit)
+
+    def search_products(
+        self, query: str, limit: int = 20, offset: int = 0
+    ) -> List[Product]:
+        with self._unit() as repos:
+            return repos.products.search(query, limit, offset)
+
+    def search_customers(
+        self, query: str, limit: int = 20, offset: int = 0
+    ) -> List[Customer]:
+        with self._unit() as repos:
+            return repos.customers.search(query, limit, offset)
+
+
+class AsyncWarehouseService:
+    def __init__(
+        self,
+        product_repo: Optional[AsyncProductRepository] = None,
+        order_repo: Optional[AsyncOrderRepository] = None,
+        category_repo: Optional[AsyncCategoryRepository] = None,
+        role_repo: Optional[AsyncRoleRepository] = None,
+        staff_repo: Optional[AsyncStaffRepository] = None,
+        customer_repo: Optional[AsyncCustomerRepository] = None,
+    ):
+        self.product_repo = product_repo
+        self.order_repo = order_repo
+        self.category_repo = category_repo
+        self.role_repo = role_repo
+        self.staff_repo = staff_repo
+        self.customer_repo = customer_repo
+
+    async def create_product(
+        self, name: str, quantity: int, price: float, category: int
+    ) -> Product:
+        product = Product(name=name, quantity=quantity, price=price, category=category)
+        if self.product_repo:
+            await self.product_repo.add(product)
+        return product
+
+    async def create_products(self, products: Iterable[Product]) -> List[int]:
+        if self.product_repo:
+            return await self.product_repo.add_many(products)
+        return []
+
+    async def create_order(
+        self, products: List[Product], quantities: Optional[List[int]] = None
+    ) -> Order:
+        order = _build_order(products, quantities)
+        if self.product_repo:
+            await self.product_repo.reserve(order.lines)
+        if self.order_repo:
+            await self.order_repo.add(order)
+        return order
+
+    async def create_category(
+        self, name: str, description: str, products: List[Product]
+    ) -> Category:
+        category = Category(name=name, description=description, products=products)
+        if self.category_repo:
+            await self.category_repo.add(category)
+        return category
+
+    async def create_role(
+        self, name: str, description: str, staffs: List[Staff]
+    ) -> Role:
+        role = Role(name=name, description=description, staffs=staffs)
+        if self.role_repo:
+            await self.role_repo.add(role)
+        return role
+
+    async def create_staff(
+        self,
+        first_name: str,
+        last_name: str,
+        address: str,
+        phone: str,
+        email: str,
+        user_name: str,
+        role_id: int,
+        customers: List[Customer],
+    ) -> Staff:
+        staff = Staff(
+            first_name=first_name,
+            last_name=last_name,
+            address=address,
+            phone=phone,
+            email=email,
+            user_name=user_name,
+            role_id=role_id,
+            customers=customers,
+        )
+        if self.staff_repo:
+            await self.staff_repo.add(staff)
+        return staff
+
+    async def create_customer(
+        self,
+        first_name: str,
+        last_name: str,
+        address: str,
+        phone: str,
+        email: str,
+        staff_id: int,
+    ) -> Customer:
+        customer = Customer(
+            first_name=first_name,
+            last_name=last_name,
+            address=address,
+            phone=phone,
+            email=email,
+            staff_id=staff_id,
+        )
+        if self.customer_repo:
+            await self.customer_repo.add(customer)
+        return customer
+
+    async def get_product(self, product_id: int) -> Product:
+        return await self.product_repo.get(product_id)  # type: ignore
+
+    async def get_order(self, order_id: int) -> Order:
+        return await self.order_repo.get(order_id)  # type: ignore
+
+    async def get_category(self, category_id: int) -> Category:
+        return await self.category_repo.get(category_id)  # type: ignore
+
+    async def get_role(self, role_id: int) -> Role:
+        return await self.role_repo.get(role_id)  # type: ignore
+
+    async def get_customer(self, customer_id: int) -> Customer:
+        return await self.customer_repo.get(customer_id)  # type: ignore
+
+    async def get_staff(self, staff_id: int) -> Staff:
+        return await self.staff_repo.get(staff_id)  # type: ignore
@@ -1,7 +1,32 @@
 from abc import ABC, abstractmethod
+from typing import Any
+
+from .repositories import (
+    CategoryRepository,
+    CustomerRepository,
+    OrderRepository,
+    ProductRepository,
+    RoleRepository,
+    StaffRepository,
+)
 
 
 class UnitOfWork(ABC):
+    # Repositories bound to the session of the current block.
+    products: ProductRepository
+    orders: OrderRepository
+    categories: CategoryRepository
+    customers: CustomerRepository
+    roles: RoleRepository
+    staffs: StaffRepository
+
+    @property
+    def reads(self) -> Any:
+        # Repositories for calls that only read, with the same attributes as
+        # the unit of work. A unit of work that sends reads to another
+        # session overrides this.
+        return self
+
     @abstractmethod
     def __enter__(self) -> "UnitOfWork":
         pass
@@ -17,3 +42,21 @@ class UnitOfWork(ABC):
     @abstractmethod
     def rollback(self) -> None:
         pass
+
+
+class AsyncUnitOfWork(ABC):
+    @abstractmethod
+    async def __aenter__(self) -> "AsyncUnitOfWork":
+        pass
+
+    @abstractmethod
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+    @abstractmethod
+    async def commit(self) -> None:
+        pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
@@ -0,0 +1,300 @@
+from typing import Any, Dict, Iterable, List, Type
+
+from sqlalchemy import Select, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.util import identity_key
+
+from warehouse_management.domain.exceptions import EntitiesNotFound
+from warehouse_management.domain.models import (
+    Category,
+    Customer,
+    Order,
+    OrderLine,
+    Product,
+    Role,
+    Staff,
+)
+from warehouse_management.domain.repositories import (
+    AsyncCategoryRepository,
+    AsyncCustomerRepository,
+    AsyncOrderRepository,
+    AsyncProductRepository,
+    AsyncRoleRepository,
+    AsyncStaffRepository,
+)
+
+from .orm import (
+    CategoryORM,
+    CustomerORM,
+    OrderLineORM,
+    OrderORM,
+    ProductORM,
+    RoleORM,
+    StaffORM,
+)
+from .repositories import (
+    BULK_INSERT_CHUNK_SIZE,
+    IN_CLAUSE_CHUNK_SIZE,
+    ORMT,
+    _RESERVE,
+    _category_from_orm,
+    _chunks,
+    _customer_from_orm,
+    _order_from_orm,
+    _product_from_orm,
+    _raise_short,
+    _role_from_orm,
+    _staff_from_orm,
+    _wanted_by_product,
+)
+
+# Lazy loads cannot run under AsyncSession, so every query that maps an
+# aggregate loads its collections up front with selectin.
+
+
+async def _load_by_ids(
+    session: AsyncSession, orm_class: Type[ORMT], entity: str, ids: Iterable[int]
+) -> List[ORMT]:
+    unique_ids = list(dict.fromkeys(ids))
+    found: Dict[int, ORMT] = {}
+    for chunk in _chunks(unique_ids, IN_CLAUSE_CHUNK_SIZE):
+        result = await session.scalars(
+            select(orm_class).where(orm_class.id.in_(chunk))  # type: ignore
+        )
+        found.update((obj.id, obj) for obj in result)  # type: ignore
+    missing = [i for i in unique_ids if i not in found]
+    if missing:
+        raise EntitiesNotFound(entity, missing)
+    return [found[i] for i in unique_ids]
+
+
+async def _get_one(
+    session: AsyncSession, statement: "Select[Any]", entity: str, entity_id: int
+) -> Any:
+    result = await session.execute(statement)
+    obj = result.scalar_one_or_none()
+    if obj is None:
+        raise EntitiesNotFound(entity, [entity_id])
+    return obj
+
+
+class AsyncSqlAlchemyProductRepository(AsyncProductRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, product: Product) -> None:
+        product_orm = ProductORM(
+            name=product.name,
+            quantity=product.quantity,
+            price=product.price,
+            category=product.category,
+        )
+        self.session.add(product_orm)
+
+    async def add_many(
+        self, products: Iterable[Product], chunk_size: int = BULK_INSERT_CHUNK_SIZE
+    ) -> List[int]:
+        statement = insert(ProductORM.__table__).returning(ProductORM.id)
+        ids: List[int] = []
+        for chunk in _chunks(products, chunk_size):
+            result = await self.session.execute(
+                statement,
+                [
+                    {
+                        "name": p.name,
+                        "quantity": p.quantity,
+                        "price": p.price,
+                        "category": p.category,
+                    }
+                    for p in chunk
+                ],
+                execution_options={"insertmanyvalues_page_size": chunk_size},
+            )
+            chunk_ids = sorted(result.scalars())
+            for product, product_id in zip(chunk, chunk_ids):
+                product.id = product_id
+                product.version = 1
+            ids.extend(chunk_ids)
+        return ids
+
+    async def get(self, product_id: int) -> Product:
+        statement = select(ProductORM).filter_by(id=product_id)
+        orm = await _get_one(self.session, statement, "Product", product_id)
+        return _product_from_orm(orm)
+
+    async def list(self) -> List[Product]:
+        result = await self.session.scalars(select(ProductORM))
+        return [_product_from_orm(p) for p in result]
+
+    async def reserve(self, lines: Iterable[OrderLine]) -> None:
+        # Same guarded decrements, and version bumps, as
+        # SqlAlchemyProductRepository.reserve.
+        wanted = _wanted_by_product(lines)
+        if not wanted:
+            return
+        params = [{"product_id": i, "wanted": n} for i, n in sorted(wanted.items())]
+        await self.session.flush()
+        savepoint = await self.session.begin_nested()
+        result = await self.session.execute(_RESERVE, params)
+        reserved = result.rowcount  # type: ignore
+        if reserved < len(params):
+            await savepoint.rollback()
+            await self.session.run_sync(
+                lambda session: _raise_short(session.connection(), wanted)
+            )
+        await savepoint.commit()
+        identity_map = self.session.sync_session.identity_map
+        for product_id in wanted:
+            product = identity_map.get(identity_key(ProductORM, product_id))
+            if product is not None:
+                self.session.expire(product, ["quantity", "version"])
+
+
+class AsyncSqlAlchemyOrderRepository(AsyncOrderRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, order: Order) -> None:
+        quantities = {line.product_id: line.quantity for line in order.lines}
+        products = await _load_by_ids(
+            self.session, ProductORM, "Product", (p.id for p in order.products)
+        )
+        order_orm = OrderORM(
+            lines=[
+                OrderLineORM(product=p, quantity=quantities.get(p.id, 1))
+                for p in products
+            ]
+        )
+        self.session.add(order_orm)
+
+    async def get(self, order_id: int) -> Order:
+        statement = (
+            select(OrderORM)
+            .options(selectinload(OrderORM.lines))
+            .filter_by(id=order_id)
+        )
+        orm = await _get_one(self.session, statement, "Order", order_id)
+        return _order_from_orm(orm)
+
+    async def list(self) -> List[Order]:
+        result = await self.session.scalars(
+            select(OrderORM).options(selectinload(OrderORM.lines))
+        )
+        return [_order_from_orm(o) for o in result]
+
+
+class AsyncSqlAlchemyCategoryRepository(AsyncCategoryRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, category: Category) -> None:
+        category_orm = CategoryORM(name=category.name, description=category.description)
+        category_orm.products = await _load_by_ids(
+            self.session, ProductORM, "Product", (p.id for p in category.products)
+        )
+        self.session.add(category_orm)
+
+    async def get(self, category_id: int) -> Category:
+        statement = (
+            select(CategoryORM)
+            .options(selectinload(CategoryORM.products))
+            .filter_by(id=category_id)
+        )
+        orm = await _get_one(self.session, statement, "Category", category_id)
+        return _category_from_orm(orm)
+
+    async def list(self) -> List[Category]:
+        result = await self.session.scalars(
+            select(CategoryORM).options(selectinload(CategoryORM.products))
+        )
+        return [_category_from_orm(c) for c in result]
+
+
+class AsyncSqlAlchemyCustomerRepository(AsyncCustomerRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, customer: Customer) -> None:
+        customer_orm = CustomerORM(
+            first_name=customer.first_name,
+            last_name=customer.last_name,
+            address=customer.address,
+            phone=customer.phone,
+            email=customer.email,
+            staff_id=customer.staff_id,
+        )
+        self.session.add(customer_orm)
+
+    async def get(self, customer_id: int) -> Customer:
+        statement = select(CustomerORM).filter_by(id=customer_id)
+        orm = await _get_one(self.session, statement, "Customer", customer_id)
+        return _customer_from_orm(orm)
+
+    async def list(self) -> List[Customer]:
+        result = await self.session.scalars(select(CustomerORM))
+        return [_customer_from_orm(c) for c in result]
+
+
+class AsyncSqlAlchemyRoleRepository(AsyncRoleRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, role: Role) -> None:
+        role_orm = RoleORM(name=role.name, description=role.description)
+        role_orm.staffs = await _load_by_ids(
+            self.session, StaffORM, "Staff", (p.id for p in role.staffs)
+        )
+        self.session.add(role_orm)
+
+    async def get(self, role_id: int) -> Role:
+        statement = (
+            select(RoleORM)
+            .options(selectinload(RoleORM.staffs).selectinload(StaffORM.customers))
+            .filter_by(id=role_id)
+        )
+        orm = await _get_one(self.session, statement, "Role", role_id)
+        return _role_from_orm(orm)
+
+    async def list(self) -> List[Role]:
+        result = await self.session.scalars(
+            select(RoleORM).options(
+                selectinload(RoleORM.staffs).selectinload(StaffORM.customers)
+            )
+        )
+        return [_role_from_orm(r) for r in result]
+
+
+class AsyncSqlAlchemyStaffRepository(AsyncStaffRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, staff: Staff) -> None:
+        staff_orm = StaffORM(
+            first_name=staff.first_name,
+            last_name=staff.last_name,
+            address=staff.address,
+            phone=staff.phone,
+            email=staff.email,
+            user_name=staff.user_name,
+            role_id=staff.role_id,
+        )
+        staff_orm.customers = await _load_by_ids(
+            self.session, CustomerORM, "Customer", (p.id for p in staff.customers)
+        )
+        self.session.add(staff_orm)
+
+    async def get(self, staff_id: int) -> Staff:
+        statement = (
+            select(StaffORM)
+            .options(selectinload(StaffORM.customers))
+            .filter_by(id=staff_id)
+        )
+        orm = await _get_one(self.session, statement, "Staff", staff_id)
+        return _staff_from_orm(orm)
+
+    async def list(self) -> List[Staff]:
+        result = await self.session.scalars(
+            select(StaffORM).options(selectinload(StaffORM.customers))
+        )
+        return [_staff_from_orm(s) for s in result]
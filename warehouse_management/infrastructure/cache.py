@@ -0,0 +1,558 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import (
+    TYPE_CHECKING,
+    AbstractSet,
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import (
+    Category,
+    CategoryStock,
+    CategorySummary,
+    Customer,
+    LowStockItem,
+    Order,
+    OrderLine,
+    Product,
+    ProductOrderCount,
+    Role,
+    Staff,
+)
+from warehouse_management.domain.repositories import (
+    CategoryRepository,
+    CustomerRepository,
+    OrderRepository,
+    ProductRepository,
+    RoleRepository,
+    StaffRepository,
+)
+
+from .orm import CategoryORM, CustomerORM, OrderORM, ProductORM, RoleORM, StaffORM
+
+if TYPE_CHECKING:
+    from .repositories import LoadStrategy
+
+T = TypeVar("T")
+
+# Same as in repositories.py, which imports this module.
+BULK_INSERT_CHUNK_SIZE = 1000
+
+# Entries are keyed by (table name, primary key) so that the unit of work can
+# invalidate them straight from the ORM objects it flushed.
+CacheKey = Tuple[str, int]
+
+# Session.info key under which every write in the current transaction records
+# the (table, id) of the row it touched.
+WRITTEN_KEYS = "written_keys"
+
+
+# Session.info key holding the cache generation current when the session's
+# transaction began; see ``_read_through``.
+CACHE_GENERATION = "cache_generation"
+
+
+def written_keys(session: Session) -> Set[CacheKey]:
+    return session.info.setdefault(WRITTEN_KEYS, set())
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: Optional[float]
+    depends_on: Tuple[CacheKey, ...]
+
+
+class EntityCache:
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: Optional[float] = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._dependents: Dict[CacheKey, Set[CacheKey]] = {}
+        self._stats = CacheStats()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return replace(self._stats)
+
+    @property
+    def generation(self) -> int:
+        # Bumped by every invalidation, so a reader can tell whether what it
+        # loaded may have been superseded before it got to ``put`` it.
+        return self._generation
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def get(
+        self, key: CacheKey, excluding: AbstractSet[CacheKey] = frozenset()
+    ) -> Optional[Any]:
+        # ``excluding`` holds keys the caller has written and not committed;
+        # an entry under one of them, or built from one, is stale to it.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or key in excluding:
+                self._stats.misses += 1
+                return None
+            if not excluding.isdisjoint(entry.depends_on):
+                self._stats.misses += 1
+                return None
+            if entry.expires_at is not None and entry.expires_at <= self._clock():
+                self._remove(key)
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return copy.deepcopy(entry.value)
+
+    def put(
+        self,
+        key: CacheKey,
+        value: Any,
+        depends_on: Iterable[CacheKey] = (),
+        generation: Optional[int] = None,
+    ) -> None:
+        expires_at = None if self.ttl is None else self._clock() + self.ttl
+        entry = _Entry(copy.deepcopy(value), expires_at, tuple(depends_on))
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            for dependency in entry.depends_on:
+                self._dependents.setdefault(dependency, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    def invalidate(self, keys: Iterable[CacheKey]) -> None:
+        with self._lock:
+            self._generation += 1
+            pending = list(keys)
+            while pending:
+                key = pending.pop()
+                # Aggregates cached under other keys embed this entity too.
+                pending.extend(self._dependents.pop(key, ()))
+                if key in self._entries:
+                    self._remove(key)
+                    self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._dependents.clear()
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        for dependency in entry.depends_on:
+            dependents = self._dependents.get(dependency)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[dependency]
+
+
+def _product_keys(products: Iterable[Product]) -> List[CacheKey]:
+    return [(ProductORM.__tablename__, p.id) for p in products]
+
+
+def _customer_keys(customers: Iterable[Customer]) -> List[CacheKey]:
+    return [(CustomerORM.__tablename__, c.id) for c in customers]
+
+
+def _staff_keys(staffs: Iterable[Staff]) -> List[CacheKey]:
+    keys: List[CacheKey] = []
+    for s in staffs:
+        keys.append((StaffORM.__tablename__, s.id))
+        keys.extend(_customer_keys(s.customers))
+    return keys
+
+
+def _read_through(
+    cache: EntityCache,
+    session: Session,
+    key: CacheKey,
+    read: Callable[[], T],
+    depends_on: Callable[[T], Iterable[CacheKey]] = lambda value: (),
+) -> T:
+    # The shared cache only ever holds committed state: a transaction that
+    # has written reads around it for what it wrote and fills it with
+    # nothing, since its reads may include its own uncommitted rows. Nor is
+    # a row put back once any commit has invalidated the cache since this
+    # transaction began: its snapshot may predate that commit.
+    generation = session.info.setdefault(CACHE_GENERATION, cache.generation)
+    written = written_keys(session)
+    value = cache.get(key, excluding=written)
+    if value is None:
+        value = read()
+        if not written:
+            cache.put(
+                key, value, depends_on=depends_on(value), generation=generation
+            )
+    return value
+
+
+class CachedProductRepository(ProductRepository):
+    namespace = ProductORM.__tablename__
+
+    def __init__(self, repository: ProductRepository, cache: EntityCache):
+        self.repository = repository
+        self.cache = cache
+
+    def add(self, product: Product) -> None:
+        self.repository.add(product)
+
+    def add_many(
+        self, products: Iterable[Product], chunk_size: int = BULK_INSERT_CHUNK_SIZE
+    ) -> List[int]:
+        return self.repository.add_many(products, chunk_size)  # type: ignore
+
+    def update(self, product: Product) -> None:
+        # Dropped whether or not the write goes through: after it the cached
+        # copy is stale, and after a conflict the copy the caller read may
+        # have come from here, so a retry must read the current row.
+        try:
+            self.repository.update(product)
+        finally:
+            self.cache.invalidate([(self.namespace, product.id)])
+
+    def get(self, product_id: int) -> Product:
+        return _read_through(
+            self.cache,
+            self.repository.session,  # type: ignore
+            (self.namespace, product_id),
+            lambda: self.repository.get(product_id),
+        )
+
+    def list(self) -> List[Product]:
+        return self.repository.list()
+
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Product]:
+        return self.repository.iter(batch_size=batch_size, after_id=after_id)
+
+    def list_changed_since(
+        self, watermark: int, limit: int = 1000
+    ) -> Tuple[List[Product], int]:
+        return self.repository.list_changed_since(watermark, limit)
+
+    def list_by_category(self, category: int) -> List[Product]:
+        return self.repository.list_by_category(category)
+
+    def find_by_name(self, name: str) -> List[Product]:
+        return self.repository.find_by_name(name)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[Product]:
+        return self.repository.search(query, limit, offset)
+
+    def reserve(self, lines: Iterable[OrderLine]) -> None:
+        lines = list(lines)
+        try:
+            self.repository.reserve(lines)
+        finally:
+            self.cache.invalidate(
+                (self.namespace, line.product_id) for line in lines
+            )
+
+    def stock_value(self) -> float:
+        return self.repository.stock_value()
+
+    def stock_by_category(self) -> List[CategoryStock]:
+        return self.repository.stock_by_category()
+
+    def category_summary(self) -> List[CategorySummary]:
+        return self.repository.category_summary()
+
+    def low_stock(self, threshold: int) -> List[LowStockItem]:
+        return self.repository.low_stock(threshold)
+
+    def top_ordered(self, limit: int = 10) -> List[ProductOrderCount]:
+        return self.repository.top_ordered(limit)
+
+
+class CachedOrderRepository(OrderRepository):
+    namespace = OrderORM.__tablename__
+
+    def __init__(self, repository: OrderRepository, cache: EntityCache):
+        self.repository = repository
+        self.cache = cache
+
+    def add(self, order: Order) -> None:
+        self.repository.add(order)
+
+    def get(
+        self,
+        order_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Order:
+        # Partial reads go straight through: a cached copy is always whole.
+        if fields is not None or depth is not None:
+            return self.repository.get(order_id, fields, depth)
+        return _read_through(
+            self.cache,
+            self.repository.session,  # type: ignore
+            (self.namespace, order_id),
+            lambda: self.repository.get(order_id),
+            lambda order: _product_keys(order.products),
+        )
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+        loading: "LoadStrategy" = "selectin",
+    ) -> List[Order]:
+        return self.repository.list(  # type: ignore
+            fields=fields, depth=depth, loading=loading
+        )
+
+    def iter(
+        self,
+        batch_size: int = 1000,
+        after_id: int = 0,
+        loading: "LoadStrategy" = "selectin",
+    ) -> Iterator[Order]:
+        return self.repository.iter(  # type: ignore
+            batch_size=batch_size, after_id=after_id, loading=loading
+        )
+
+
+class CachedCategoryRepository(CategoryRepository):
+    namespace = CategoryORM.__tablename__
+
+    def __init__(self, repository: CategoryRepository, cache: EntityCache):
+        self.repository = repository
+        self.cache = cache
+
+    def add(self, category: Category) -> None:
+        self.repository.add(category)
+
+    def get(
+        self,
+        category_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Category:
+        if fields is not None or depth is not None:
+            return self.repository.get(category_id, fields, depth)
+        return _read_through(
+            self.cache,
+            self.repository.session,  # type: ignore
+            (self.namespace, category_id),
+            lambda: self.repository.get(category_id),
+            lambda category: _product_keys(category.products),
+        )
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+        loading: "LoadStrategy" = "selectin",
+    ) -> List[Category]:
+        return self.repository.list(  # type: ignore
+            fields=fields, depth=depth, loading=loading
+        )
+
+    def iter(
+        self,
+        batch_size: int = 1000,
+        after_id: int = 0,
+        loading: "LoadStrategy" = "selectin",
+    ) -> Iterator[Category]:
+        return self.repository.iter(  # type: ignore
+            batch_size=batch_size, after_id=after_id, loading=loading
+        )
+
+
+class CachedCustomerRepository(CustomerRepository):
+    namespace = CustomerORM.__tablename__
+
+    def __init__(self, repository: CustomerRepository, cache: EntityCache):
+        self.repository = repository
+        self.cache = cache
+
+    def add(self, customer: Customer) -> None:
+        self.repository.add(customer)
+
+    def add_many(
+        self, customers: Iterable[Customer], chunk_size: int = BULK_INSERT_CHUNK_SIZE
+    ) -> List[int]:
+        return self.repository.add_many(customers, chunk_size)  # type: ignore
+
+    def update(self, customer: Customer) -> None:
+        try:
+            self.repository.update(customer)
+        finally:
+            self.cache.invalidate([(self.namespace, customer.id)])
+
+    def get(self, customer_id: int) -> Customer:
+        return _read_through(
+            self.cache,
+            self.repository.session,  # type: ignore
+            (self.namespace, customer_id),
+            lambda: self.repository.get(customer_id),
+        )
+
+    def list(self) -> List[Customer]:
+        return self.repository.list()
+
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Customer]:
+        return self.repository.iter(batch_size=batch_size, after_id=after_id)
+
+    def list_changed_since(
+        self, watermark: int, limit: int = 1000
+    ) -> Tuple[List[Customer], int]:
+        return self.repository.list_changed_since(watermark, limit)
+
+    def list_by_staff(self, staff_id: int) -> List[Customer]:
+        return self.repository.list_by_staff(staff_id)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[Customer]:
+        return self.repository.search(query, limit, offset)
+
+
+class CachedRoleRepository(RoleRepository):
+    namespace = RoleORM.__tablename__
+
+    def __init__(self, repository: RoleRepository, cache: EntityCache):
+        self.repository = repository
+        self.cache = cache
+
+    def add(self, role: Role) -> None:
+        self.repository.add(role)
+
+    def get(
+        self,
+        role_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Role:
+        if fields is not None or depth is not None:
+            return self.repository.get(role_id, fields, depth)
+        return _read_through(
+            self.cache,
+            self.repository.session,  # type: ignore
+            (self.namespace, role_id),
+            lambda: self.repository.get(role_id),
+            lambda role: _staff_keys(role.staffs),
+        )
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+        loading: "LoadStrategy" = "selectin",
+    ) -> List[Role]:
+        return self.repository.list(  # type: ignore
+            fields=fields, depth=depth, loading=loading
+        )
+
+    def iter(
+        self,
+        batch_size: int = 1000,
+        after_id: int = 0,
+        loading: "LoadStrategy" = "selectin",
+    ) -> Iterator[Role]:
+        return self.repository.iter(  # type: ignore
+            batch_size=batch_size, after_id=after_id, loading=loading
+        )
+
+
+class CachedStaffRepository(StaffRepository):
+    namespace = StaffORM.__tablename__
+
+    def __init__(self, repository: StaffRepository, cache: EntityCache):
+        self.repository = repository
+        self.cache = cache
+
+    def add(self, staff: Staff) -> None:
+        self.repository.add(staff)
+
+    def update(self, staff: Staff) -> None:
+        try:
+            self.repository.update(staff)
+        finally:
+            self.cache.invalidate([(self.namespace, staff.id)])
+
+    def get(
+        self,
+        staff_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Staff:
+        if fields is not None or depth is not None:
+            return self.repository.get(staff_id, fields, depth)
+        return _read_through(
+            self.cache,
+            self.repository.session,  # type: ignore
+            (self.namespace, staff_id),
+            lambda: self.repository.get(staff_id),
+            lambda staff: _customer_keys(staff.customers),
+        )
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+        loading: "LoadStrategy" = "selectin",
+    ) -> List[Staff]:
+        return self.repository.list(  # type: ignore
+            fields=fields, depth=depth, loading=loading
+        )
+
+    def iter(
+        self,
+        batch_size: int = 1000,
+        after_id: int = 0,
+        loading: "LoadStrategy" = "selectin",
+    ) -> Iterator[Staff]:
+        return self.repository.iter(  # type: ignore
+            batch_size=batch_size, after_id=after_id, loading=loading
+        )
+
+    def list_changed_since(
+        self, watermark: int, limit: int = 1000
+    ) -> Tuple[List[Staff], int]:
+        return self.repository.list_changed_since(watermark, limit)
+
+    def list_by_role(self, role_id: int) -> List[Staff]:
+        return self.repository.list_by_role(role_id)
@@ -0,0 +1,400 @@
+import argparse
+import csv
+import math
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import Customer, Product
+
+from .database import DATABASE_URL, build_engine, build_session_factory, init_db
+from .orm import ImportCheckpointORM
+from .repositories import SqlAlchemyCustomerRepository, SqlAlchemyProductRepository
+from .unit_of_work import SqlAlchemyUnitOfWork
+
+DEFAULT_CHUNK_SIZE = 10_000
+ENCODING = "utf-8"
+
+
+@dataclass
+class ImportReport:
+    job: str
+    total_bytes: int
+    # Where the next chunk starts: a byte offset and the last line read.
+    offset: int = 0
+    line: int = 1
+    imported: int = 0
+    rejected: int = 0
+    chunks: int = 0
+    resumed: bool = False
+
+
+@dataclass
+class ExportReport:
+    path: str
+    rows: int = 0
+    chunks: int = 0
+
+
+@dataclass(frozen=True)
+class _Format:
+    fields: Tuple[str, ...]
+    parse: Callable[[Dict[str, Optional[str]]], Any]
+    repository: Callable[[Session], Any]
+
+
+def _text(record: Dict[str, Optional[str]], name: str) -> str:
+    value = record[name]
+    if value is None:
+        raise ValueError(f"{name} is missing")
+    return value.strip()
+
+
+def _required(record: Dict[str, Optional[str]], name: str) -> str:
+    value = _text(record, name)
+    if not value:
+        raise ValueError(f"{name} is empty")
+    return value
+
+
+def _int(
+    record: Dict[str, Optional[str]], name: str, minimum: Optional[int] = None
+) -> int:
+    value = _required(record, name)
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} is not an integer: {value!r}") from None
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {number}")
+    return number
+
+
+def _float(record: Dict[str, Optional[str]], name: str, minimum: float) -> float:
+    value = _required(record, name)
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{name} is not a number: {value!r}") from None
+    if not math.isfinite(number) or number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {value}")
+    return number
+
+
+def _parse_product(record: Dict[str, Optional[str]]) -> Product:
+    return Product(
+        name=_required(record, "name"),
+        quantity=_int(record, "quantity", minimum=0),
+        price=_float(record, "price", minimum=0.0),
+        category=_int(record, "category"),
+    )
+
+
+def _parse_customer(record: Dict[str, Optional[str]]) -> Customer:
+    return Customer(
+        first_name=_required(record, "first_name"),
+        last_name=_required(record, "last_name"),
+        address=_text(record, "address"),
+        phone=_text(record, "phone"),
+        email=_text(record, "email"),
+        staff_id=_int(record, "staff_id"),
+    )
+
+
+FORMATS: Dict[str, _Format] = {
+    "products": _Format(
+        ("name", "quantity", "price", "category"),
+        _parse_product,
+        SqlAlchemyProductRepository,
+    ),
+    "customers": _Format(
+        ("first_name", "last_name", "address", "phone", "email", "staff_id"),
+        _parse_customer,
+        SqlAlchemyCustomerRepository,
+    ),
+}
+
+
+class _Lines:
+    # Hands csv.reader one decoded line at a time and counts the bytes it has
+    # consumed. csv.reader pulls exactly the lines of one record, so after
+    # every record ``offset`` is where the next one starts, and a resumed
+    # import seeks straight there instead of re-reading the file.
+    def __init__(self, f: BinaryIO, offset: int):
+        self.f = f
+        self.offset = offset
+
+    def __iter__(self) -> "_Lines":
+        return self
+
+    def __next__(self) -> str:
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode(ENCODING)
+
+
+class _Rejects:
+    # Appends to an existing file, so a resumed import adds to the rows the
+    # earlier run rejected.
+    def __init__(self, path: str, header: Sequence[str]):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.f = open(path, "a", newline="", encoding=ENCODING)
+        self.writer = csv.writer(self.f)
+        if new:
+            self.writer.writerow(["line", "error", *header])
+
+    def write(self, rows: List[Tuple[int, str, List[str]]]) -> None:
+        self.writer.writerows([line, error, *values] for line, error, values in rows)
+        self.f.flush()
+
+    def close(self) -> None:
+        self.f.close()
+
+
+def _read_header(f: BinaryIO, fields: Sequence[str], path: str) -> List[str]:
+    header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+    header = [name.strip() for name in header]
+    missing = [name for name in fields if name not in header]
+    if missing:
+        raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+    return header
+
+
+def _import(
+    uow: SqlAlchemyUnitOfWork,
+    kind: str,
+    path: str,
+    chunk_size: int,
+    rejects_path: Optional[str],
+    job: Optional[str],
+    restart: bool,
+    progress: Optional[Callable[[ImportReport], None]],
+) -> ImportReport:
+    # Each chunk is inserted and its checkpoint written in one transaction,
+    # so after a crash the checkpoint points exactly past the last chunk
+    # that reached the database. Running the same job again resumes there;
+    # running it after it finished imports only rows appended since.
+    fmt = FORMATS[kind]
+    session = uow.session
+    report = ImportReport(
+        job=job or f"{kind}:{os.path.abspath(path)}",
+        total_bytes=os.path.getsize(path),
+    )
+    checkpoint = session.get(ImportCheckpointORM, report.job)
+    if checkpoint is not None and restart:
+        session.delete(checkpoint)
+        uow.commit()
+        checkpoint = None
+
+    with open(path, "rb") as f:
+        header = _read_header(f, fmt.fields, path)
+        report.offset = f.tell()
+        if checkpoint is not None:
+            report.offset = int(checkpoint.offset)
+            report.line = int(checkpoint.line)
+            report.imported = int(checkpoint.imported)
+            report.rejected = int(checkpoint.rejected)
+            report.resumed = True
+            f.seek(report.offset)
+        lines = _Lines(f, report.offset)
+        reader = csv.reader(lines)
+        rejects = _Rejects(rejects_path, header) if rejects_path else None
+        first_line = report.line
+        entities: List[Any] = []
+        rejected: List[Tuple[int, str, List[str]]] = []
+
+        def commit_chunk() -> None:
+            fmt.repository(session).add_many(entities)
+            report.offset = lines.offset
+            report.line = first_line + reader.line_num
+            report.imported += len(entities)
+            report.rejected += len(rejected)
+            session.merge(
+                ImportCheckpointORM(
+                    job=report.job,
+                    offset=report.offset,
+                    line=report.line,
+                    imported=report.imported,
+                    rejected=report.rejected,
+                )
+            )
+            uow.commit()
+            if rejects is not None and rejected:
+                rejects.write(rejected)
+            report.chunks += 1
+            entities.clear()
+            rejected.clear()
+            if progress is not None:
+                progress(report)
+
+        try:
+            line = first_line
+            for values in reader:
+                record_line, line = line + 1, first_line + reader.line_num
+                if not values:
+                    continue
+                if len(values) != len(header):
+                    rejected.append(
+                        (
+                            record_line,
+                            f"expected {len(header)} values, got {len(values)}",
+                            values,
+                        )
+                    )
+                else:
+                    try:
+                        entities.append(fmt.parse(dict(zip(header, values))))
+                    except ValueError as error:
+                        rejected.append((record_line, str(error), values))
+                if len(entities) + len(rejected) >= chunk_size:
+                    commit_chunk()
+            if entities or rejected or lines.offset != report.offset:
+                commit_chunk()
+        finally:
+            if rejects is not None:
+                rejects.close()
+    return report
+
+
+def _export(
+    uow: SqlAlchemyUnitOfWork,
+    kind: str,
+    path: str,
+    chunk_size: int,
+    progress: Optional[Callable[[ExportReport], None]],
+) -> ExportReport:
+    # Written next to the target and renamed over it once complete, so a
+    # crashed export never leaves a truncated file under the real name.
+    fmt = FORMATS[kind]
+    report = ExportReport(path=path)
+    partial = f"{path}.part"
+    with open(partial, "w", newline="", encoding=ENCODING) as f:
+        writer = csv.writer(f)
+        writer.writerow(("id", *fmt.fields))
+        rows: List[List[Any]] = []
+        for entity in fmt.repository(uow.session).iter(batch_size=chunk_size):
+            rows.append([entity.id, *(getattr(entity, name) for name in fmt.fields)])
+            if len(rows) == chunk_size:
+                writer.writerows(rows)
+                report.rows += len(rows)
+                report.chunks += 1
+                rows.clear()
+                if progress is not None:
+                    progress(report)
+        if rows:
+            writer.writerows(rows)
+            report.rows += len(rows)
+            report.chunks += 1
+            if progress is not None:
+                progress(report)
+    os.replace(partial, path)
+    return report
+
+
+def import_products(
+    uow: SqlAlchemyUnitOfWork,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rejects_path: Optional[str] = None,
+    job: Optional[str] = None,
+    restart: bool = False,
+    progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    return _import(
+        uow, "products", path, chunk_size, rejects_path, job, restart, progress
+    )
+
+
+def import_customers(
+    uow: SqlAlchemyUnitOfWork,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    rejects_path: Optional[str] = None,
+    job: Optional[str] = None,
+    restart: bool = False,
+    progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    return _import(
+        uow, "customers", path, chunk_size, rejects_path, job, restart, progress
+    )
+
+
+def export_products(
+    uow: SqlAlchemyUnitOfWork,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[Callable[[ExportReport], None]] = None,
+) -> ExportReport:
+    return _export(uow, "products", path, chunk_size, progress)
+
+
+def export_customers(
+    uow: SqlAlchemyUnitOfWork,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[Callable[[ExportReport], None]] = None,
+) -> ExportReport:
+    return _export(uow, "customers", path, chunk_size, progress)
+
+
+def _print_import(report: ImportReport) -> None:
+    done = report.offset / report.total_bytes if report.total_bytes else 1.0
+    print(
+        f"\rline {report.line:,}: {report.imported:,} imported, "
+        f"{report.rejected:,} rejected ({done:.0%})",
+        end="",
+        file=sys.stderr,
+    )
+
+
+def _print_export(report: ExportReport) -> None:
+    print(f"\r{report.rows:,} rows written", end="", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Stream products or customers")
+    parser.add_argument("direction", choices=["import", "export"])
+    parser.add_argument("kind", choices=sorted(FORMATS))
+    parser.add_argument("path")
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        "--rejects", help="CSV file for rejected rows (default: <path>.rejected.csv)"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore an earlier checkpoint"
+    )
+    args = parser.parse_args(argv)
+
+    engine = build_engine(args.url)
+    init_db(engine)
+    with SqlAlchemyUnitOfWork(build_session_factory(engine)) as uow:
+        if args.direction == "import":
+            report = _import(
+                uow,
+                args.kind,
+                args.path,
+                args.chunk_size,
+                args.rejects or f"{args.path}.rejected.csv",
+                None,
+                args.restart,
+                _print_import,
+            )
+            print(
+                f"\n{report.imported:,} imported, {report.rejected:,} rejected"
+                + (" (resumed)" if report.resumed else ""),
+                file=sys.stderr,
+            )
+        else:
+            _export(uow, args.kind, args.path, args.chunk_size, _print_export)
+            print(file=sys.stderr)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
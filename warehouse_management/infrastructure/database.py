@@ -1,6 +1,215 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from orm import Base
+from dataclasses import dataclass, field
+from typing import Any, Dict, Union
 
-DATABASE_URL= 'sqllite://warehouse.db'
+from sqlalchemy import (
+    AsyncAdaptedQueuePool,
+    Connection,
+    Engine,
+    create_engine,
+    event,
+    make_url,
+)
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
 
+from .instrumentation import CountingConnection, instrument_engine
+from .orm import Base
+from .search import create_search_indexes
+
+DATABASE_URL = "sqlite:///warehouse.db"
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///warehouse.db"
+
+MiB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    pragmas: Dict[str, Union[int, str]]
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    engine_options: Dict[str, Any] = field(default_factory=dict)
+
+
+# Negative cache_size is in KiB. WAL lets readers run alongside the single
+# writer; synchronous=NORMAL is durable in WAL mode except on power loss.
+PROFILES: Dict[str, EngineProfile] = {
+    "oltp": EngineProfile(
+        pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -64 * 1024,
+            "mmap_size": 256 * MiB,
+            "temp_store": "MEMORY",
+            "busy_timeout": 5000,
+        },
+        pool_size=5,
+        max_overflow=10,
+    ),
+    # One connection doing large transactions; durability is traded for
+    # throughput, so a crash mid-load means reloading the batch.
+    "bulk-load": EngineProfile(
+        pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "OFF",
+            "cache_size": -256 * 1024,
+            "mmap_size": 1024 * MiB,
+            "temp_store": "MEMORY",
+            "busy_timeout": 30000,
+        },
+        pool_size=1,
+        max_overflow=0,
+    ),
+    # journal_mode is left alone: switching it needs a write lock.
+    "read-only": EngineProfile(
+        pragmas={
+            "query_only": "ON",
+            "cache_size": -128 * 1024,
+            "mmap_size": 1024 * MiB,
+            "temp_store": "MEMORY",
+            "busy_timeout": 5000,
+        },
+        pool_size=10,
+        max_overflow=20,
+    ),
+}
+
+
+def _is_memory_database(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def _profile(name: str) -> EngineProfile:
+    if name not in PROFILES:
+        raise ValueError(
+            f"unknown engine profile {name!r}, expected one of {sorted(PROFILES)}"
+        )
+    return PROFILES[name]
+
+
+def _pool_options(url: str, settings: EngineProfile) -> Dict[str, Any]:
+    # In-memory databases live and die with a single connection, so they keep
+    # SQLAlchemy's default single-connection pool.
+    if _is_memory_database(url):
+        return {}
+    return {
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_recycle": settings.pool_recycle,
+    }
+
+
+def _install_pragmas(engine: Engine, url: str, settings: EngineProfile) -> None:
+    memory = _is_memory_database(url)
+    pragmas = {
+        name: value
+        for name, value in settings.pragmas.items()
+        if not (memory and name in ("journal_mode", "mmap_size"))
+    }
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _install_transaction_control(engine: Engine) -> None:
+    # pysqlite only opens a transaction in front of DML, so a SAVEPOINT sent
+    # first would open it instead and its RELEASE would commit everything.
+    # The driver's handling is switched off and BEGIN is sent on every
+    # SQLAlchemy begin, which lets Session.begin_nested() nest properly.
+    @event.listens_for(engine, "connect")
+    def disable_driver_transactions(
+        dbapi_connection: Any, connection_record: Any
+    ) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(conn: Any) -> None:
+        # Sent past the cursor events, like the driver's own implicit BEGIN.
+        conn.connection.dbapi_connection.execute("BEGIN")
+
+
+def build_engine(
+    url: str = DATABASE_URL, profile: str = "oltp", instrument: bool = True
+) -> Engine:
+    settings = _profile(profile)
+    options = {**settings.engine_options, **_pool_options(url, settings)}
+    if instrument:
+        options["connect_args"] = {
+            **options.get("connect_args", {}),
+            "factory": CountingConnection,
+        }
+    engine = create_engine(url, **options)
+    _install_pragmas(engine, url, settings)
+    _install_transaction_control(engine)
+    if instrument:
+        instrument_engine(engine)
+    return engine
+
+
+def build_read_engine(url: str = DATABASE_URL, instrument: bool = True) -> Engine:
+    # A second pool over the same file (or a replica copy of it) for reads.
+    # An in-memory database would be a different, empty one per engine.
+    if _is_memory_database(url):
+        raise ValueError("a read engine needs a database file, not :memory:")
+    return build_engine(url, profile="read-only", instrument=instrument)
+
+
+def build_session_factory(engine: Engine) -> "sessionmaker[Session]":
+    return sessionmaker(bind=engine)
+
+
+def build_async_engine(
+    url: str = ASYNC_DATABASE_URL, profile: str = "oltp"
+) -> AsyncEngine:
+    settings = _profile(profile)
+    options = _pool_options(url, settings)
+    if options:
+        # aiosqlite defaults to NullPool; a queue pool lets concurrent tasks
+        # reuse open connections instead of reconnecting per session.
+        options["poolclass"] = AsyncAdaptedQueuePool
+    engine = create_async_engine(url, **settings.engine_options, **options)
+    _install_pragmas(engine.sync_engine, url, settings)
+    _install_transaction_control(engine.sync_engine)
+    return engine
+
+
+def build_async_session_factory(
+    engine: AsyncEngine,
+) -> "async_sessionmaker[AsyncSession]":
+    # Attributes must not expire on commit: reloading them would need IO
+    # outside an awaited call.
+    return async_sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def _create_triggers(conn: Connection) -> None:
+    # The outbox and summary modules run on a unit of work and their CLIs
+    # open engines from this module, so they are imported here, on use.
+    from .outbox import create_outbox
+    from .summary import create_category_summary
+
+    create_search_indexes(conn)
+    create_outbox(conn)
+    create_category_summary(conn)
+
+
+def init_db(engine: Engine) -> None:
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        _create_triggers(conn)
+
+
+async def init_async_db(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_triggers)
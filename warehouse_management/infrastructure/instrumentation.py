@@ -0,0 +1,196 @@
+import functools
+import inspect
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Type, TypeVar
+
+from sqlalchemy import Engine, event
+
+T = TypeVar("T")
+
+UNATTRIBUTED = "unattributed"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OperationStats:
+    statements: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    slowest_statement: Optional[str] = None
+    slowest_time: float = 0.0
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.operations: Dict[str, OperationStats] = {}
+
+    def __getitem__(self, operation: str) -> OperationStats:
+        return self.operations[operation]
+
+    def _for(self, operation: str) -> OperationStats:
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        return stats
+
+    def record_statement(
+        self, operation: str, statement: str, elapsed: float
+    ) -> None:
+        stats = self._for(operation)
+        stats.statements += 1
+        stats.db_time += elapsed
+        if elapsed >= stats.slowest_time:
+            stats.slowest_time = elapsed
+            stats.slowest_statement = statement
+
+    def record_rows(self, operation: str, rows: int) -> None:
+        self._for(operation).rows += rows
+
+    @property
+    def statements(self) -> int:
+        return sum(s.statements for s in self.operations.values())
+
+    @property
+    def db_time(self) -> float:
+        return sum(s.db_time for s in self.operations.values())
+
+    @property
+    def rows(self) -> int:
+        return sum(s.rows for s in self.operations.values())
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [
+            {"operation": operation, **asdict(stats)}
+            for operation, stats in self.operations.items()
+        ]
+
+    def log(self, log: logging.Logger = logger, level: int = logging.INFO) -> None:
+        for record in self.records():
+            log.log(level, json.dumps(record), extra={"db_stats": record})
+
+
+_collector: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats_collector", default=None
+)
+_operation: ContextVar[str] = ContextVar("query_stats_operation", default=UNATTRIBUTED)
+
+
+def start_collecting(stats: QueryStats) -> "Token[Optional[QueryStats]]":
+    return _collector.set(stats)
+
+
+def stop_collecting(token: "Token[Optional[QueryStats]]") -> None:
+    _collector.reset(token)
+
+
+@contextmanager
+def collect(stats: QueryStats) -> Iterator[QueryStats]:
+    token = start_collecting(stats)
+    try:
+        yield stats
+    finally:
+        stop_collecting(token)
+
+
+@contextmanager
+def operation(name: str) -> Iterator[None]:
+    token = _operation.set(name)
+    try:
+        yield
+    finally:
+        _operation.reset(token)
+
+
+def _wrap(name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.isgeneratorfunction(method):
+
+        @functools.wraps(method)
+        def generator(*args: Any, **kwargs: Any) -> Iterator[Any]:
+            # Rows of a generator are fetched while the caller iterates, so
+            # the operation is re-entered around every step.
+            iterator = method(*args, **kwargs)
+            while True:
+                with operation(name):
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                yield item
+
+        return generator
+
+    @functools.wraps(method)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with operation(name):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def instrumented(cls: Type[T]) -> Type[T]:
+    # Attributes every statement run by a public method of ``cls`` to
+    # "<ClassName>.<method>".
+    for attribute, method in list(vars(cls).items()):
+        if attribute.startswith("_") or not inspect.isfunction(method):
+            continue
+        setattr(cls, attribute, _wrap(f"{cls.__name__}.{attribute}", method))
+    return cls
+
+
+class _CountingCursor(sqlite3.Cursor):
+    def _count(self, rows: int) -> None:
+        stats = _collector.get()
+        if stats is not None:
+            stats.record_rows(_operation.get(), rows)
+
+    def fetchone(self) -> Any:
+        row = super().fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args: Any, **kwargs: Any) -> List[Any]:
+        rows = super().fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        rows = super().fetchall()
+        self._count(len(rows))
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    # Passed to sqlite3.connect() as ``factory`` so every cursor counts the
+    # rows it hands back to SQLAlchemy.
+    def cursor(self, factory: Any = _CountingCursor) -> Any:  # type: ignore
+        return super().cursor(factory)
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, many: bool
+) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"]
+    stats = _collector.get()
+    if stats is None:
+        return
+    stats.record_statement(_operation.get(), statement, elapsed)
+
+
+def instrument_engine(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
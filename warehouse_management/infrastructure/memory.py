@@ -0,0 +1,815 @@
+import bisect
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, fields as dataclass_fields, replace
+from functools import partial
+from itertools import chain, count, islice
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from warehouse_management.domain.exceptions import (
+    ConcurrencyConflict,
+    EntitiesNotFound,
+    InsufficientStock,
+    ProjectedEntity,
+)
+from warehouse_management.domain.models import (
+    Category,
+    CategoryStock,
+    CategorySummary,
+    Customer,
+    LazyList,
+    LowStockItem,
+    Order,
+    OrderLine,
+    Product,
+    ProductOrderCount,
+    Role,
+    Staff,
+)
+from warehouse_management.domain.repositories import (
+    CategoryRepository,
+    CustomerRepository,
+    OrderRepository,
+    ProductRepository,
+    RoleRepository,
+    StaffRepository,
+)
+from warehouse_management.domain.unit_of_work import UnitOfWork
+
+from .search import SEARCH_PAGE_SIZE, search_terms
+
+T = TypeVar("T")
+
+# Same names as the SQL tables.
+PRODUCTS = "products"
+ORDERS = "orders"
+CATEGORIES = "category"
+CUSTOMERS = "customer"
+ROLES = "role"
+STAFF = "staff"
+TABLES = (PRODUCTS, ORDERS, CATEGORIES, CUSTOMERS, ROLES, STAFF)
+
+# Tables whose rows carry a version, with the entity name for errors.
+VERSIONED = {PRODUCTS: "Product", CUSTOMERS: "Customer", STAFF: "Staff"}
+
+# Attributes with a secondary index, per table.
+INDEXED: Dict[str, Tuple[str, ...]] = {
+    PRODUCTS: ("category", "name"),
+    CUSTOMERS: ("staff_id",),
+    STAFF: ("role_id",),
+}
+
+
+@dataclass(slots=True)
+class _Row:
+    # The entity's own fields; its collections are always left empty.
+    entity: Any
+    # Linked ids in id order: the products of an order or category, the
+    # customers of a staff member, the staff of a role. Order lines keep
+    # their quantity here, every other link maps to 1.
+    links: Dict[int, int]
+
+
+def _row_id(row: _Row) -> int:
+    return row.entity.id
+
+
+class InMemoryStore:
+    # Committed state shared by every InMemorySession. Stored rows are never
+    # changed in place; a commit swaps in new ones under the lock, so a
+    # reader holding a row always sees a committed version of it.
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.tables: Dict[str, Dict[int, _Row]] = {table: {} for table in TABLES}
+        # (table, attribute) -> value -> ids with that value.
+        self.indexes: Dict[Tuple[str, str], Dict[Any, Dict[int, None]]] = {
+            (table, attribute): defaultdict(dict)
+            for table, attributes in INDEXED.items()
+            for attribute in attributes
+        }
+        # Orders per product id, kept for top_ordered.
+        self.order_counts: Counter = Counter()
+        self._ids = {table: count(1) for table in TABLES}
+        # The change number of each row's latest committed write, per
+        # versioned table. Moved keys go to the end, so every dict stays in
+        # change order; the numbers are shared across the tables, as
+        # change_seq is in SQL.
+        self.changes: Dict[str, Dict[int, int]] = {table: {} for table in VERSIONED}
+        # (change number, id) per write in change order, which a sync
+        # bisects to its watermark. A row written again leaves its older
+        # entry behind; once those are half the log it is rebuilt from
+        # ``changes``, so a sync reads at most about twice its delta.
+        self.change_log: Dict[str, List[Tuple[int, int]]] = {
+            table: [] for table in VERSIONED
+        }
+        self._change_numbers = count(1)
+
+    def next_id(self, table: str) -> int:
+        with self.lock:
+            return next(self._ids[table])
+
+    def insert(self, table: str, row: _Row) -> None:
+        # Callers hold the lock.
+        self.tables[table][row.entity.id] = row
+        self.touch(table, row.entity.id)
+        for attribute in INDEXED.get(table, ()):
+            value = getattr(row.entity, attribute)
+            self.indexes[(table, attribute)][value][row.entity.id] = None
+        if table == ORDERS:
+            self.order_counts.update(row.links.keys())
+
+    def touch(self, table: str, entity_id: int) -> None:
+        # Callers hold the lock.
+        if table in self.changes:
+            number = next(self._change_numbers)
+            latest = self.changes[table]
+            latest.pop(entity_id, None)
+            latest[entity_id] = number
+            log = self.change_log[table]
+            log.append((number, entity_id))
+            if len(log) > 2 * len(latest):
+                log[:] = [(n, i) for i, n in latest.items()]
+
+    def replace(self, table: str, row: _Row) -> None:
+        # Callers hold the lock.
+        old = self.tables[table][row.entity.id]
+        for attribute in INDEXED.get(table, ()):
+            ids = self.indexes[(table, attribute)][getattr(old.entity, attribute)]
+            ids.pop(row.entity.id, None)
+        self.insert(table, row)
+
+
+class InMemorySession:
+    # Writes stay private to the session until commit, like a transaction:
+    # new rows, updated rows and reserved stock are kept aside and merged
+    # into every read.
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+        self.new: Dict[str, Dict[int, _Row]] = {table: {} for table in TABLES}
+        # Updated committed rows, with the version they were committed at
+        # when this session first updated them.
+        self.updated: Dict[str, Dict[int, Tuple[int, _Row]]] = {
+            table: {} for table in TABLES
+        }
+        # Units taken from each product by this session, and how many
+        # reservations took them: each one moves the version, as in SQL.
+        self.reserved: Dict[int, int] = defaultdict(int)
+        self.reservations: Counter = Counter()
+
+    def insert(
+        self, table: str, entity: Any, links: Iterable[Tuple[int, int]] = ()
+    ) -> None:
+        self.new[table][entity.id] = _Row(entity, dict(links))
+
+    def update(self, table: str, entity: Any) -> None:
+        # ``entity`` carries the version it was read at, as seen by this
+        # session; the store's version is checked again on commit.
+        if entity.version is None:
+            raise ProjectedEntity(VERSIONED[table], entity.id)
+        current = self.row(table, entity.id)
+        if current is None:
+            raise EntitiesNotFound(VERSIONED[table], [entity.id])
+        version = current.entity.version + self.reservations.get(entity.id, 0)
+        if entity.version != version:
+            raise ConcurrencyConflict(
+                VERSIONED[table], entity.id, entity.version, version
+            )
+        row = _Row(replace(entity, version=version + 1), current.links)
+        if entity.id in self.new[table]:
+            self.new[table][entity.id] = row
+        else:
+            base, _ = self.updated[table].get(entity.id, (version, current))
+            self.updated[table][entity.id] = (base, row)
+        # The written quantity already accounts for earlier reservations.
+        self.reserved.pop(entity.id, None)
+        self.reservations.pop(entity.id, None)
+
+    def row(self, table: str, entity_id: int) -> Optional[_Row]:
+        row = self.new[table].get(entity_id)
+        if row is None and entity_id in self.updated[table]:
+            row = self.updated[table][entity_id][1]
+        if row is None:
+            row = self.store.tables[table].get(entity_id)
+        return row
+
+    def rows(self, table: str) -> List[_Row]:
+        with self.store.lock:
+            rows = list(self.store.tables[table].values())
+        updated = self.updated[table]
+        if updated:
+            rows = [updated.get(r.entity.id, (0, r))[1] for r in rows]
+        rows.extend(self.new[table].values())
+        rows.sort(key=_row_id)
+        return rows
+
+    def lookup(self, table: str, attribute: str, value: Any) -> List[_Row]:
+        updated = self.updated[table]
+        with self.store.lock:
+            committed = self.store.tables[table]
+            ids = self.store.indexes[(table, attribute)].get(value, {})
+            rows = [committed[i] for i in ids if i not in updated]
+        rows.extend(
+            row
+            for row in chain(
+                self.new[table].values(), (row for _, row in updated.values())
+            )
+            if getattr(row.entity, attribute) == value
+        )
+        rows.sort(key=_row_id)
+        return rows
+
+    def order_counts(self) -> Counter:
+        with self.store.lock:
+            counts = Counter(self.store.order_counts)
+        for row in self.new[ORDERS].values():
+            counts.update(row.links.keys())
+        return counts
+
+    def quantity(self, row: _Row) -> int:
+        return row.entity.quantity - self.reserved.get(row.entity.id, 0)
+
+    def product(self, row: _Row) -> Product:
+        return replace(
+            row.entity,
+            quantity=self.quantity(row),
+            version=row.entity.version + self.reservations.get(row.entity.id, 0),
+        )
+
+    def commit(self) -> None:
+        store = self.store
+        with store.lock:
+            # Updates are only valid on top of the version they were made
+            # against, and reservations were checked against the stock this
+            # session saw; another session may have committed since then.
+            for table, updated in self.updated.items():
+                for entity_id, (base, _) in updated.items():
+                    actual = store.tables[table][entity_id].entity.version
+                    if actual != base:
+                        self.rollback()
+                        raise ConcurrencyConflict(
+                            VERSIONED[table], entity_id, base, actual
+                        )
+            products = store.tables[PRODUCTS]
+            stock = {
+                i: self.row(PRODUCTS, i).entity.quantity  # type: ignore
+                for i in self.reserved
+            }
+            short = sorted(i for i, taken in self.reserved.items() if stock[i] < taken)
+            if short:
+                self.rollback()
+                raise InsufficientStock(short)
+            for table, rows in self.new.items():
+                for row in rows.values():
+                    store.insert(table, row)
+            for table, updated in self.updated.items():
+                for _, row in updated.values():
+                    store.replace(table, row)
+            for product_id, taken in self.reserved.items():
+                row = products[product_id]
+                entity = replace(
+                    row.entity,
+                    quantity=stock[product_id] - taken,
+                    version=row.entity.version + self.reservations[product_id],
+                )
+                products[product_id] = _Row(entity, row.links)
+                store.touch(PRODUCTS, product_id)
+        self.rollback()
+
+    def rollback(self) -> None:
+        self.new = {table: {} for table in TABLES}
+        self.updated = {table: {} for table in TABLES}
+        self.reserved = defaultdict(int)
+        self.reservations = Counter()
+
+
+def _get(session: InMemorySession, table: str, entity: str, entity_id: int) -> _Row:
+    row = session.row(table, entity_id)
+    if row is None:
+        raise EntitiesNotFound(entity, [entity_id])
+    return row
+
+
+def _existing_ids(
+    session: InMemorySession, table: str, entity: str, ids: Iterable[int]
+) -> List[int]:
+    unique_ids = list(dict.fromkeys(ids))
+    missing = [i for i in unique_ids if session.row(table, i) is None]
+    if missing:
+        raise EntitiesNotFound(entity, missing)
+    return sorted(unique_ids)
+
+
+def _iter_rows(session: InMemorySession, table: str, after_id: int) -> Iterator[_Row]:
+    # Everything is in memory already, so there is nothing for a batch
+    # size to bound; the generator only keeps the keyset contract.
+    rows = session.rows(table)
+    yield from rows[bisect.bisect_right(rows, after_id, key=_row_id):]
+
+
+def _changed_since(
+    session: InMemorySession, table: str, watermark: int, limit: int
+) -> Tuple[List[_Row], int]:
+    # Committed writes only: a session's own get their number on commit.
+    with session.store.lock:
+        latest = session.store.changes[table]
+        log = session.store.change_log[table]
+        start = bisect.bisect_right(log, (watermark, math.inf))
+        # Indexed from ``start``: islice would walk the entries before it.
+        entries = (log[k] for k in range(start, len(log)))
+        changed = list(islice(((i, n) for n, i in entries if latest[i] == n), limit))
+    if changed:
+        watermark = changed[-1][1]
+    return [session.row(table, i) for i, _ in changed], watermark  # type: ignore
+
+
+def _search(
+    rows: List[_Row], text: Callable[[Any], str], query: str, limit: int, offset: int
+) -> List[_Row]:
+    # Stands in for FTS5: every term must prefix a word, and shorter texts
+    # rank first, as they do under bm25 for the same matches.
+    terms = search_terms(query)
+    if not terms:
+        return []
+    hits = []
+    for row in rows:
+        words = search_terms(text(row.entity))
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            hits.append((len(words), row.entity.id, row))
+    hits.sort(key=lambda hit: hit[:2])
+    return [row for _, _, row in hits[offset : offset + limit]]
+
+
+def _customer_text(customer: Customer) -> str:
+    return " ".join(
+        (customer.first_name, customer.last_name, customer.email, customer.phone)
+    )
+
+
+# Kept by every projection, along with the id.
+_COLLECTIONS = ("products", "lines", "customers", "staffs")
+
+
+def _project(entity: T, fields: Optional[Collection[str]]) -> T:
+    # Fields left out of the projection are None, as the SQL backend reads
+    # them, and so is the version, which keeps the entity out of update().
+    if fields is None:
+        return entity
+    kept = {"id", *_COLLECTIONS, *fields} - {"version"}
+    return replace(  # type: ignore
+        entity,
+        **{f.name: None for f in dataclass_fields(entity) if f.name not in kept},
+    )
+
+
+def _lazy(load: Callable[[], List[T]], depth: Optional[int]) -> MutableSequence[T]:
+    return load() if depth is None or depth > 0 else LazyList(load)
+
+
+def _nested(depth: Optional[int]) -> Optional[int]:
+    return None if depth is None else max(depth - 1, 0)
+
+
+def _products(
+    session: InMemorySession, row: _Row, fields: Optional[Collection[str]] = None
+) -> List[Product]:
+    return [
+        _project(session.product(_get(session, PRODUCTS, "Product", i)), fields)
+        for i in row.links
+    ]
+
+
+def _customer(row: _Row) -> Customer:
+    return replace(row.entity)
+
+
+def _staff(
+    session: InMemorySession,
+    row: _Row,
+    fields: Optional[Collection[str]] = None,
+    depth: Optional[int] = None,
+) -> Staff:
+    def customers() -> List[Customer]:
+        return [
+            _project(_customer(_get(session, CUSTOMERS, "Customer", i)), fields)
+            for i in row.links
+        ]
+
+    return _project(replace(row.entity, customers=_lazy(customers, depth)), fields)
+
+
+class InMemoryProductRepository(ProductRepository):
+    def __init__(self, session: InMemorySession):
+        self.session = session
+
+    def add(self, product: Product) -> None:
+        self._insert(product)
+
+    def add_many(self, products: Iterable[Product]) -> List[int]:
+        ids: List[int] = []
+        for product in products:
+            product.id, product.version = self._insert(product), 1
+            ids.append(product.id)
+        return ids
+
+    def _insert(self, product: Product) -> int:
+        product_id = self.session.store.next_id(PRODUCTS)
+        self.session.insert(PRODUCTS, replace(product, id=product_id, version=1))
+        return product_id
+
+    def update(self, product: Product) -> None:
+        self.session.update(PRODUCTS, replace(product))
+        product.version += 1
+
+    def get(self, product_id: int) -> Product:
+        return self.session.product(_get(self.session, PRODUCTS, "Product", product_id))
+
+    def list(self) -> List[Product]:
+        return [self.session.product(row) for row in self.session.rows(PRODUCTS)]
+
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Product]:
+        for row in _iter_rows(self.session, PRODUCTS, after_id):
+            yield self.session.product(row)
+
+    def list_changed_since(
+        self, watermark: int, limit: int = 1000
+    ) -> Tuple[List[Product], int]:
+        rows, watermark = _changed_since(self.session, PRODUCTS, watermark, limit)
+        return [self.session.product(row) for row in rows], watermark
+
+    def list_by_category(self, category: int) -> List[Product]:
+        rows = self.session.lookup(PRODUCTS, "category", category)
+        return [self.session.product(row) for row in rows]
+
+    def find_by_name(self, name: str) -> List[Product]:
+        rows = self.session.lookup(PRODUCTS, "name", name)
+        return [self.session.product(row) for row in rows]
+
+    def search(
+        self, query: str, limit: int = SEARCH_PAGE_SIZE, offset: int = 0
+    ) -> List[Product]:
+        rows = self.session.rows(PRODUCTS)
+        hits = _search(rows, lambda product: product.name, query, limit, offset)
+        return [self.session.product(row) for row in hits]
+
+    def reserve(self, lines: Iterable[OrderLine]) -> None:
+        # All lines are checked before any is taken, so a short line
+        # reserves nothing.
+        wanted: Dict[int, int] = defaultdict(int)
+        for line in lines:
+            wanted[line.product_id] += line.quantity
+        rows = {i: self.session.row(PRODUCTS, i) for i in wanted}
+        missing = sorted(i for i, row in rows.items() if row is None)
+        if missing:
+            raise EntitiesNotFound("Product", missing)
+        available = {i: self.session.quantity(row) for i, row in rows.items() if row}
+        short = sorted(i for i, n in wanted.items() if available[i] < n)
+        if short:
+            raise InsufficientStock(short)
+        for product_id, n in wanted.items():
+            self.session.reserved[product_id] += n
+            self.session.reservations[product_id] += 1
+
+    def stock_value(self) -> float:
+        return float(
+            sum(
+                self.session.quantity(row) * row.entity.price
+                for row in self.session.rows(PRODUCTS)
+            )
+        )
+
+    def stock_by_category(self) -> List[CategoryStock]:
+        quantities: Dict[int, int] = defaultdict(int)
+        values: Dict[int, float] = defaultdict(float)
+        for row in self.session.rows(PRODUCTS):
+            quantity = self.session.quantity(row)
+            quantities[row.entity.category] += quantity
+            values[row.entity.category] += quantity * row.entity.price
+        return [
+            CategoryStock(category, quantities[category], values[category])
+            for category in sorted(quantities)
+        ]
+
+    def category_summary(self) -> List[CategorySummary]:
+        skus: Dict[int, int] = defaultdict(int)
+        for row in self.session.rows(PRODUCTS):
+            skus[row.entity.category] += 1
+        return [
+            CategorySummary(
+                stock.category, skus[stock.category], stock.quantity, stock.value
+            )
+            for stock in self.stock_by_category()
+        ]
+
+    def low_stock(self, threshold: int) -> List[LowStockItem]:
+        items = [
+            LowStockItem(row.entity.id, row.entity.name, self.session.quantity(row))
+            for row in self.session.rows(PRODUCTS)
+            if self.session.quantity(row) < threshold
+        ]
+        items.sort(key=lambda item: (item.quantity, item.id))
+        return items
+
+    def top_ordered(self, limit: int = 10) -> List[ProductOrderCount]:
+        top = heapq.nsmallest(
+            limit,
+            self.session.order_counts().items(),
+            key=lambda item: (-item[1], item[0]),
+        )
+        rows = {i: _get(self.session, PRODUCTS, "Product", i) for i, _ in top}
+        return [ProductOrderCount(i, rows[i].entity.name, n) for i, n in top]
+
+
+class InMemoryOrderRepository(OrderRepository):
+    def __init__(self, session: InMemorySession):
+        self.session = session
+
+    def add(self, order: Order) -> None:
+        quantities = {line.product_id: line.quantity for line in order.lines}
+        product_ids = _existing_ids(
+            self.session, PRODUCTS, "Product", (p.id for p in order.products)
+        )
+        self.session.insert(
+            ORDERS,
+            Order(id=self.session.store.next_id(ORDERS)),
+            ((i, quantities.get(i, 1)) for i in product_ids),
+        )
+
+    def get(
+        self,
+        order_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Order:
+        row = _get(self.session, ORDERS, "Order", order_id)
+        return self._order(row, fields, depth)
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> List[Order]:
+        return [self._order(row, fields, depth) for row in self.session.rows(ORDERS)]
+
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Order]:
+        for row in _iter_rows(self.session, ORDERS, after_id):
+            yield self._order(row)
+
+    def _order(
+        self,
+        row: _Row,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Order:
+        return Order(
+            id=row.entity.id,
+            products=_lazy(partial(_products, self.session, row, fields), depth),
+            lines=[OrderLine(i, n) for i, n in row.links.items()],
+        )
+
+
+class InMemoryCategoryRepository(CategoryRepository):
+    def __init__(self, session: InMemorySession):
+        self.session = session
+
+    def add(self, category: Category) -> None:
+        product_ids = _existing_ids(
+            self.session, PRODUCTS, "Product", (p.id for p in category.products)
+        )
+        self.session.insert(
+            CATEGORIES,
+            Category(
+                name=category.name,
+                description=category.description,
+                id=self.session.store.next_id(CATEGORIES),
+            ),
+            ((i, 1) for i in product_ids),
+        )
+
+    def get(
+        self,
+        category_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Category:
+        row = _get(self.session, CATEGORIES, "Category", category_id)
+        return self._category(row, fields, depth)
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> List[Category]:
+        rows = self.session.rows(CATEGORIES)
+        return [self._category(row, fields, depth) for row in rows]
+
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Category]:
+        for row in _iter_rows(self.session, CATEGORIES, after_id):
+            yield self._category(row)
+
+    def _category(
+        self,
+        row: _Row,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Category:
+        products = _lazy(partial(_products, self.session, row, fields), depth)
+        return _project(replace(row.entity, products=products), fields)
+
+
+class InMemoryCustomerRepository(CustomerRepository):
+    def __init__(self, session: InMemorySession):
+        self.session = session
+
+    def add(self, customer: Customer) -> None:
+        self._insert(customer)
+
+    def add_many(self, customers: Iterable[Customer]) -> List[int]:
+        ids: List[int] = []
+        for customer in customers:
+            customer.id, customer.version = self._insert(customer), 1
+            ids.append(customer.id)
+        return ids
+
+    def _insert(self, customer: Customer) -> int:
+        customer_id = self.session.store.next_id(CUSTOMERS)
+        self.session.insert(CUSTOMERS, replace(customer, id=customer_id, version=1))
+        return customer_id
+
+    def update(self, customer: Customer) -> None:
+        self.session.update(CUSTOMERS, replace(customer))
+        customer.version += 1
+
+    def get(self, customer_id: int) -> Customer:
+        return _customer(_get(self.session, CUSTOMERS, "Customer", customer_id))
+
+    def list(self) -> List[Customer]:
+        return [_customer(row) for row in self.session.rows(CUSTOMERS)]
+
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Customer]:
+        for row in _iter_rows(self.session, CUSTOMERS, after_id):
+            yield _customer(row)
+
+    def list_changed_since(
+        self, watermark: int, limit: int = 1000
+    ) -> Tuple[List[Customer], int]:
+        rows, watermark = _changed_since(self.session, CUSTOMERS, watermark, limit)
+        return [_customer(row) for row in rows], watermark
+
+    def list_by_staff(self, staff_id: int) -> List[Customer]:
+        rows = self.session.lookup(CUSTOMERS, "staff_id", staff_id)
+        return [_customer(row) for row in rows]
+
+    def search(
+        self, query: str, limit: int = SEARCH_PAGE_SIZE, offset: int = 0
+    ) -> List[Customer]:
+        rows = self.session.rows(CUSTOMERS)
+        hits = _search(rows, _customer_text, query, limit, offset)
+        return [_customer(row) for row in hits]
+
+
+class InMemoryRoleRepository(RoleRepository):
+    def __init__(self, session: InMemorySession):
+        self.session = session
+
+    def add(self, role: Role) -> None:
+        staff_ids = _existing_ids(
+            self.session, STAFF, "Staff", (s.id for s in role.staffs)
+        )
+        self.session.insert(
+            ROLES,
+            Role(
+                name=role.name,
+                description=role.description,
+                id=self.session.store.next_id(ROLES),
+            ),
+            ((i, 1) for i in staff_ids),
+        )
+
+    def get(
+        self,
+        role_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Role:
+        return self._role(_get(self.session, ROLES, "Role", role_id), fields, depth)
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> List[Role]:
+        return [self._role(row, fields, depth) for row in self.session.rows(ROLES)]
+
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Role]:
+        for row in _iter_rows(self.session, ROLES, after_id):
+            yield self._role(row)
+
+    def _role(
+        self,
+        row: _Row,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Role:
+        def staffs() -> List[Staff]:
+            return [
+                _staff(
+                    self.session,
+                    _get(self.session, STAFF, "Staff", i),
+                    fields,
+                    _nested(depth),
+                )
+                for i in row.links
+            ]
+
+        return _project(replace(row.entity, staffs=_lazy(staffs, depth)), fields)
+
+
+class InMemoryStaffRepository(StaffRepository):
+    def __init__(self, session: InMemorySession):
+        self.session = session
+
+    def add(self, staff: Staff) -> None:
+        customer_ids = _existing_ids(
+            self.session, CUSTOMERS, "Customer", (c.id for c in staff.customers)
+        )
+        self.session.insert(
+            STAFF,
+            replace(
+                staff, id=self.session.store.next_id(STAFF), version=1, customers=[]
+            ),
+            ((i, 1) for i in customer_ids),
+        )
+
+    def update(self, staff: Staff) -> None:
+        # The staff member's own fields; customers are linked through add.
+        self.session.update(STAFF, replace(staff, customers=[]))
+        staff.version += 1
+
+    def get(
+        self,
+        staff_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Staff:
+        row = _get(self.session, STAFF, "Staff", staff_id)
+        return _staff(self.session, row, fields, depth)
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> List[Staff]:
+        rows = self.session.rows(STAFF)
+        return [_staff(self.session, row, fields, depth) for row in rows]
+
+    def iter(self, batch_size: int = 1000, after_id: int = 0) -> Iterator[Staff]:
+        for row in _iter_rows(self.session, STAFF, after_id):
+            yield _staff(self.session, row)
+
+    def list_changed_since(
+        self, watermark: int, limit: int = 1000
+    ) -> Tuple[List[Staff], int]:
+        rows, watermark = _changed_since(self.session, STAFF, watermark, limit)
+        return [_staff(self.session, row) for row in rows], watermark
+
+    def list_by_role(self, role_id: int) -> List[Staff]:
+        rows = self.session.lookup(STAFF, "role_id", role_id)
+        return [_staff(self.session, row) for row in rows]
+
+
+class InMemoryUnitOfWork(UnitOfWork):
+    def __init__(self, session: InMemorySession):
+        self.session = session
+        self.products = InMemoryProductRepository(session)
+        self.orders = InMemoryOrderRepository(session)
+        self.categories = InMemoryCategoryRepository(session)
+        self.customers = InMemoryCustomerRepository(session)
+        self.roles = InMemoryRoleRepository(session)
+        self.staffs = InMemoryStaffRepository(session)
+
+    def __enter__(self) -> "InMemoryUnitOfWork":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        # Like closing a Session: whatever was not committed is dropped.
+        self.session.rollback()
+
+    def commit(self) -> None:
+        self.session.commit()
+
+    def rollback(self) -> None:
+        self.session.rollback()
@@ -0,0 +1,126 @@
+import sys
+from typing import List
+
+from sqlalchemy import Connection, Engine, Table, inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from .database import DATABASE_URL, build_engine
+from .orm import (
+    Base,
+    order_product_assocoations,
+    product_category_assocoations,
+    role_staff_assocoations,
+    staff_customer_assocoations,
+)
+from .outbox import create_outbox
+from .search import create_search_indexes
+from .summary import create_category_summary
+
+ASSOCIATION_TABLES = (
+    order_product_assocoations,
+    product_category_assocoations,
+    role_staff_assocoations,
+    staff_customer_assocoations,
+)
+
+
+def _has_composite_key(conn: Connection, table: Table) -> bool:
+    primary_key = inspect(conn).get_pk_constraint(table.name)
+    return len(primary_key["constrained_columns"]) == len(table.primary_key.columns)
+
+
+def _deduplicate_links(conn: Connection, table: Table) -> str:
+    first, second = (c.name for c in table.primary_key.columns)
+    conn.execute(
+        text(
+            f"DELETE FROM {table.name} WHERE rowid NOT IN "
+            f"(SELECT MIN(rowid) FROM {table.name} GROUP BY {first}, {second})"
+        )
+    )
+    name = f"ux_{table.name}_{first}_{second}"
+    conn.execute(
+        text(f"CREATE UNIQUE INDEX {name} ON {table.name} ({first}, {second})")
+    )
+    return name
+
+
+# Adds columns declared in orm.py that an existing table lacks. New columns
+# must be nullable or carry a server default, as SQLite requires for ADD COLUMN.
+def apply_columns(engine: Engine) -> List[str]:
+    added: List[str] = []
+    with engine.begin() as conn:
+        existing = set(inspect(conn).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            columns = inspect(conn).get_columns(table.name)
+            present = {column["name"] for column in columns}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                definition = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def apply_search_indexes(engine: Engine) -> List[str]:
+    with engine.begin() as conn:
+        return create_search_indexes(conn)
+
+
+def apply_outbox(engine: Engine) -> List[str]:
+    with engine.begin() as conn:
+        return create_outbox(conn)
+
+
+def apply_category_summary(engine: Engine) -> List[str]:
+    with engine.begin() as conn:
+        return create_category_summary(conn)
+
+
+# Brings an existing database up to the indexes declared in orm.py in place.
+# SQLite cannot add a primary key to a populated table, so association tables
+# created before the composite keys existed get an equivalent unique index
+# instead, after duplicate links are dropped.
+def apply_indexes(engine: Engine) -> List[str]:
+    created: List[str] = []
+    with engine.begin() as conn:
+        existing = set(inspect(conn).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            present = {index["name"] for index in inspect(conn).get_indexes(table.name)}
+            if table in ASSOCIATION_TABLES and not _has_composite_key(conn, table):
+                first, second = (c.name for c in table.primary_key.columns)
+                if f"ux_{table.name}_{first}_{second}" not in present:
+                    created.append(_deduplicate_links(conn, table))
+            # Indexes over columns apply_columns has not added yet wait for it.
+            columns = {c["name"] for c in inspect(conn).get_columns(table.name)}
+            for index in table.indexes:
+                ready = all(column.name in columns for column in index.columns)
+                if index.name not in present and ready:
+                    index.create(conn)
+                    created.append(str(index.name))
+    return created
+
+
+# Everything above, for a process starting on a database file of any age:
+# missing tables are created whole, existing ones are brought up to date.
+def migrate(engine: Engine) -> List[str]:
+    Base.metadata.create_all(engine)
+    applied = apply_columns(engine)
+    applied += apply_indexes(engine) + apply_search_indexes(engine)
+    applied += apply_outbox(engine) + apply_category_summary(engine)
+    return applied
+
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 else DATABASE_URL
+    engine = build_engine(url, profile="bulk-load")
+    for name in apply_columns(engine):
+        print(f"added {name}")
+    created = apply_indexes(engine) + apply_search_indexes(engine)
+    created += apply_outbox(engine) + apply_category_summary(engine)
+    for name in created:
+        print(f"created {name}")
@@ -1,4 +1,13 @@
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, Table
+from sqlalchemy import (
+    Column,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    text,
+)
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 
@@ -9,31 +18,60 @@ class Base(DeclarativeBase):
 class ProductORM(Base):
     __tablename__ = "products"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String)
-    quantity = Column(Integer)
+    name = Column(String, index=True)
+    quantity = Column(Integer, index=True)
     price = Column(Float)
-    category = Column(Integer)
+    category = Column(Integer, index=True)
+    # Bumped by every write; the mapper refuses to flush a stale instance.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # The outbox id of the row's latest insert or update, set by the outbox
+    # triggers: one counter across products, customers and staff that only
+    # grows, for delta syncs.
+    change_seq = Column(Integer, nullable=False, server_default="0", index=True)
+    __mapper_args__ = {"version_id_col": version}
 
 
 order_product_assocoations = Table(
     "order_product_assocoations",
     Base.metadata,
-    Column("order_id", ForeignKey("orders.id")),
-    Column("product_id", ForeignKey("products.id")),
+    Column("order_id", ForeignKey("orders.id"), primary_key=True),
+    Column("product_id", ForeignKey("products.id"), primary_key=True),
+    Column("quantity", Integer, nullable=False, server_default="1"),
+    Index(
+        "ix_order_product_assocoations_product_id_order_id", "product_id", "order_id"
+    ),
 )
 
 
+class OrderLineORM(Base):
+    __table__ = order_product_assocoations
+    product = relationship("ProductORM", lazy="joined")
+
+
 class OrderORM(Base):
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    products = relationship("ProductORM", secondary=order_product_assocoations)
+    lines = relationship(
+        OrderLineORM,
+        cascade="all, delete-orphan",
+        order_by=order_product_assocoations.c.product_id,
+    )
+    # Read-only shortcut over the same rows; lines are written through ``lines``.
+    products = relationship(
+        "ProductORM", secondary=order_product_assocoations, viewonly=True
+    )
 
 
 product_category_assocoations = Table(
     "product_category_assocoations",
     Base.metadata,
-    Column("product_id", ForeignKey("products.id")),
-    Column("category_id", ForeignKey("category.id")),
+    Column("product_id", ForeignKey("products.id"), primary_key=True),
+    Column("category_id", ForeignKey("category.id"), primary_key=True),
+    Index(
+        "ix_product_category_assocoations_category_id_product_id",
+        "category_id",
+        "product_id",
+    ),
 )
 
 
@@ -48,8 +86,11 @@ class CategoryORM(Base):
 role_staff_assocoations = Table(
     "role_staff_assocoations",
     Base.metadata,
-    Column("role_id", ForeignKey("role.id")),
-    Column("staff_id", ForeignKey("staff.id")),
+    Column("role_id", ForeignKey("role.id"), primary_key=True),
+    Column("staff_id", ForeignKey("staff.id"), primary_key=True),
+    Index(
+        "ix_role_staff_assocoations_staff_id_role_id", "staff_id", "role_id"
+    ),
 )
 
 
@@ -69,14 +110,20 @@ class CustomerORM(Base):
     address = Column(String)
     phone = Column(String)
     email = Column(String)
-    staff_id = Column(Integer, ForeignKey("staff.id"))
+    staff_id = Column(Integer, ForeignKey("staff.id"), index=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    change_seq = Column(Integer, nullable=False, server_default="0", index=True)
+    __mapper_args__ = {"version_id_col": version}
 
 
 staff_customer_assocoations = Table(
     "staff_customer_assocoations",
     Base.metadata,
-    Column("staff_id", ForeignKey("staff.id")),
-    Column("customer_id", ForeignKey("customer.id")),
+    Column("staff_id", ForeignKey("staff.id"), primary_key=True),
+    Column("customer_id", ForeignKey("customer.id"), primary_key=True),
+    Index(
+        "ix_staff_customer_assocoations_customer_id_staff_id", "customer_id", "staff_id"
+    ),
 )
 
 
@@ -89,5 +136,57 @@ class StaffORM(Base):
     phone = Column(String)
     email = Column(String)
     user_name = Column(String)
-    role_id = Column(Integer, ForeignKey("role.id"))
+    role_id = Column(Integer, ForeignKey("role.id"), index=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    change_seq = Column(Integer, nullable=False, server_default="0", index=True)
     customers = relationship("CustomerORM", secondary=staff_customer_assocoations)
+    __mapper_args__ = {"version_id_col": version}
+
+
+class ImportCheckpointORM(Base):
+    # How far a CSV import has got, written in the same transaction as the
+    # chunk it covers.
+    __tablename__ = "import_checkpoints"
+    job = Column(String, primary_key=True)
+    offset = Column(Integer, nullable=False)
+    line = Column(Integer, nullable=False)
+    imported = Column(Integer, nullable=False)
+    rejected = Column(Integer, nullable=False)
+
+
+class CategorySummaryORM(Base):
+    # Totals per product category, kept current by triggers on products
+    # (see summary.py).
+    __tablename__ = "category_summary"
+    category = Column(Integer, primary_key=True, autoincrement=False)
+    skus = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    value = Column(Float, nullable=False)
+
+
+class OutboxORM(Base):
+    # One row per insert, update or delete of an entity table, written by
+    # triggers (see outbox.py) in the writing transaction. The id is the
+    # offset consumers tail from; AUTOINCREMENT keeps ids of compacted rows
+    # from being handed out again.
+    __tablename__ = "outbox"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(String, nullable=False)
+    created_at = Column(
+        Float,
+        nullable=False,
+        server_default=text("((julianday('now') - 2440587.5) * 86400.0)"),
+    )
+    __table_args__ = (
+        Index("ix_outbox_entity_entity_id_id", "entity", "entity_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+class OutboxConsumerORM(Base):
+    # The last outbox id a consumer has processed.
+    __tablename__ = "outbox_consumers"
+    name = Column(String, primary_key=True)
+    offset = Column(Integer, nullable=False)
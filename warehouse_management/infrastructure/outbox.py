@@ -0,0 +1,301 @@
+import argparse
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import Connection, delete, exists, func, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from .database import DATABASE_URL, build_engine, build_session_factory
+from .orm import OutboxConsumerORM, OutboxORM
+from .unit_of_work import SqlAlchemyUnitOfWork
+
+DEFAULT_BATCH_SIZE = 500
+COMPACT_CHUNK_SIZE = 10_000
+
+# The tables repositories keep entities in, named as in the outbox rows.
+OUTBOX_SOURCES = ("products", "orders", "category", "customer", "role", "staff")
+
+_OUTBOX = OutboxORM.__table__
+_CONSUMERS = OutboxConsumerORM.__table__
+_EVENTS = (("insert", "ai", "new"), ("update", "au", "new"), ("delete", "ad", "old"))
+
+
+@dataclass(frozen=True)
+class Change:
+    # Only the key is recorded: consumers read the current row themselves,
+    # which is what lets compaction drop all but the latest change of a row.
+    offset: int
+    entity: str
+    entity_id: int
+    operation: str
+    created_at: float
+
+
+@dataclass
+class CompactionReport:
+    consumed: int = 0
+    superseded: int = 0
+
+
+def outbox_ddl(source: str, tracked: bool = False) -> List[str]:
+    # Triggers rather than repository code, so ORM flushes, Core bulk
+    # inserts and the reservation UPDATE are all recorded, in the statement's
+    # own transaction. SQLite has a single writer and the triggers run under
+    # its lock, so ids are committed in order: a consumer never moves past an
+    # id that is still to be committed.
+    record = (
+        "INSERT INTO outbox (entity, entity_id, operation) "
+        f"VALUES ('{source}', {{row}}.id, '{{event}}');"
+    )
+    # On a tracked table the row also takes the id as its change_seq. That
+    # write is itself an update, which the WHEN clause keeps out of the
+    # outbox; an update that sets change_seq on its own goes unrecorded too.
+    stamp = (
+        f" UPDATE {source} SET change_seq = last_insert_rowid() WHERE id = new.id;"
+        if tracked
+        else ""
+    )
+    guard = "WHEN old.change_seq IS new.change_seq " if tracked else ""
+    return [
+        f"CREATE TRIGGER outbox_{source}_ai AFTER INSERT ON {source} "
+        f"BEGIN {record.format(row='new', event='insert')}{stamp} END",
+        f"CREATE TRIGGER outbox_{source}_au AFTER UPDATE ON {source} {guard}"
+        f"BEGIN {record.format(row='new', event='update')}{stamp} END",
+        f"CREATE TRIGGER outbox_{source}_ad AFTER DELETE ON {source} "
+        f"BEGIN {record.format(row='old', event='delete')} END",
+    ]
+
+
+def _backfill(conn: Connection, source: str) -> None:
+    # Rows written before the table was tracked get an outbox insert each
+    # and its id as their change_seq, so a first sync from 0 sees them.
+    conn.exec_driver_sql(
+        "INSERT INTO outbox (entity, entity_id, operation) "
+        f"SELECT '{source}', id, 'insert' FROM {source} "
+        "WHERE change_seq = 0 ORDER BY id"
+    )
+    conn.exec_driver_sql(
+        f"UPDATE {source} SET change_seq = (SELECT max(outbox.id) FROM outbox "
+        f"WHERE outbox.entity = '{source}' AND outbox.entity_id = {source}.id) "
+        "WHERE change_seq = 0"
+    )
+
+
+def create_outbox(conn: Connection) -> List[str]:
+    # Triggers from before a table had change_seq are replaced.
+    if conn.dialect.name != "sqlite":
+        return []
+    created: List[str] = []
+    for table in (_OUTBOX, _CONSUMERS):
+        if not inspect(conn).has_table(table.name):
+            table.create(conn)
+            created.append(table.name)
+    triggers = dict(
+        conn.exec_driver_sql(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+        ).all()
+    )
+    existing = set(inspect(conn).get_table_names())
+    for source in OUTBOX_SOURCES:
+        if source not in existing:
+            continue
+        columns = {column["name"] for column in inspect(conn).get_columns(source)}
+        tracked = "change_seq" in columns
+        current = triggers.get(f"outbox_{source}_ai")
+        if current is not None and ("change_seq" in current) == tracked:
+            continue
+        for _, suffix, _ in _EVENTS:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS outbox_{source}_{suffix}")
+        for statement in outbox_ddl(source, tracked):
+            conn.exec_driver_sql(statement)
+        if tracked:
+            _backfill(conn, source)
+        created.append(f"outbox_{source}")
+    return created
+
+
+def head(session: Session) -> int:
+    return session.scalar(select(func.coalesce(func.max(_OUTBOX.c.id), 0)))
+
+
+def read_changes(session: Session, after: int, limit: int) -> List[Change]:
+    rows = session.execute(
+        select(
+            _OUTBOX.c.id,
+            _OUTBOX.c.entity,
+            _OUTBOX.c.entity_id,
+            _OUTBOX.c.operation,
+            _OUTBOX.c.created_at,
+        )
+        .where(_OUTBOX.c.id > after)
+        .order_by(_OUTBOX.c.id)
+        .limit(limit)
+    )
+    return [Change(*row) for row in rows]
+
+
+class OutboxConsumer:
+    # Tails the outbox from the offset stored under ``name``. Delivery is at
+    # least once: the offset moves only after the handler has returned, so a
+    # batch interrupted by a crash is handed out again. Reads and the offset
+    # write run in separate transactions, never holding a read snapshot
+    # while waiting for the write lock.
+    def __init__(
+        self,
+        uow: SqlAlchemyUnitOfWork,
+        name: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        from_end: bool = False,
+    ):
+        self.uow = uow
+        self.name = name
+        self.batch_size = batch_size
+        # A new consumer that loads a full copy first should start at the
+        # end and call offset() before the copy, which registers it there.
+        self.from_end = from_end
+
+    def offset(self) -> int:
+        with self.uow:
+            return self._offset(self.uow.session)
+
+    def _offset(self, session: Session) -> int:
+        # Registered on first use; from then on compaction keeps every change
+        # the consumer has not acknowledged.
+        stored = session.scalar(
+            select(_CONSUMERS.c.offset).where(_CONSUMERS.c.name == self.name)
+        )
+        if stored is None:
+            stored = head(session) if self.from_end else 0
+            session.execute(insert(_CONSUMERS).values(name=self.name, offset=stored))
+            self.uow.commit()
+        return stored
+
+    def poll(self) -> List[Change]:
+        with self.uow:
+            session = self.uow.session
+            return read_changes(session, self._offset(session), self.batch_size)
+
+    def acknowledge(self, offset: int) -> None:
+        # Offsets only move forward, so a late acknowledgement of an older
+        # batch cannot rewind the consumer.
+        with self.uow:
+            self.uow.session.execute(
+                update(_CONSUMERS)
+                .where(_CONSUMERS.c.name == self.name, _CONSUMERS.c.offset < offset)
+                .values(offset=offset)
+            )
+            self.uow.commit()
+
+    def run(
+        self,
+        handler: Callable[[List[Change]], Any],
+        max_batches: Optional[int] = None,
+    ) -> int:
+        # Feeds batches to ``handler`` until the consumer has caught up and
+        # returns how many changes it processed.
+        processed = batches = 0
+        while max_batches is None or batches < max_batches:
+            changes = self.poll()
+            if not changes:
+                break
+            handler(changes)
+            self.acknowledge(changes[-1].offset)
+            processed += len(changes)
+            batches += 1
+        return processed
+
+
+def drop_consumer(uow: SqlAlchemyUnitOfWork, name: str) -> None:
+    # A consumer that is gone for good would otherwise hold back compaction.
+    with uow:
+        uow.session.execute(delete(_CONSUMERS).where(_CONSUMERS.c.name == name))
+        uow.commit()
+
+
+def compact(
+    uow: SqlAlchemyUnitOfWork, chunk_size: int = COMPACT_CHUNK_SIZE
+) -> CompactionReport:
+    # Drops changes every registered consumer has acknowledged, then every
+    # change of a row that has a later one. The outbox is thereby bounded by
+    # one change per row beyond the slowest consumer. With no consumer
+    # registered nothing counts as acknowledged.
+    report = CompactionReport()
+    with uow:
+        session = uow.session
+        acknowledged = session.scalar(select(func.min(_CONSUMERS.c.offset)))
+        first = session.scalar(select(func.min(_OUTBOX.c.id)))
+        last = head(session)
+    if first is None:
+        return report
+    if acknowledged is not None and acknowledged >= first:
+        report.consumed = _delete_windows(
+            uow, [], first - 1, min(acknowledged, last), chunk_size
+        )
+        first = acknowledged + 1
+    later = _OUTBOX.alias("later")
+    superseded = exists().where(
+        later.c.entity == _OUTBOX.c.entity,
+        later.c.entity_id == _OUTBOX.c.entity_id,
+        later.c.id > _OUTBOX.c.id,
+    )
+    report.superseded = _delete_windows(
+        uow, [superseded], first - 1, last, chunk_size
+    )
+    return report
+
+
+def _delete_windows(
+    uow: SqlAlchemyUnitOfWork,
+    conditions: List[Any],
+    after: int,
+    upto: int,
+    chunk_size: int,
+) -> int:
+    # One transaction per window of ids, so writers wait for one window at
+    # most, never for the whole pass.
+    deleted = 0
+    while after < upto:
+        end = min(after + chunk_size, upto)
+        with uow:
+            result = uow.session.execute(
+                delete(_OUTBOX).where(
+                    _OUTBOX.c.id > after, _OUTBOX.c.id <= end, *conditions
+                )
+            )
+            uow.commit()
+        deleted += result.rowcount
+        after = end
+    return deleted
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect and compact the outbox")
+    parser.add_argument("command", choices=("status", "compact"))
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--chunk-size", type=int, default=COMPACT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    engine = build_engine(args.url)
+    uow = SqlAlchemyUnitOfWork(build_session_factory(engine))
+    if args.command == "compact":
+        report = compact(uow, args.chunk_size)
+        print(
+            f"deleted {report.consumed:,} acknowledged and "
+            f"{report.superseded:,} superseded changes"
+        )
+    with uow:
+        session = uow.session
+        last = head(session)
+        rows = session.scalar(select(func.count()).select_from(_OUTBOX))
+        print(f"{rows:,} changes in the outbox, head at {last}")
+        consumers = session.execute(
+            select(_CONSUMERS.c.name, _CONSUMERS.c.offset).order_by(_CONSUMERS.c.name)
+        )
+        for name, offset in consumers:
+            print(f"{name}: offset {offset}, {last - offset:,} ids behind")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
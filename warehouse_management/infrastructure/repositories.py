@@ -1,12 +1,54 @@
-from typing import List
+from collections import defaultdict
+from functools import partial
+from itertools import islice
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Callable,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Connection,
+    Row,
+    Select,
+    bindparam,
+    func,
+    insert,
+    null,
+    select,
+    update,
+)
+from sqlalchemy.orm import Load, Query, Session, joinedload, noload, selectinload
+from sqlalchemy.orm.util import identity_key
 
+from warehouse_management.domain.exceptions import (
+    ConcurrencyConflict,
+    EntitiesNotFound,
+    InsufficientStock,
+    ProjectedEntity,
+)
 from warehouse_management.domain.models import (
     Category,
+    CategoryStock,
+    CategorySummary,
     Customer,
+    LazyList,
+    LowStockItem,
     Order,
+    OrderLine,
     Product,
+    ProductOrderCount,
     Role,
     Staff,
 )
@@ -19,9 +61,608 @@ from warehouse_management.domain.repositories import (
     StaffRepository,
 )
 
-from .orm import CategoryORM, CustomerORM, OrderORM, ProductORM, RoleORM, StaffORM
+from .cache import written_keys
+from .instrumentation import instrumented
+from .search import CUSTOMER_SEARCH, PRODUCT_SEARCH, SEARCH_PAGE_SIZE, match_expression
+from .orm import (
+    Base,
+    CategoryORM,
+    CategorySummaryORM,
+    CustomerORM,
+    OrderLineORM,
+    OrderORM,
+    ProductORM,
+    RoleORM,
+    StaffORM,
+    order_product_assocoations,
+    product_category_assocoations,
+    role_staff_assocoations,
+    staff_customer_assocoations,
+)
+
+T = TypeVar("T")
+ORMT = TypeVar("ORMT", bound=Base)
+
+# "selectin" and "joined" load an aggregate's collections eagerly in a fixed
+# number of queries; "none" skips them and returns empty collections.
+LoadStrategy = Literal["selectin", "joined", "none"]
+
+# Even seven bound parameters per customer keep a full chunk well below
+# SQLite's SQLITE_MAX_VARIABLE_NUMBER.
+BULK_INSERT_CHUNK_SIZE = 1000
+IN_CLAUSE_CHUNK_SIZE = 500
+ITER_BATCH_SIZE = 1000
+
+
+def _chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _load_option(strategy: LoadStrategy, *path: Any) -> Load:
+    loaders = {"selectin": selectinload, "joined": joinedload, "none": noload}
+    load = loaders[strategy]
+    option = load(path[0])
+    for attribute in path[1:]:
+        option = getattr(option, load.__name__)(attribute)
+    return option  # type: ignore
+
+
+def _iter_keyset(
+    query: "Query[ORMT]", orm_class: Type[ORMT], batch_size: int, after_id: int
+) -> Iterator[ORMT]:
+    # Each page is a fresh "WHERE id > :last ORDER BY id LIMIT :n" query read
+    # through a streaming cursor, so memory is bounded by one page however
+    # large the table is.
+    last_id = after_id
+    while True:
+        page = (
+            query.filter(orm_class.id > last_id)  # type: ignore
+            .order_by(orm_class.id)  # type: ignore
+            .limit(batch_size)
+            .execution_options(stream_results=True)
+        )
+        fetched = 0
+        for obj in page:
+            fetched += 1
+            last_id = obj.id  # type: ignore
+            yield obj
+        if fetched < batch_size:
+            return
+
+
+def _iter_rows(
+    session: Session, statement: "Select[Any]", batch_size: int, after_id: int
+) -> Iterator["Row[Any]"]:
+    # Same keyset paging as _iter_keyset, for statements that select plain
+    # columns. The statement must select a column labelled "id".
+    id_column = statement.selected_columns.id
+    last_id = after_id
+    while True:
+        page = (
+            statement.where(id_column > last_id)
+            .order_by(id_column)
+            .limit(batch_size)
+            .execution_options(stream_results=True)
+        )
+        fetched = 0
+        for row in session.execute(page):
+            fetched += 1
+            last_id = row.id
+            yield row
+        if fetched < batch_size:
+            return
+
+
+def _rows_by_parent(
+    session: Session,
+    statement: "Select[Any]",
+    parent_column: Any,
+    parent_ids: Iterable[int],
+) -> Dict[int, List[Tuple[Any, ...]]]:
+    # ``statement`` selects the parent id first and the child columns after
+    # it; the rows come back grouped by parent id without the parent column.
+    grouped: Dict[int, List[Tuple[Any, ...]]] = defaultdict(list)
+    for chunk in _chunks(parent_ids, IN_CLAUSE_CHUNK_SIZE):
+        for parent_id, *row in session.execute(
+            statement.where(parent_column.in_(chunk))
+        ):
+            grouped[parent_id].append(tuple(row))
+    return grouped
+
+
+# The read path selects these columns as plain tuples instead of mapping ORM
+# instances; each tuple is laid out in the dataclass field order, so a row
+# unpacks straight into the domain constructor.
+PRODUCT_COLUMNS = (
+    ProductORM.name,
+    ProductORM.quantity,
+    ProductORM.price,
+    ProductORM.category,
+    ProductORM.id,
+    ProductORM.version,
+)
+CUSTOMER_COLUMNS = (
+    CustomerORM.first_name,
+    CustomerORM.last_name,
+    CustomerORM.address,
+    CustomerORM.phone,
+    CustomerORM.email,
+    CustomerORM.staff_id,
+    CustomerORM.id,
+    CustomerORM.version,
+)
+STAFF_COLUMNS = (
+    StaffORM.first_name,
+    StaffORM.last_name,
+    StaffORM.address,
+    StaffORM.phone,
+    StaffORM.email,
+    StaffORM.user_name,
+    StaffORM.role_id,
+    StaffORM.id,
+    StaffORM.version,
+)
+# Product, customer and staff rows end with the id and then the version.
+ID_POSITION = -2
+CATEGORY_COLUMNS = (CategoryORM.name, CategoryORM.description, CategoryORM.id)
+ROLE_COLUMNS = (RoleORM.name, RoleORM.description, RoleORM.id)
+
+_ORDER_LINKS = order_product_assocoations.c
+
+
+def _project(columns: Sequence[Any], fields: Optional[Collection[str]]) -> List[Any]:
+    # Columns left out of ``fields`` select NULL in their place, so rows keep
+    # the layout the domain constructors unpack. The id is always read:
+    # lazy collections are loaded by it. The version never is, which marks
+    # the entity as read-only to update().
+    if fields is None:
+        return list(columns)
+    kept = {"id", *fields} - {"version"}
+    return [c if c.key in kept else null().label(c.key) for c in columns]
+
+
+def _order_lines(fields: Optional[Collection[str]] = None) -> "Select[Any]":
+    return (
+        select(
+            _ORDER_LINKS.order_id,
+            _ORDER_LINKS.quantity,
+            *_project(PRODUCT_COLUMNS, fields),
+        )
+        .join(ProductORM, ProductORM.id == _ORDER_LINKS.product_id)
+        .order_by(_ORDER_LINKS.product_id)
+    )
+
+
+def _category_products(fields: Optional[Collection[str]] = None) -> "Select[Any]":
+    return select(
+        product_category_assocoations.c.category_id,
+        *_project(PRODUCT_COLUMNS, fields),
+    ).join(ProductORM, ProductORM.id == product_category_assocoations.c.product_id)
+
+
+def _staff_customers(fields: Optional[Collection[str]] = None) -> "Select[Any]":
+    return select(
+        staff_customer_assocoations.c.staff_id,
+        *_project(CUSTOMER_COLUMNS, fields),
+    ).join(CustomerORM, CustomerORM.id == staff_customer_assocoations.c.customer_id)
+
+
+def _role_staffs(fields: Optional[Collection[str]] = None) -> "Select[Any]":
+    return select(
+        role_staff_assocoations.c.role_id, *_project(STAFF_COLUMNS, fields)
+    ).join(StaffORM, StaffORM.id == role_staff_assocoations.c.staff_id)
+
+
+# Collections of the given parents, one per parent id in the order given:
+# an id given twice gets two collections with objects of their own.
+_Fetch = Callable[[List[int]], List[List[Any]]]
+
+
+class _Batch:
+    # One collection of every aggregate from the same read, loaded for all
+    # of them the first time any one is touched.
+    def __init__(self, fetch: _Fetch, parent_ids: List[int]):
+        self.fetch = fetch
+        self.parent_ids = parent_ids
+        self.children: Optional[List[List[Any]]] = None
+
+    def load(self, position: int) -> List[Any]:
+        if self.children is None:
+            self.children = self.fetch(self.parent_ids)
+        children, self.children[position] = self.children[position], []
+        return children
+
+
+def _fetcher(
+    session: Session,
+    statement: "Select[Any]",
+    parent_column: Any,
+    build: Callable[[List[Tuple[Any, ...]]], List[Any]],
+) -> _Fetch:
+    # ``build`` gets the child rows of all parents at once, so the children's
+    # own collections are read in one query too.
+    def fetch(parent_ids: List[int]) -> List[List[Any]]:
+        grouped = _rows_by_parent(
+            session, statement, parent_column, dict.fromkeys(parent_ids)
+        )
+        children = iter(build([row for i in parent_ids for row in grouped[i]]))
+        return [list(islice(children, len(grouped[i]))) for i in parent_ids]
+
+    return fetch
+
+
+def _collections(
+    parent_ids: List[int], fetch: _Fetch, depth: Optional[int]
+) -> List[MutableSequence[Any]]:
+    # Within ``depth`` the collections are read now; past it each one is a
+    # LazyList, and all of them share one batched load.
+    if depth is None or depth > 0:
+        return fetch(parent_ids)  # type: ignore
+    batch = _Batch(fetch, parent_ids)
+    return [LazyList(partial(batch.load, k)) for k in range(len(parent_ids))]
+
+
+def _nested(depth: Optional[int]) -> Optional[int]:
+    return None if depth is None else max(depth - 1, 0)
+
+
+def _products_from_rows(rows: List[Tuple[Any, ...]]) -> List[Product]:
+    return [Product(*row) for row in rows]
+
+
+def _products_from_lines(rows: List[Tuple[Any, ...]]) -> List[Product]:
+    return [Product(*row[1:]) for row in rows]
+
+
+def _customers_from_rows(rows: List[Tuple[Any, ...]]) -> List[Customer]:
+    return [Customer(*row) for row in rows]
+
+
+def _orders(
+    session: Session,
+    order_ids: List[int],
+    fields: Optional[Collection[str]] = None,
+    depth: Optional[int] = None,
+) -> List[Order]:
+    if depth is None or depth > 0:
+        rows = _rows_by_parent(
+            session, _order_lines(fields), _ORDER_LINKS.order_id, order_ids
+        )
+        return [
+            Order(
+                id=i,
+                products=_products_from_lines(rows[i]),
+                lines=[OrderLine(row[ID_POSITION], row[0]) for row in rows[i]],
+            )
+            for i in order_ids
+        ]
+    # The lines come from the association table alone; the products they
+    # point at wait until they are touched.
+    lines = _rows_by_parent(
+        session,
+        select(
+            _ORDER_LINKS.order_id, _ORDER_LINKS.product_id, _ORDER_LINKS.quantity
+        ).order_by(_ORDER_LINKS.product_id),
+        _ORDER_LINKS.order_id,
+        order_ids,
+    )
+    products = _collections(
+        order_ids,
+        _fetcher(
+            session, _order_lines(fields), _ORDER_LINKS.order_id, _products_from_lines
+        ),
+        depth,
+    )
+    return [
+        Order(id=i, products=p, lines=[OrderLine(*line) for line in lines[i]])
+        for i, p in zip(order_ids, products)
+    ]
+
+
+def _categories(
+    session: Session,
+    rows: Sequence[Tuple[Any, ...]],
+    fields: Optional[Collection[str]] = None,
+    depth: Optional[int] = None,
+) -> List[Category]:
+    products = _collections(
+        [row[-1] for row in rows],
+        _fetcher(
+            session,
+            _category_products(fields),
+            product_category_assocoations.c.category_id,
+            _products_from_rows,
+        ),
+        depth,
+    )
+    return [
+        Category(name, description, products=p, id=i)
+        for (name, description, i), p in zip(rows, products)
+    ]
+
+
+def _staffs_with_customers(
+    session: Session,
+    rows: Sequence[Tuple[Any, ...]],
+    fields: Optional[Collection[str]] = None,
+    depth: Optional[int] = None,
+) -> List[Staff]:
+    customers = _collections(
+        [row[ID_POSITION] for row in rows],
+        _fetcher(
+            session,
+            _staff_customers(fields),
+            staff_customer_assocoations.c.staff_id,
+            _customers_from_rows,
+        ),
+        depth,
+    )
+    return [Staff(*row, customers=c) for row, c in zip(rows, customers)]
+
+
+def _roles(
+    session: Session,
+    rows: Sequence[Tuple[Any, ...]],
+    fields: Optional[Collection[str]] = None,
+    depth: Optional[int] = None,
+) -> List[Role]:
+    staffs = _collections(
+        [row[-1] for row in rows],
+        _fetcher(
+            session,
+            _role_staffs(fields),
+            role_staff_assocoations.c.role_id,
+            partial(
+                _staffs_with_customers, session, fields=fields, depth=_nested(depth)
+            ),
+        ),
+        depth,
+    )
+    return [Role(*row, staffs=s) for row, s in zip(rows, staffs)]
+
+
+def _changed_since(
+    session: Session,
+    orm_class: Any,
+    columns: Sequence[Any],
+    watermark: int,
+    limit: int,
+) -> Tuple[List[Tuple[Any, ...]], int]:
+    # A keyset read over the change_seq index, so a sync costs the rows
+    # changed since its watermark, not the table. Every change_seq is
+    # unique, so the last one read is exactly where the next call resumes.
+    statement = (
+        select(*columns, orm_class.change_seq)
+        .where(orm_class.change_seq > watermark)
+        .order_by(orm_class.change_seq)
+        .limit(limit)
+    )
+    rows = session.execute(statement).all()
+    if rows:
+        watermark = rows[-1][-1]
+    return [tuple(row[:-1]) for row in rows], watermark
+
+
+def _one(
+    session: Session, statement: Select[Any], entity: str, entity_id: int
+) -> Row[Any]:
+    row = session.execute(statement).one_or_none()
+    if row is None:
+        raise EntitiesNotFound(entity, [entity_id])
+    return row
+
+
+def _product_from_orm(p: ProductORM) -> Product:
+    return Product(
+        id=int(p.id),
+        name=str(p.name),
+        quantity=int(p.quantity),
+        price=float(p.price),
+        category=int(p.category),
+        version=int(p.version),
+    )
+
+
+def _order_from_orm(o: OrderORM) -> Order:
+    return Order(
+        id=int(o.id),
+        products=[_product_from_orm(line.product) for line in o.lines],
+        lines=[OrderLine(int(line.product_id), int(line.quantity)) for line in o.lines],
+    )
+
+
+def _order_lines_to_orm(session: Session, order: Order) -> List[OrderLineORM]:
+    quantities = {line.product_id: line.quantity for line in order.lines}
+    product_ids = _existing_ids(
+        session, ProductORM, "Product", (p.id for p in order.products)
+    )
+    return [
+        OrderLineORM(product_id=i, quantity=quantities.get(i, 1)) for i in product_ids
+    ]
+
+
+def _category_from_orm(c: CategoryORM) -> Category:
+    return Category(
+        id=int(c.id),
+        name=str(c.name),
+        description=str(c.description),
+        products=[_product_from_orm(p) for p in c.products],
+    )
+
+
+def _customer_from_orm(c: CustomerORM) -> Customer:
+    return Customer(
+        id=int(c.id),
+        first_name=str(c.first_name),
+        last_name=str(c.last_name),
+        address=str(c.address),
+        phone=str(c.phone),
+        email=str(c.email),
+        staff_id=int(c.staff_id),
+        version=int(c.version),
+    )
+
+
+def _staff_from_orm(s: StaffORM) -> Staff:
+    return Staff(
+        id=int(s.id),
+        first_name=str(s.first_name),
+        last_name=str(s.last_name),
+        address=str(s.address),
+        phone=str(s.phone),
+        email=str(s.email),
+        user_name=str(s.user_name),
+        role_id=int(s.role_id),
+        version=int(s.version),
+        customers=[_customer_from_orm(c) for c in s.customers],
+    )
+
+
+def _role_from_orm(r: RoleORM) -> Role:
+    return Role(
+        id=int(r.id),
+        name=str(r.name),
+        description=str(r.description),
+        staffs=[_staff_from_orm(s) for s in r.staffs],
+    )
+
+
+def _existing_ids(
+    session: Session, orm_class: Type[ORMT], entity: str, ids: Iterable[int]
+) -> List[int]:
+    # _load_by_ids for callers that only need the ids to exist.
+    unique_ids = list(dict.fromkeys(ids))
+    found = set()
+    for chunk in _chunks(unique_ids, IN_CLAUSE_CHUNK_SIZE):
+        found.update(
+            session.scalars(
+                select(orm_class.id).where(orm_class.id.in_(chunk))  # type: ignore
+            )
+        )
+    missing = [i for i in unique_ids if i not in found]
+    if missing:
+        raise EntitiesNotFound(entity, missing)
+    return unique_ids
+
+
+# Matches no row when the product is missing or has fewer than :wanted left.
+# The version moves too, so a read-modify-write update racing a reservation
+# conflicts instead of writing back the old quantity.
+_products = ProductORM.__table__.c
+_RESERVE = (
+    update(ProductORM.__table__)
+    .where(_products.id == bindparam("product_id"))
+    .where(_products.quantity >= bindparam("wanted"))
+    .values(
+        quantity=_products.quantity - bindparam("wanted"),
+        version=_products.version + 1,
+    )
+)
+
 
+def _wanted_by_product(lines: Iterable[OrderLine]) -> Dict[int, int]:
+    wanted: Dict[int, int] = defaultdict(int)
+    for line in lines:
+        wanted[line.product_id] += line.quantity
+    return wanted
 
+
+def _raise_short(connection: Connection, wanted: Dict[int, int]) -> None:
+    in_stock = dict(
+        connection.execute(
+            select(_products.id, _products.quantity).where(
+                _products.id.in_(list(wanted))
+            )
+        ).all()
+    )
+    missing = [i for i in wanted if i not in in_stock]
+    if missing:
+        raise EntitiesNotFound("Product", sorted(missing))
+    raise InsufficientStock(sorted(i for i, n in wanted.items() if in_stock[i] < n))
+
+
+def _insert_many(
+    session: Session,
+    orm_class: Type[Base],
+    entities: Iterable[Any],
+    values: Callable[[Any], Dict[str, Any]],
+    chunk_size: int,
+) -> List[int]:
+    # Core executemany with RETURNING is rendered by SQLAlchemy as one
+    # multi-row INSERT ... VALUES (...), (...) per page of parameters.
+    table = orm_class.__table__
+    statement = insert(table).returning(table.c.id)  # type: ignore
+    versioned = "version" in table.c  # type: ignore
+    ids: List[int] = []
+    for chunk in _chunks(entities, chunk_size):
+        result = session.execute(
+            statement,
+            [values(entity) for entity in chunk],
+            execution_options={"insertmanyvalues_page_size": chunk_size},
+        )
+        # SQLite hands out rowids in VALUES order within one statement,
+        # but RETURNING rows come back in no guaranteed order.
+        chunk_ids = sorted(result.scalars())
+        for entity, entity_id in zip(chunk, chunk_ids):
+            entity.id = entity_id
+            if versioned:
+                entity.version = 1
+        # Core inserts bypass the flush, so record the new rows by hand.
+        written_keys(session).update((table.name, i) for i in chunk_ids)
+        ids.extend(chunk_ids)
+    return ids
+
+
+def _update_versioned(
+    session: Session,
+    orm_class: Type[Base],
+    entity: str,
+    obj: Any,
+    values: Dict[str, Any],
+) -> None:
+    # Compare-and-set on the version the caller read: no row matches when
+    # anyone changed it since. No lock is held between the read and here.
+    if obj.version is None:
+        raise ProjectedEntity(entity, obj.id)
+    table = orm_class.__table__
+    columns = table.c  # type: ignore
+    result = session.execute(
+        update(table)
+        .where(columns.id == obj.id, columns.version == obj.version)
+        .values(**values, version=columns.version + 1)
+    )
+    if result.rowcount == 0:  # type: ignore
+        current = session.execute(
+            select(columns.version).where(columns.id == obj.id)
+        ).scalar_one_or_none()
+        if current is None:
+            raise EntitiesNotFound(entity, [obj.id])
+        raise ConcurrencyConflict(entity, obj.id, obj.version, current)
+    obj.version += 1
+    loaded = session.identity_map.get(identity_key(orm_class, obj.id))
+    if loaded is not None:
+        session.expire(loaded)
+    written_keys(session).add((table.name, obj.id))  # type: ignore
+
+
+def _load_by_ids(
+    session: Session, orm_class: Type[ORMT], entity: str, ids: Iterable[int]
+) -> List[ORMT]:
+    unique_ids = list(dict.fromkeys(ids))
+    found: Dict[int, ORMT] = {}
+    for chunk in _chunks(unique_ids, IN_CLAUSE_CHUNK_SIZE):
+        query = session.query(orm_class).filter(orm_class.id.in_(chunk))  # type: ignore
+        found.update((obj.id, obj) for obj in query)  # type: ignore
+    missing = [i for i in unique_ids if i not in found]
+    if missing:
+        raise EntitiesNotFound(entity, missing)
+    # Association tables are keyed on both ids, so each link is written once.
+    return [found[i] for i in unique_ids]
+
+
+@instrumented
 class SqlAlchemyProductRepository(ProductRepository):
     def __init__(self, session: Session):
         self.session = session
@@ -35,123 +676,277 @@ class SqlAlchemyProductRepository(ProductRepository):
         )
         self.session.add(product_orm)
 
-    def get(self, product_id: int) -> Product:
-        product_orm = self.session.query(ProductORM).filter_by(id=product_id).one()
-        return Product(
-            id=int(product_orm.id),
-            name=str(product_orm.name),
-            quantity=int(product_orm.quantity),
-            price=float(product_orm.price),
-            category=int(product_orm.category),
+    def add_many(
+        self, products: Iterable[Product], chunk_size: int = BULK_INSERT_CHUNK_SIZE
+    ) -> List[int]:
+        return _insert_many(
+            self.session,
+            ProductORM,
+            products,
+            lambda p: {
+                "name": p.name,
+                "quantity": p.quantity,
+                "price": p.price,
+                "category": p.category,
+            },
+            chunk_size,
         )
 
+    def update(self, product: Product) -> None:
+        _update_versioned(
+            self.session,
+            ProductORM,
+            "Product",
+            product,
+            {
+                "name": product.name,
+                "quantity": product.quantity,
+                "price": product.price,
+                "category": product.category,
+            },
+        )
+
+    def get(self, product_id: int) -> Product:
+        statement = select(*PRODUCT_COLUMNS).where(ProductORM.id == product_id)
+        return Product(*_one(self.session, statement, "Product", product_id))
+
     def list(self) -> List[Product]:
-        products_orm = self.session.query(ProductORM).all()
-        return [
-            Product(
-                id=int(p.id),
-                name=str(p.name),
-                quantity=int(p.quantity),
-                price=float(p.price),
-                category=int(p.category),
+        return [Product(*row) for row in self.session.execute(select(*PRODUCT_COLUMNS))]
+
+    def iter(
+        self, batch_size: int = ITER_BATCH_SIZE, after_id: int = 0
+    ) -> Iterator[Product]:
+        statement = select(*PRODUCT_COLUMNS)
+        for row in _iter_rows(self.session, statement, batch_size, after_id):
+            yield Product(*row)
+
+    def list_changed_since(
+        self, watermark: int, limit: int = ITER_BATCH_SIZE
+    ) -> Tuple[List[Product], int]:
+        rows, watermark = _changed_since(
+            self.session, ProductORM, PRODUCT_COLUMNS, watermark, limit
+        )
+        return [Product(*row) for row in rows], watermark
+
+    def list_by_category(self, category: int) -> List[Product]:
+        statement = (
+            select(*PRODUCT_COLUMNS)
+            .where(ProductORM.category == category)
+            .order_by(ProductORM.id)
+        )
+        return [Product(*row) for row in self.session.execute(statement)]
+
+    def find_by_name(self, name: str) -> List[Product]:
+        statement = (
+            select(*PRODUCT_COLUMNS)
+            .where(ProductORM.name == name)
+            .order_by(ProductORM.id)
+        )
+        return [Product(*row) for row in self.session.execute(statement)]
+
+    def search(
+        self, query: str, limit: int = SEARCH_PAGE_SIZE, offset: int = 0
+    ) -> List[Product]:
+        match = match_expression(query)
+        if match is None:
+            return []
+        hits = PRODUCT_SEARCH.ranked(match, limit, offset)
+        statement = (
+            select(*PRODUCT_COLUMNS)
+            .join(hits, hits.c.rowid == ProductORM.id)
+            .order_by(hits.c.rank, hits.c.rowid)
+        )
+        return [Product(*row) for row in self.session.execute(statement)]
+
+    def reserve(self, lines: Iterable[OrderLine]) -> None:
+        # Each line is a guarded decrement, so concurrent orders can never
+        # take the same units twice. The lines share a savepoint: when any
+        # of them is short, all of them are undone and nothing is reserved.
+        # Rows are locked in id order to keep writers from deadlocking.
+        wanted = _wanted_by_product(lines)
+        if not wanted:
+            return
+        params = [{"product_id": i, "wanted": n} for i, n in sorted(wanted.items())]
+        self.session.flush()
+        connection = self.session.connection()
+        # A Core savepoint: Session.begin_nested() would also snapshot the
+        # whole identity map, which grows with every order in the batch.
+        with connection.begin_nested() as savepoint:
+            reserved = connection.execute(_RESERVE, params).rowcount
+            if reserved < len(params):
+                savepoint.rollback()
+        if reserved < len(params):
+            _raise_short(connection, wanted)
+        for product_id in wanted:
+            key = identity_key(ProductORM, product_id)
+            product = self.session.identity_map.get(key)
+            if product is not None:
+                self.session.expire(product, ["quantity", "version"])
+        written_keys(self.session).update(
+            (ProductORM.__tablename__, product_id) for product_id in wanted
+        )
+
+    def stock_value(self) -> float:
+        value = func.sum(ProductORM.quantity * ProductORM.price)
+        return float(self.session.execute(select(func.coalesce(value, 0))).scalar_one())
+
+    def stock_by_category(self) -> List[CategoryStock]:
+        statement = (
+            select(
+                ProductORM.category,
+                func.coalesce(func.sum(ProductORM.quantity), 0),
+                func.coalesce(func.sum(ProductORM.quantity * ProductORM.price), 0.0),
             )
-            for p in products_orm
+            .group_by(ProductORM.category)
+            .order_by(ProductORM.category)
+        )
+        return [
+            CategoryStock(category, quantity, float(value))
+            for category, quantity, value in self.session.execute(statement)
         ]
 
+    def category_summary(self) -> List[CategorySummary]:
+        statement = select(
+            CategorySummaryORM.category,
+            CategorySummaryORM.skus,
+            CategorySummaryORM.quantity,
+            CategorySummaryORM.value,
+        ).order_by(CategorySummaryORM.category)
+        return [CategorySummary(*row) for row in self.session.execute(statement)]
+
+    def low_stock(self, threshold: int) -> List[LowStockItem]:
+        statement = (
+            select(ProductORM.id, ProductORM.name, ProductORM.quantity)
+            .where(ProductORM.quantity < threshold)
+            .order_by(ProductORM.quantity, ProductORM.id)
+        )
+        return [LowStockItem(*row) for row in self.session.execute(statement)]
 
+    def top_ordered(self, limit: int = 10) -> List[ProductOrderCount]:
+        # Counted on the association table's (product_id, order_id) index
+        # alone; only the winning ids are joined to products for names.
+        links = order_product_assocoations.c
+        orders = func.count(links.order_id).label("orders")
+        counts = (
+            select(links.product_id, orders)
+            .group_by(links.product_id)
+            .order_by(orders.desc(), links.product_id)
+            .limit(limit)
+            .subquery()
+        )
+        statement = (
+            select(ProductORM.id, ProductORM.name, counts.c.orders)
+            .join(counts, counts.c.product_id == ProductORM.id)
+            .order_by(counts.c.orders.desc(), ProductORM.id)
+        )
+        return [ProductOrderCount(*row) for row in self.session.execute(statement)]
+
+
+@instrumented
 class SqlAlchemyOrderRepository(OrderRepository):
     def __init__(self, session: Session):
         self.session = session
 
     def add(self, order: Order) -> None:
-        order_orm = OrderORM()
-        order_orm.products = [
-            self.session.query(ProductORM).filter_by(id=p.id).one()
-            for p in order.products
-        ]
+        order_orm = OrderORM(lines=_order_lines_to_orm(self.session, order))
         self.session.add(order_orm)
 
-    def get(self, order_id: int) -> Order:
-        order_orm = self.session.query(OrderORM).filter_by(id=order_id).one()
-        products = [
-            Product(
-                id=p.id,
-                name=p.name,
-                quantity=p.quantity,
-                price=p.price,
-                category=p.category,
-            )
-            for p in order_orm.products
-        ]
-        return Order(id=int(order_orm.id), products=products)
-
-    def list(self) -> List[Order]:
-        orders_orm = self.session.query(OrderORM).all()
-        orders = []
-        for order_orm in orders_orm:
-            products = [
-                Product(
-                    id=p.id,
-                    name=p.name,
-                    quantity=p.quantity,
-                    price=p.price,
-                    category=p.category,
-                )
-                for p in order_orm.products
-            ]
-            orders.append(Order(id=int(order_orm.id), products=products))
-        return orders
+    def get(
+        self,
+        order_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Order:
+        _one(
+            self.session,
+            select(OrderORM.id).where(OrderORM.id == order_id),
+            "Order",
+            order_id,
+        )
+        return _orders(self.session, [order_id], fields, depth)[0]
 
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+        loading: LoadStrategy = "selectin",
+    ) -> List[Order]:
+        if fields is not None or depth is not None:
+            ids = self.session.scalars(select(OrderORM.id).order_by(OrderORM.id))
+            return _orders(self.session, list(ids), fields, depth)
+        query = self.session.query(OrderORM).options(
+            _load_option(loading, OrderORM.lines)
+        )
+        return [_order_from_orm(o) for o in query]
+
+    def iter(
+        self,
+        batch_size: int = ITER_BATCH_SIZE,
+        after_id: int = 0,
+        loading: LoadStrategy = "selectin",
+    ) -> Iterator[Order]:
+        query = self.session.query(OrderORM).options(
+            _load_option(loading, OrderORM.lines)
+        )
+        for o in _iter_keyset(query, OrderORM, batch_size, after_id):
+            yield _order_from_orm(o)
 
+
+@instrumented
 class SqlAlchemyCategoryRepository(CategoryRepository):
     def __init__(self, session: Session):
         self.session = session
 
     def add(self, category: Category) -> None:
         category_orm = CategoryORM(name=category.name, description=category.description)
-        category_orm.products = [
-            self.session.query(ProductORM).filter_by(id=p.id).one()
-            for p in category.products
-        ]
+        category_orm.products = _load_by_ids(
+            self.session, ProductORM, "Product", (p.id for p in category.products)
+        )
         self.session.add(category_orm)
 
-    def get(self, category_id: int) -> Category:
-        category_orm = self.session.query(CategoryORM).filter_by(id=category_id).one()
-        products = [
-            Product(
-                id=p.id,
-                name=p.name,
-                quantity=p.quantity,
-                price=p.price,
-                category=p.category,
+    def get(
+        self,
+        category_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Category:
+        statement = select(*_project(CATEGORY_COLUMNS, fields)).where(
+            CategoryORM.id == category_id
+        )
+        row = _one(self.session, statement, "Category", category_id)
+        return _categories(self.session, [tuple(row)], fields, depth)[0]
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+        loading: LoadStrategy = "selectin",
+    ) -> List[Category]:
+        if fields is not None or depth is not None:
+            statement = select(*_project(CATEGORY_COLUMNS, fields)).order_by(
+                CategoryORM.id
             )
-            for p in category_orm.products
-        ]
-        return Category(
-            id=int(category_orm.id),
-            products=products,
-            name=category_orm.name,
-            description=category_orm.description,
-        )
-
-    def list(self) -> List[Category]:
-        categories_orm = self.session.query(CategoryORM).all()
-        categories = []
-        for category_orm in categories_orm:
-            products = [
-                Product(
-                    id=p.id,
-                    name=p.name,
-                    quantity=p.quantity,
-                    price=p.price,
-                    category=p.category,
-                )
-                for p in category_orm.products
-            ]
-            categories.append(Order(id=int(category_orm.id), products=products))
-        return categories
+            rows = [tuple(row) for row in self.session.execute(statement)]
+            return _categories(self.session, rows, fields, depth)
+        query = self.session.query(CategoryORM).options(
+            _load_option(loading, CategoryORM.products)
+        )
+        return [_category_from_orm(c) for c in query]
+
+    def iter(
+        self,
+        batch_size: int = ITER_BATCH_SIZE,
+        after_id: int = 0,
+        loading: LoadStrategy = "selectin",
+    ) -> Iterator[Category]:
+        query = self.session.query(CategoryORM).options(
+            _load_option(loading, CategoryORM.products)
+        )
+        for c in _iter_keyset(query, CategoryORM, batch_size, after_id):
+            yield _category_from_orm(c)
 
 
+@instrumented
 class SqlAlchemyCustomerRepository(CustomerRepository):
     def __init__(self, session: Session):
         self.session = session
@@ -167,119 +962,140 @@ class SqlAlchemyCustomerRepository(CustomerRepository):
         )
         self.session.add(customer_orm)
 
-    def get(self, customer_id: int) -> Customer:
-        customer_orm = self.session.query(CustomerORM).filter_by(id=customer_id).one()
-        return Customer(
-            id=int(customer_orm.id),
-            first_name=str(customer_orm.first_name),
-            last_name=str(customer_orm.last_name),
-            address=str(customer_orm.address),
-            phone=str(customer_orm.phone),
-            email=str(customer_orm.email),
-            staff_id=int(customer_orm.staff_id),
+    def add_many(
+        self, customers: Iterable[Customer], chunk_size: int = BULK_INSERT_CHUNK_SIZE
+    ) -> List[int]:
+        return _insert_many(
+            self.session,
+            CustomerORM,
+            customers,
+            lambda c: {
+                "first_name": c.first_name,
+                "last_name": c.last_name,
+                "address": c.address,
+                "phone": c.phone,
+                "email": c.email,
+                "staff_id": c.staff_id,
+            },
+            chunk_size,
+        )
+
+    def update(self, customer: Customer) -> None:
+        _update_versioned(
+            self.session,
+            CustomerORM,
+            "Customer",
+            customer,
+            {
+                "first_name": customer.first_name,
+                "last_name": customer.last_name,
+                "address": customer.address,
+                "phone": customer.phone,
+                "email": customer.email,
+                "staff_id": customer.staff_id,
+            },
         )
 
+    def get(self, customer_id: int) -> Customer:
+        statement = select(*CUSTOMER_COLUMNS).where(CustomerORM.id == customer_id)
+        return Customer(*_one(self.session, statement, "Customer", customer_id))
+
     def list(self) -> List[Customer]:
-        customer_orm = self.session.query(CustomerORM).all()
         return [
-            Customer(
-                id=int(p.id),
-                first_name=str(p.first_name),
-                last_name=str(p.last_name),
-                address=str(p.address),
-                phone=str(p.phone),
-                email=str(p.email),
-                staff_id=int(p.staff_id),
-            )
-            for p in customer_orm
+            Customer(*row) for row in self.session.execute(select(*CUSTOMER_COLUMNS))
         ]
 
+    def iter(
+        self, batch_size: int = ITER_BATCH_SIZE, after_id: int = 0
+    ) -> Iterator[Customer]:
+        statement = select(*CUSTOMER_COLUMNS)
+        for row in _iter_rows(self.session, statement, batch_size, after_id):
+            yield Customer(*row)
+
+    def list_changed_since(
+        self, watermark: int, limit: int = ITER_BATCH_SIZE
+    ) -> Tuple[List[Customer], int]:
+        rows, watermark = _changed_since(
+            self.session, CustomerORM, CUSTOMER_COLUMNS, watermark, limit
+        )
+        return [Customer(*row) for row in rows], watermark
+
+    def list_by_staff(self, staff_id: int) -> List[Customer]:
+        statement = (
+            select(*CUSTOMER_COLUMNS)
+            .where(CustomerORM.staff_id == staff_id)
+            .order_by(CustomerORM.id)
+        )
+        return [Customer(*row) for row in self.session.execute(statement)]
 
+    def search(
+        self, query: str, limit: int = SEARCH_PAGE_SIZE, offset: int = 0
+    ) -> List[Customer]:
+        match = match_expression(query)
+        if match is None:
+            return []
+        hits = CUSTOMER_SEARCH.ranked(match, limit, offset)
+        statement = (
+            select(*CUSTOMER_COLUMNS)
+            .join(hits, hits.c.rowid == CustomerORM.id)
+            .order_by(hits.c.rank, hits.c.rowid)
+        )
+        return [Customer(*row) for row in self.session.execute(statement)]
+
+
+@instrumented
 class SqlAlchemyRoleRepository(RoleRepository):
     def __init__(self, session: Session):
         self.session = session
 
     def add(self, role: Role) -> None:
         role_orm = RoleORM(name=role.name, description=role.description)
-        role_orm.staffs = [
-            self.session.query(StaffORM).filter_by(id=p.id).one() for p in role.staffs
-        ]
+        role_orm.staffs = _load_by_ids(
+            self.session, StaffORM, "Staff", (p.id for p in role.staffs)
+        )
         self.session.add(role_orm)
 
-    def get(self, role_id: int) -> Role:
-        role_orm = self.session.query(RoleORM).filter_by(id=role_id).one()
-        staffs = [
-            Staff(
-                id=p.id,
-                first_name=p.first_name,
-                last_name=p.last_name,
-                address=p.address,
-                phone=p.phone,
-                email=p.email,
-                user_name=p.user_name,
-                role_id=p.role_id,
-                customers=[
-                    Customer(
-                        id=int(c.id),
-                        first_name=str(c.first_name),
-                        last_name=str(c.last_name),
-                        address=str(c.address),
-                        phone=str(c.phone),
-                        email=str(c.email),
-                        staff_id=int(c.id),
-                    )
-                    for c in p.customers
-                ],
-            )
-            for p in role_orm.staffs
-        ]
-        return Role(
-            id=int(role_orm.id),
-            name=str(role_orm.name),
-            description=str(role_orm.description),
-            staffs=staffs,
-        )
-
-    def list(self) -> List[Role]:
-        roles_orm = self.session.query(RoleORM).all()
-        roles = []
-        for role_orm in roles_orm:
-            staffs = [
-                Staff(
-                    id=p.id,
-                    first_name=p.first_name,
-                    last_name=p.last_name,
-                    address=p.address,
-                    phone=p.phone,
-                    email=p.email,
-                    user_name=p.user_name,
-                    role_id=p.role_id,
-                    customers=[
-                        Customer(
-                            id=int(c.id),
-                            first_name=str(c.first_name),
-                            last_name=str(c.last_name),
-                            address=str(c.address),
-                            phone=str(c.phone),
-                            email=str(c.email),
-                            staff_id=int(c.id),
-                        )
-                        for c in p.customers
-                    ],
-                )
-                for p in role_orm.staffs
-            ]
-            roles.append(
-                Role(
-                    id=int(role_orm.id),
-                    name=str(role_orm.name),
-                    description=str(role_orm.description),
-                    staffs=staffs,
-                )
-            )
-        return roles
+    def get(
+        self,
+        role_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Role:
+        statement = select(*_project(ROLE_COLUMNS, fields)).where(
+            RoleORM.id == role_id
+        )
+        row = _one(self.session, statement, "Role", role_id)
+        return _roles(self.session, [tuple(row)], fields, depth)[0]
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+        loading: LoadStrategy = "selectin",
+    ) -> List[Role]:
+        if fields is not None or depth is not None:
+            statement = select(*_project(ROLE_COLUMNS, fields)).order_by(RoleORM.id)
+            rows = [tuple(row) for row in self.session.execute(statement)]
+            return _roles(self.session, rows, fields, depth)
+        query = self.session.query(RoleORM).options(
+            _load_option(loading, RoleORM.staffs, StaffORM.customers)
+        )
+        return [_role_from_orm(r) for r in query]
+
+    def iter(
+        self,
+        batch_size: int = ITER_BATCH_SIZE,
+        after_id: int = 0,
+        loading: LoadStrategy = "selectin",
+    ) -> Iterator[Role]:
+        query = self.session.query(RoleORM).options(
+            _load_option(loading, RoleORM.staffs, StaffORM.customers)
+        )
+        for r in _iter_keyset(query, RoleORM, batch_size, after_id):
+            yield _role_from_orm(r)
 
 
+@instrumented
 class SqlAlchemyStaffRepository(StaffRepository):
     def __init__(self, session: Session):
         self.session = session
@@ -294,65 +1110,81 @@ class SqlAlchemyStaffRepository(StaffRepository):
             user_name=staff.user_name,
             role_id=staff.role_id,
         )
-        staff_orm.customers = [
-            self.session.query(CustomerORM).filter_by(id=p.id).one()
-            for p in staff.customers
-        ]
+        staff_orm.customers = _load_by_ids(
+            self.session, CustomerORM, "Customer", (p.id for p in staff.customers)
+        )
         self.session.add(staff_orm)
 
-    def get(self, staff_id: int) -> Staff:
-        staff_orm = self.session.query(StaffORM).filter_by(id=staff_id).one()
-        customers = [
-            Customer(
-                id=int(p.id),
-                first_name=str(p.first_name),
-                last_name=str(p.last_name),
-                address=str(p.address),
-                phone=str(p.phone),
-                email=str(p.email),
-                staff_id=int(p.id),
-            )
-            for p in staff_orm.customers
-        ]
-        return Staff(
-            id=int(staff_orm.id),
-            first_name=str(staff_orm.first_name),
-            last_name=str(staff_orm.last_name),
-            address=str(staff_orm.address),
-            phone=str(staff_orm.phone),
-            email=str(staff_orm.email),
-            user_name=str(staff_orm.user_name),
-            role_id=int(staff_orm.role_id),
-            customers=customers,
-        )
-
-    def list(self) -> List[Staff]:
-        staffs_orm = self.session.query(StaffORM).all()
-        staffs = []
-        for staff_orm in staffs_orm:
-            customers = [
-                Customer(
-                    id=int(p.id),
-                    first_name=str(p.first_name),
-                    last_name=str(p.last_name),
-                    address=str(p.address),
-                    phone=str(p.phone),
-                    email=str(p.email),
-                    staff_id=int(p.id),
-                )
-                for p in staff_orm.customers
-            ]
-            staffs.append(
-                Staff(
-                    id=int(staff_orm.id),
-                    first_name=str(staff_orm.first_name),
-                    last_name=str(staff_orm.last_name),
-                    address=str(staff_orm.address),
-                    phone=str(staff_orm.phone),
-                    email=str(staff_orm.email),
-                    user_name=str(staff_orm.user_name),
-                    role_id=int(staff_orm.role_id),
-                    customers=customers,
-                )
-            )
-        return staffs
+    def update(self, staff: Staff) -> None:
+        # The staff member's own fields; customers are linked through add.
+        _update_versioned(
+            self.session,
+            StaffORM,
+            "Staff",
+            staff,
+            {
+                "first_name": staff.first_name,
+                "last_name": staff.last_name,
+                "address": staff.address,
+                "phone": staff.phone,
+                "email": staff.email,
+                "user_name": staff.user_name,
+                "role_id": staff.role_id,
+            },
+        )
+
+    def get(
+        self,
+        staff_id: int,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+    ) -> Staff:
+        statement = select(*_project(STAFF_COLUMNS, fields)).where(
+            StaffORM.id == staff_id
+        )
+        row = _one(self.session, statement, "Staff", staff_id)
+        return _staffs_with_customers(self.session, [tuple(row)], fields, depth)[0]
+
+    def list(
+        self,
+        fields: Optional[Collection[str]] = None,
+        depth: Optional[int] = None,
+        loading: LoadStrategy = "selectin",
+    ) -> List[Staff]:
+        if fields is not None or depth is not None:
+            statement = select(*_project(STAFF_COLUMNS, fields)).order_by(StaffORM.id)
+            rows = [tuple(row) for row in self.session.execute(statement)]
+            return _staffs_with_customers(self.session, rows, fields, depth)
+        query = self.session.query(StaffORM).options(
+            _load_option(loading, StaffORM.customers)
+        )
+        return [_staff_from_orm(s) for s in query]
+
+    def iter(
+        self,
+        batch_size: int = ITER_BATCH_SIZE,
+        after_id: int = 0,
+        loading: LoadStrategy = "selectin",
+    ) -> Iterator[Staff]:
+        query = self.session.query(StaffORM).options(
+            _load_option(loading, StaffORM.customers)
+        )
+        for s in _iter_keyset(query, StaffORM, batch_size, after_id):
+            yield _staff_from_orm(s)
+
+    def list_changed_since(
+        self, watermark: int, limit: int = ITER_BATCH_SIZE
+    ) -> Tuple[List[Staff], int]:
+        rows, watermark = _changed_since(
+            self.session, StaffORM, STAFF_COLUMNS, watermark, limit
+        )
+        return _staffs_with_customers(self.session, rows), watermark
+
+    def list_by_role(self, role_id: int) -> List[Staff]:
+        statement = (
+            select(*STAFF_COLUMNS)
+            .where(StaffORM.role_id == role_id)
+            .order_by(StaffORM.id)
+        )
+        rows = [tuple(row) for row in self.session.execute(statement)]
+        return _staffs_with_customers(self.session, rows)
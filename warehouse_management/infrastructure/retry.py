@@ -0,0 +1,75 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Tuple, TypeVar
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+from warehouse_management.domain.exceptions import ConcurrencyConflict
+from warehouse_management.domain.unit_of_work import UnitOfWork
+
+T = TypeVar("T")
+U = TypeVar("U", bound=UnitOfWork)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 8
+    base_delay: float = 0.01
+    max_delay: float = 1.0
+
+    def delay(self, attempt: int) -> float:
+        # Exponential backoff with full jitter, so writers that collided once
+        # do not collide again on the same schedule.
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def is_lock_error(error: BaseException) -> bool:
+    return isinstance(error, OperationalError) and (
+        "database is locked" in str(error) or "database is busy" in str(error)
+    )
+
+
+def is_conflict(error: BaseException) -> bool:
+    # A lost optimistic race, or a lock error: in WAL mode a transaction
+    # that read before another one committed cannot write on top of it.
+    return isinstance(error, (ConcurrencyConflict, StaleDataError)) or (
+        is_lock_error(error)
+    )
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    retry_on: Callable[[BaseException], bool],
+    policy: RetryPolicy = RetryPolicy(),
+    sleep: Callable[[float], None] = time.sleep,
+) -> Tuple[T, int]:
+    # Returns the result together with the number of retries it took.
+    for attempt in range(policy.attempts):
+        try:
+            return fn(), attempt
+        except Exception as error:
+            if attempt + 1 == policy.attempts or not retry_on(error):
+                raise
+            sleep(policy.delay(attempt))
+    raise ValueError("RetryPolicy.attempts must be at least 1")
+
+
+def call_in_unit_of_work(
+    uow: U,
+    work: Callable[[U], T],
+    policy: RetryPolicy = RetryPolicy(),
+    retry_on: Callable[[BaseException], bool] = is_conflict,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Tuple[T, int]:
+    # Runs ``work`` in a block of its own and commits it. A retry starts
+    # over with a new block, so ``work`` reads the rows again at their
+    # current versions; it must not carry entities over between attempts.
+    def attempt() -> T:
+        with uow:
+            result = work(uow)
+            uow.commit()
+            return result
+
+    return call_with_retry(attempt, retry_on, policy, sleep)
@@ -0,0 +1,104 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sqlalchemy import (
+    Connection,
+    Subquery,
+    column,
+    inspect,
+    literal_column,
+    select,
+    table,
+)
+
+SEARCH_PAGE_SIZE = 20
+
+# Same split as FTS5's unicode61 tokenizer: runs of letters and digits,
+# case-folded; everything else, underscores included, separates tokens.
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    # An external-content FTS5 table: it stores only the index and reads the
+    # text back from ``source``. Triggers keep it in step with every insert,
+    # delete and update of the indexed columns, so Core bulk inserts are
+    # covered as well as ORM flushes. Updates of other columns, such as
+    # stock reservations, do not touch it.
+    name: str
+    source: str
+    columns: Tuple[str, ...]
+
+    def ddl(self) -> List[str]:
+        columns = ", ".join(self.columns)
+        new = ", ".join(f"new.{c}" for c in self.columns)
+        old = ", ".join(f"old.{c}" for c in self.columns)
+        insert = f"INSERT INTO {self.name}(rowid, {columns}) VALUES (new.id, {new});"
+        delete = (
+            f"INSERT INTO {self.name}({self.name}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old});"
+        )
+        return [
+            # prefix='2 3' indexes short prefixes, which is what a search box
+            # sends while the operator is still typing.
+            f"CREATE VIRTUAL TABLE {self.name} USING fts5({columns}, "
+            f"content='{self.source}', content_rowid='id', prefix='2 3')",
+            f"CREATE TRIGGER {self.name}_ai AFTER INSERT ON {self.source} "
+            f"BEGIN {insert} END",
+            f"CREATE TRIGGER {self.name}_ad AFTER DELETE ON {self.source} "
+            f"BEGIN {delete} END",
+            f"CREATE TRIGGER {self.name}_au AFTER UPDATE OF {columns} "
+            f"ON {self.source} BEGIN {delete} {insert} END",
+        ]
+
+    def ranked(self, match: str, limit: int, offset: int) -> Subquery:
+        # Ranked and paged inside the FTS table, so only one page of ids is
+        # joined back to the source rows.
+        fts = table(self.name, column("rowid"), column("rank"))
+        return (
+            select(fts.c.rowid, fts.c.rank)
+            .where(literal_column(self.name).op("MATCH")(match))
+            .order_by(fts.c.rank, fts.c.rowid)
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+
+
+PRODUCT_SEARCH = SearchIndex("products_fts", "products", ("name",))
+CUSTOMER_SEARCH = SearchIndex(
+    "customer_fts", "customer", ("first_name", "last_name", "email", "phone")
+)
+SEARCH_INDEXES = (PRODUCT_SEARCH, CUSTOMER_SEARCH)
+
+
+def search_terms(text: str) -> List[str]:
+    return [token.casefold() for token in _TOKEN.findall(text)]
+
+
+def match_expression(text: str) -> Optional[str]:
+    # Every term must match as a word prefix: "jo sm" finds "John Smith".
+    # Terms are quoted, so FTS5 operators typed by the user stay plain text.
+    terms = search_terms(text)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def create_search_indexes(conn: Connection) -> List[str]:
+    # Indexes created over a populated table are filled from it right away.
+    if conn.dialect.name != "sqlite":
+        return []
+    existing = set(inspect(conn).get_table_names())
+    created: List[str] = []
+    for index in SEARCH_INDEXES:
+        if index.source not in existing or index.name in existing:
+            continue
+        for statement in index.ddl():
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(
+            f"INSERT INTO {index.name}({index.name}) VALUES ('rebuild')"
+        )
+        created.append(index.name)
+    return created
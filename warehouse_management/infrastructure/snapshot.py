@@ -0,0 +1,294 @@
+import argparse
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from operator import mul
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.exceptions import EntitiesNotFound
+from warehouse_management.domain.models import CategoryStock, LowStockItem, Product
+
+from .database import DATABASE_URL, build_engine, build_session_factory
+from .repositories import ITER_BATCH_SIZE, SqlAlchemyProductRepository
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised where numpy is absent
+    np = None
+
+# File layout, all little-endian:
+#   header: magic, row count, snapshot time, then the byte offset of each
+#           section and the length of the string table
+#   id, quantity, category: int64[rows]; price: float64[rows]
+#   name offsets: int64[rows + 1] into the string table
+#   string table: the UTF-8 names back to back
+# Sections start on 64-byte boundaries, so every column can be mapped as an
+# aligned array straight out of the page cache. Typed arrays have no NULL:
+# NULL numbers are stored as 0 and a NULL name as "", which leaves the sums
+# equal to the repository's coalesced aggregates.
+MAGIC = b"WHSNAP01"
+_HEADER = struct.Struct("<8sQd6QQ")
+_ALIGN = 64
+_SECTIONS = ("id", "quantity", "price", "category", "name_offsets", "names")
+_TYPECODES = {
+    "id": "q",
+    "quantity": "q",
+    "price": "d",
+    "category": "q",
+    "name_offsets": "q",
+}
+
+
+def _padding(position: int) -> int:
+    return -position % _ALIGN
+
+
+def write_snapshot(
+    session: Session, path: str, batch_size: int = ITER_BATCH_SIZE
+) -> int:
+    # Columns are spooled to one temporary file each while the products
+    # stream past, then concatenated behind the header, so memory stays at
+    # one batch. The finished file replaces ``path`` in one rename: readers
+    # that mapped the old snapshot keep it until they reopen.
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryDirectory(dir=directory) as spool:
+        files: Dict[str, BinaryIO] = {
+            name: open(os.path.join(spool, name), "w+b") for name in _SECTIONS
+        }
+        try:
+            rows, names_length = _spool_columns(session, files, batch_size)
+            partial = f"{path}.part"
+            with open(partial, "wb") as out:
+                offsets: List[int] = []
+                position = _HEADER.size
+                for name in _SECTIONS:
+                    position += _padding(position)
+                    offsets.append(position)
+                    position += files[name].seek(0, os.SEEK_END)
+                header = _HEADER.pack(MAGIC, rows, time.time(), *offsets, names_length)
+                out.write(header)
+                for name, offset in zip(_SECTIONS, offsets):
+                    out.write(b"\0" * (offset - out.tell()))
+                    files[name].seek(0)
+                    shutil.copyfileobj(files[name], out)
+                out.flush()
+                os.fsync(out.fileno())
+        finally:
+            for f in files.values():
+                f.close()
+    os.replace(partial, path)
+    return rows
+
+
+def _spool_columns(
+    session: Session, files: Dict[str, BinaryIO], batch_size: int
+) -> Tuple[int, int]:
+    columns = {name: array(code) for name, code in _TYPECODES.items()}
+    columns["name_offsets"].append(0)
+    rows = names_length = 0
+    names = bytearray()
+    products = SqlAlchemyProductRepository(session).iter(batch_size=batch_size)
+    for product in products:
+        encoded = (product.name or "").encode()
+        names += encoded
+        names_length += len(encoded)
+        columns["id"].append(product.id)
+        columns["quantity"].append(product.quantity or 0)
+        columns["price"].append(product.price or 0.0)
+        columns["category"].append(product.category or 0)
+        columns["name_offsets"].append(names_length)
+        rows += 1
+        if rows % batch_size == 0:
+            _flush(files, columns, names)
+    _flush(files, columns, names)
+    return rows, names_length
+
+
+def _flush(
+    files: Dict[str, BinaryIO], columns: Dict[str, array], names: bytearray
+) -> None:
+    for name, column in columns.items():
+        column.tofile(files[name])
+        del column[:]
+    files["names"].write(names)
+    names.clear()
+
+
+class ProductSnapshot:
+    # Columns are zero-copy views of the mapped file: NumPy arrays when NumPy
+    # is installed, typed memoryviews otherwise. The aggregations mirror
+    # ProductRepository's and return the same types, vectorized under NumPy
+    # and plain loops over the views without it.
+    def __init__(self, path: str, use_numpy: Optional[bool] = None):
+        if use_numpy and np is None:
+            raise RuntimeError("use_numpy=True needs numpy installed")
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, rows, taken_at, *offsets, names_length = _HEADER.unpack_from(
+            self._mmap
+        )
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a product snapshot")
+        self.rows: int = rows
+        self.taken_at: float = taken_at
+        sections = dict(zip(_SECTIONS, offsets))
+        self.ids = self._column(sections["id"], "q", rows)
+        self.quantity = self._column(sections["quantity"], "q", rows)
+        self.price = self._column(sections["price"], "d", rows)
+        self.category = self._column(sections["category"], "q", rows)
+        self._name_offsets = self._column(sections["name_offsets"], "q", rows + 1)
+        self._names = memoryview(self._mmap)[
+            sections["names"] : sections["names"] + names_length
+        ]
+
+    def _column(self, offset: int, code: str, count: int) -> Any:
+        if self.use_numpy:
+            dtype = np.int64 if code == "q" else np.float64
+            return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+        return memoryview(self._mmap)[offset : offset + count * 8].cast(code)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __enter__(self) -> "ProductSnapshot":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # The mapping can only close once no view of it is left, including
+        # columns callers may still hold.
+        views = (
+            self.ids,
+            self.quantity,
+            self.price,
+            self.category,
+            self._name_offsets,
+            self._names,
+        )
+        for view in views:
+            if isinstance(view, memoryview):
+                view.release()
+        del views
+        del self.ids, self.quantity, self.price, self.category, self._name_offsets
+        del self._names
+        self._mmap.close()
+
+    def name(self, index: int) -> str:
+        start, end = self._name_offsets[index], self._name_offsets[index + 1]
+        return str(self._names[start:end], "utf-8")
+
+    def product(self, index: int) -> Product:
+        return Product(
+            name=self.name(index),
+            quantity=int(self.quantity[index]),
+            price=float(self.price[index]),
+            category=int(self.category[index]),
+            id=int(self.ids[index]),
+        )
+
+    def products(self, indices: Sequence[int]) -> List[Product]:
+        return [self.product(int(i)) for i in indices]
+
+    def get(self, product_id: int) -> Product:
+        # The exporter writes products in id order.
+        if self.use_numpy:
+            index = int(np.searchsorted(self.ids, product_id))
+        else:
+            index = bisect_left(self.ids, product_id)
+        if index == self.rows or self.ids[index] != product_id:
+            raise EntitiesNotFound("Product", [product_id])
+        return self.product(index)
+
+    def select(
+        self,
+        category: Optional[int] = None,
+        quantity_below: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> Sequence[int]:
+        # Row indices matching every given condition, in id order.
+        if self.use_numpy:
+            mask = np.ones(self.rows, dtype=bool)
+            if category is not None:
+                mask &= self.category == category
+            if quantity_below is not None:
+                mask &= self.quantity < quantity_below
+            if min_price is not None:
+                mask &= self.price >= min_price
+            if max_price is not None:
+                mask &= self.price <= max_price
+            return np.flatnonzero(mask)
+        return [
+            i
+            for i, (c, q, p) in enumerate(zip(self.category, self.quantity, self.price))
+            if (category is None or c == category)
+            and (quantity_below is None or q < quantity_below)
+            and (min_price is None or p >= min_price)
+            and (max_price is None or p <= max_price)
+        ]
+
+    def stock_value(self) -> float:
+        if self.use_numpy:
+            return float(np.dot(self.quantity, self.price))
+        return float(sum(map(mul, self.quantity, self.price)))
+
+    def stock_by_category(self) -> List[CategoryStock]:
+        if self.use_numpy:
+            categories, groups = np.unique(self.category, return_inverse=True)
+            quantities = np.bincount(groups, weights=self.quantity)
+            values = np.bincount(groups, weights=self.quantity * self.price)
+            return [
+                CategoryStock(int(c), int(q), float(v))
+                for c, q, v in zip(categories, quantities, values)
+            ]
+        quantities_by: Dict[int, int] = defaultdict(int)
+        values_by: Dict[int, float] = defaultdict(float)
+        for c, q, p in zip(self.category, self.quantity, self.price):
+            quantities_by[c] += q
+            values_by[c] += q * p
+        return [
+            CategoryStock(c, quantities_by[c], values_by[c])
+            for c in sorted(quantities_by)
+        ]
+
+    def low_stock(self, threshold: int) -> List[LowStockItem]:
+        indices = self.select(quantity_below=threshold)
+        if self.use_numpy:
+            # Stable, so equal quantities stay in id order.
+            indices = indices[np.argsort(self.quantity[indices], kind="stable")]
+        else:
+            indices = sorted(indices, key=self.quantity.__getitem__)
+        return [
+            LowStockItem(int(self.ids[i]), self.name(int(i)), int(self.quantity[i]))
+            for i in indices
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Write a product catalog snapshot")
+    parser.add_argument("path")
+    parser.add_argument("--url", default=DATABASE_URL)
+    args = parser.parse_args(argv)
+
+    engine = build_engine(args.url, profile="read-only")
+    with build_session_factory(engine)() as session:
+        rows = write_snapshot(session, args.path)
+    engine.dispose()
+    print(f"wrote {rows:,} products to {args.path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,180 @@
+import argparse
+import math
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import Connection, Select, delete, func, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from warehouse_management.domain.models import CategorySummary
+
+from .database import DATABASE_URL, build_engine, build_session_factory
+from .orm import CategorySummaryORM, ProductORM
+from .retry import RetryPolicy, call_in_unit_of_work
+from .unit_of_work import SqlAlchemyUnitOfWork
+
+_SUMMARY = CategorySummaryORM.__table__
+
+# Values are float sums updated one write at a time, so they round
+# differently from a sum taken in one pass; anything within this is not drift.
+VALUE_TOLERANCE = 1e-6
+
+
+def _apply(row: str, sign: str) -> str:
+    # Adds (or with sign "-" takes away) one product row. Products without
+    # a category are left out, as no dashboard can group them.
+    return (
+        "INSERT INTO category_summary (category, skus, quantity, value) "
+        f"SELECT {row}.category, {sign}1, {sign}coalesce({row}.quantity, 0), "
+        f"{sign}coalesce({row}.quantity * {row}.price, 0) "
+        f"WHERE {row}.category IS NOT NULL "
+        "ON CONFLICT (category) DO UPDATE SET skus = skus + excluded.skus, "
+        "quantity = quantity + excluded.quantity, value = value + excluded.value;"
+    )
+
+
+_PRUNE = "DELETE FROM category_summary WHERE category = old.category AND skus = 0;"
+
+
+def summary_ddl() -> List[str]:
+    # Triggers, so the summary moves in the same transaction as the product
+    # rows whichever way they are written: ORM flushes, Core bulk inserts,
+    # updates and the reservation UPDATE. Updates of other columns, such as
+    # name or version, do not touch it.
+    return [
+        "CREATE TRIGGER IF NOT EXISTS category_summary_ai AFTER INSERT ON products "
+        f"BEGIN {_apply('new', '')} END",
+        "CREATE TRIGGER IF NOT EXISTS category_summary_ad AFTER DELETE ON products "
+        f"BEGIN {_apply('old', '-')} {_PRUNE} END",
+        "CREATE TRIGGER IF NOT EXISTS category_summary_au "
+        "AFTER UPDATE OF quantity, price, category ON products "
+        f"BEGIN {_apply('old', '-')} {_apply('new', '')} {_PRUNE} END",
+    ]
+
+
+def create_category_summary(conn: Connection) -> List[str]:
+    # A summary created over a populated table is filled from it right away.
+    if conn.dialect.name != "sqlite":
+        return []
+    existing = set(inspect(conn).get_table_names())
+    if "products" not in existing:
+        return []
+    created: List[str] = []
+    if _SUMMARY.name not in existing:
+        _SUMMARY.create(conn)
+        created.append(_SUMMARY.name)
+    triggers = {
+        name
+        for (name,) in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+    }
+    if "category_summary_ai" not in triggers:
+        for statement in summary_ddl():
+            conn.exec_driver_sql(statement)
+        created.append("category_summary triggers")
+        _rebuild(conn)
+    return created
+
+
+def _totals() -> Select:
+    return (
+        select(
+            ProductORM.category,
+            func.count(),
+            func.coalesce(func.sum(ProductORM.quantity), 0),
+            func.coalesce(func.sum(ProductORM.quantity * ProductORM.price), 0.0),
+        )
+        .where(ProductORM.category.is_not(None))
+        .group_by(ProductORM.category)
+    )
+
+
+def recompute(session: Session) -> List[CategorySummary]:
+    # The summary as it should be: one full pass over products.
+    rows = session.execute(_totals().order_by(ProductORM.category))
+    return [
+        CategorySummary(category, skus, quantity, float(value))
+        for category, skus, quantity, value in rows
+    ]
+
+
+def _rebuild(conn: Connection) -> None:
+    conn.execute(delete(_SUMMARY))
+    conn.execute(
+        insert(_SUMMARY).from_select(
+            ["category", "skus", "quantity", "value"], _totals()
+        )
+    )
+
+
+@dataclass
+class SummaryDrift:
+    category: int
+    # None where the category is missing from that side.
+    expected: Optional[CategorySummary]
+    stored: Optional[CategorySummary]
+
+
+def _drifted(expected: CategorySummary, stored: CategorySummary) -> bool:
+    if (expected.skus, expected.quantity) != (stored.skus, stored.quantity):
+        return True
+    return not math.isclose(expected.value, stored.value, abs_tol=VALUE_TOLERANCE)
+
+
+def check_category_summary(
+    uow: SqlAlchemyUnitOfWork,
+    repair: bool = False,
+    policy: RetryPolicy = RetryPolicy(),
+) -> List[SummaryDrift]:
+    # Compares the stored summary with one recomputed from products, both
+    # read in one transaction, and with ``repair`` rebuilds it in that same
+    # transaction. A write committed in between makes the rebuild fail with
+    # a lock error, and the check starts over.
+    def check(uow: SqlAlchemyUnitOfWork) -> List[SummaryDrift]:
+        session = uow.session
+        expected: Dict[int, CategorySummary] = {
+            s.category: s for s in recompute(session)
+        }
+        stored: Dict[int, CategorySummary] = {
+            s.category: s for s in uow.products.category_summary()
+        }
+        drift = [
+            SummaryDrift(category, expected.get(category), stored.get(category))
+            for category in sorted(expected.keys() | stored.keys())
+            if category not in expected
+            or category not in stored
+            or _drifted(expected[category], stored[category])
+        ]
+        if repair and drift:
+            _rebuild(session.connection())
+        return drift
+
+    drift, _ = call_in_unit_of_work(uow, check, policy)
+    return drift
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Check the category summary")
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--repair", action="store_true", help="rebuild on drift")
+    args = parser.parse_args(argv)
+
+    engine = build_engine(args.url)
+    uow = SqlAlchemyUnitOfWork(build_session_factory(engine))
+    drift = check_category_summary(uow, repair=args.repair)
+    for item in drift:
+        print(
+            f"category {item.category}: expected {item.expected}, "
+            f"stored {item.stored}"
+        )
+    status = "rebuilt" if args.repair else "not repaired"
+    print(f"{len(drift)} categories drifted" + (f", {status}" if drift else ""))
+    engine.dispose()
+    if drift and not args.repair:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
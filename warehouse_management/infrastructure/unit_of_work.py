@@ -1,22 +1,322 @@
-from warehouse_management.domain.unit_of_work import UnitOfWork
+import threading
+from contextvars import Token
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from warehouse_management.domain.repositories import (
+    CategoryRepository,
+    CustomerRepository,
+    OrderRepository,
+    ProductRepository,
+    RoleRepository,
+    StaffRepository,
+)
+from warehouse_management.domain.unit_of_work import AsyncUnitOfWork, UnitOfWork
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from .cache import (
+    CACHE_GENERATION,
+    WRITTEN_KEYS,
+    CachedCategoryRepository,
+    CachedCustomerRepository,
+    CachedOrderRepository,
+    CachedProductRepository,
+    CachedRoleRepository,
+    CachedStaffRepository,
+    EntityCache,
+    written_keys,
+)
+from .orm import OrderLineORM
+from .instrumentation import QueryStats, operation, start_collecting, stop_collecting
+from .repositories import (
+    SqlAlchemyCategoryRepository,
+    SqlAlchemyCustomerRepository,
+    SqlAlchemyOrderRepository,
+    SqlAlchemyProductRepository,
+    SqlAlchemyRoleRepository,
+    SqlAlchemyStaffRepository,
+)
+
+R = TypeVar("R")
+
+_REPOSITORIES: Dict[str, Any] = {
+    "products": (SqlAlchemyProductRepository, CachedProductRepository),
+    "orders": (SqlAlchemyOrderRepository, CachedOrderRepository),
+    "categories": (SqlAlchemyCategoryRepository, CachedCategoryRepository),
+    "customers": (SqlAlchemyCustomerRepository, CachedCustomerRepository),
+    "roles": (SqlAlchemyRoleRepository, CachedRoleRepository),
+    "staffs": (SqlAlchemyStaffRepository, CachedStaffRepository),
+}
+
+
+def _track_flushed(session: Session, flush_context: Any) -> None:
+    keys = written_keys(session)
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, OrderLineORM):
+            # Lines only change through their order, which is keyed itself.
+            continue
+        keys.add((obj.__tablename__, obj.id))
+
+
+@dataclass
+class _Frame:
+    session: Session
+    token: Token
+    stats: QueryStats
+    repositories: Dict[str, Any] = field(default_factory=dict)
+    reader: Optional[Session] = None
+    read_repositories: Dict[str, Any] = field(default_factory=dict)
+
 
 class SqlAlchemyUnitOfWork(UnitOfWork):
-    def __init__(self, session: Session):
-        self.session = session
+    # Every __enter__ opens a new session from the factory and __exit__
+    # closes it, so nothing outlives the block. The open session lives in
+    # thread-local state: one unit of work, and a service holding it, can be
+    # shared by a thread pool, with each thread in a session of its own.
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        cache: Optional[EntityCache] = None,
+    ):
+        self.session_factory = session_factory
+        self.cache = cache
+        self._local = threading.local()
+
+    def _frames(self) -> List[_Frame]:
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def _frame(self) -> _Frame:
+        frames = self._frames()
+        if not frames:
+            raise RuntimeError(f"{type(self).__name__} used outside a with block")
+        return frames[-1]
+
+    @property
+    def session(self) -> Session:
+        return self._frame().session
+
+    @property
+    def stats(self) -> QueryStats:
+        # Statements run between __enter__ and __exit__, per repository
+        # method; after the block, those of the last block on this thread.
+        frames = self._frames()
+        if frames:
+            return frames[-1].stats
+        return getattr(self._local, "last_stats", None) or QueryStats()
+
+    @property
+    def products(self) -> ProductRepository:
+        return self._repository("products")
+
+    @property
+    def orders(self) -> OrderRepository:
+        return self._repository("orders")
+
+    @property
+    def categories(self) -> CategoryRepository:
+        return self._repository("categories")
+
+    @property
+    def customers(self) -> CustomerRepository:
+        return self._repository("customers")
+
+    @property
+    def roles(self) -> RoleRepository:
+        return self._repository("roles")
+
+    @property
+    def staffs(self) -> StaffRepository:
+        return self._repository("staffs")
+
+    def _repository(self, name: str) -> Any:
+        frame = self._frame()
+        return self._bind(name, frame.session, frame.repositories)
+
+    def _bind(self, name: str, session: Session, bound: Dict[str, Any]) -> Any:
+        repository = bound.get(name)
+        if repository is None:
+            sql_class, cached_class = _REPOSITORIES[name]
+            repository = sql_class(session)
+            if self.cache is not None:
+                repository = cached_class(repository, self.cache)
+            bound[name] = repository
+        return repository
 
     def __enter__(self) -> "SqlAlchemyUnitOfWork":
+        session = self.session_factory()
+        if self.cache is not None and not event.contains(
+            session, "after_flush", _track_flushed
+        ):
+            event.listen(session, "after_flush", _track_flushed)
+        self._begin_generation(session)
+        stats = QueryStats()
+        self._frames().append(_Frame(session, start_collecting(stats), stats))
         return self
 
     def __exit__(self, *args: object) -> None:
-        self.close()
+        try:
+            self.close()
+        finally:
+            frame = self._frames().pop()
+            stop_collecting(frame.token)
+            self._local.last_stats = frame.stats
+
+    def commit(self) -> None:
+        session = self.session
+        try:
+            with operation("SqlAlchemyUnitOfWork.commit"):
+                session.commit()
+        finally:
+            self._invalidate_written(session)
+
+    def rollback(self) -> None:
+        session = self.session
+        try:
+            with operation("SqlAlchemyUnitOfWork.rollback"):
+                session.rollback()
+        finally:
+            self._invalidate_written(session)
+
+    def close(self) -> None:
+        session = self.session
+        try:
+            session.close()
+        finally:
+            self._invalidate_written(session)
+
+    def _invalidate_written(self, session: Session) -> None:
+        keys = session.info.pop(WRITTEN_KEYS, set())
+        if self.cache is not None and keys:
+            self.cache.invalidate(keys)
+        self._begin_generation(session)
+
+    def _begin_generation(self, session: Session) -> None:
+        # The next transaction starts no earlier than now; reads it puts into
+        # the cache are discarded if anything is invalidated after this point.
+        if self.cache is not None:
+            session.info[CACHE_GENERATION] = self.cache.generation
+
+
+class RoutingUnitOfWork(SqlAlchemyUnitOfWork):
+    # Writes go through the session from the writer factory; reads can be
+    # sent to a session from a read-only engine, so long report queries hold
+    # a connection of the reader pool and never the writer's. In WAL mode the
+    # readers see the last committed state and do not block the writer.
+    # The reader does not see this unit of work's uncommitted writes; its
+    # snapshot is dropped on commit so later reads see them once committed.
+    def __init__(
+        self,
+        write_factory: Callable[[], Session],
+        read_factory: Callable[[], Session],
+        cache: Optional[EntityCache] = None,
+    ):
+        super().__init__(write_factory, cache)
+        self.read_factory = read_factory
+
+    @property
+    def reader(self) -> Session:
+        frame = self._frame()
+        if frame.reader is None:
+            frame.reader = self.read_factory()
+            self._begin_generation(frame.reader)
+        return frame.reader
+
+    @property
+    def reads(self) -> "_ReadRepositories":
+        # The service's read-only calls go through these, so they hold a
+        # reader connection and never the writer's.
+        return _ReadRepositories(self)
+
+    def _read_repository(self, name: str) -> Any:
+        reader = self.reader
+        return self._bind(name, reader, self._frame().read_repositories)
+
+    def write(self, repository_class: Callable[[Session], R]) -> R:
+        return repository_class(self.session)
+
+    def read(self, repository_class: Callable[[Session], R]) -> R:
+        return repository_class(self.reader)
 
     def commit(self) -> None:
-        self.session.commit()
+        super().commit()
+        self._end_read()
 
     def rollback(self) -> None:
-        self.session.rollback()
+        super().rollback()
+        self._end_read()
 
     def close(self) -> None:
-        self.session.close()
+        frame = self._frame()
+        try:
+            if frame.reader is not None:
+                frame.reader.close()
+        finally:
+            frame.reader = None
+            frame.read_repositories.clear()
+            super().close()
+
+    def _end_read(self) -> None:
+        # Read sessions never hold changes; ending their transaction just
+        # releases the snapshot and the pooled connection.
+        reader = self._frame().reader
+        if reader is not None:
+            reader.rollback()
+            self._begin_generation(reader)
+
+
+class _ReadRepositories:
+    # The repositories of a RoutingUnitOfWork bound to its read session.
+    def __init__(self, uow: RoutingUnitOfWork):
+        self._uow = uow
+
+    @property
+    def products(self) -> ProductRepository:
+        return self._uow._read_repository("products")
+
+    @property
+    def orders(self) -> OrderRepository:
+        return self._uow._read_repository("orders")
+
+    @property
+    def categories(self) -> CategoryRepository:
+        return self._uow._read_repository("categories")
+
+    @property
+    def customers(self) -> CustomerRepository:
+        return self._uow._read_repository("customers")
+
+    @property
+    def roles(self) -> RoleRepository:
+        return self._uow._read_repository("roles")
+
+    @property
+    def staffs(self) -> StaffRepository:
+        return self._uow._read_repository("staffs")
+
+
+class AsyncSqlAlchemyUnitOfWork(AsyncUnitOfWork):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def __aenter__(self) -> "AsyncSqlAlchemyUnitOfWork":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self.close()
+
+    async def commit(self) -> None:
+        await self.session.commit()
+
+    async def rollback(self) -> None:
+        await self.session.rollback()
+
+    async def close(self) -> None:
+        await self.session.close()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from warehouse_management.domain.exceptions import EntitiesNotFound, InsufficientStock
+from warehouse_management.domain.models import Product
+from warehouse_management.domain.services import WarehouseService
+
+from .database import DATABASE_URL, build_engine, build_session_factory
+from .retry import RetryPolicy, call_with_retry, is_lock_error
+from .unit_of_work import SqlAlchemyUnitOfWork
+
+DEFAULT_BATCH_SIZE = 50
+# How long a worker waits for more requests before committing a partial batch.
+BATCH_TIMEOUT = 0.05
+
+
+@dataclass
+class OrderRequest:
+    product_ids: List[int]
+    quantities: List[int] = field(default_factory=list)
+
+
+@dataclass
+class WorkerStats:
+    placed: int = 0
+    rejected: int = 0
+    failed: int = 0
+    retries: int = 0
+    batches: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class PoolReport:
+    workers: int
+    seconds: float
+    placed: int
+    rejected: int
+    failed: int
+    retries: int
+    batches: int
+
+    @property
+    def orders_per_sec(self) -> float:
+        return self.placed / self.seconds if self.seconds else 0.0
+
+
+def _place_batch(
+    SessionFactory: "sessionmaker[Session]", batch: List[OrderRequest]
+) -> Tuple[int, int]:
+    # The whole batch shares one transaction and one commit. A rejected
+    # request only rolls back its own reservation savepoint.
+    placed = rejected = 0
+    with SqlAlchemyUnitOfWork(SessionFactory) as uow:
+        service = WarehouseService(product_repo=uow.products, order_repo=uow.orders)
+        for request in batch:
+            products = [
+                Product(name="", quantity=0, price=0.0, category=0, id=product_id)
+                for product_id in request.product_ids
+            ]
+            try:
+                service.create_order(products, request.quantities or None)
+                placed += 1
+            except (InsufficientStock, EntitiesNotFound):
+                rejected += 1
+        uow.commit()
+    return placed, rejected
+
+
+def _worker(
+    url: str,
+    profile: str,
+    tasks: Any,
+    results: Any,
+    ready: Any,
+    batch_size: int,
+    policy: RetryPolicy,
+) -> None:
+    stats = WorkerStats()
+    try:
+        engine = build_engine(url, profile=profile)
+        SessionFactory = build_session_factory(engine)
+        ready.wait()
+        finished = False
+        while not finished:
+            batch: List[OrderRequest] = []
+            while len(batch) < batch_size:
+                try:
+                    request = tasks.get(timeout=BATCH_TIMEOUT)
+                except queue.Empty:
+                    break
+                if request is None:
+                    finished = True
+                    break
+                batch.append(request)
+            if not batch:
+                continue
+            try:
+                (placed, rejected), retries = call_with_retry(
+                    lambda: _place_batch(SessionFactory, batch), is_lock_error, policy
+                )
+            except Exception as error:
+                if not is_lock_error(error):
+                    raise
+                stats.failed += len(batch)
+                stats.retries += policy.attempts - 1
+            else:
+                stats.placed += placed
+                stats.rejected += rejected
+                stats.retries += retries
+            stats.batches += 1
+        engine.dispose()
+    except Exception:
+        stats.error = traceback.format_exc()
+        # Releases the parent if this worker never reached the barrier.
+        ready.abort()
+    results.put(stats)
+
+
+def run_pool(
+    url: str,
+    requests: Iterable[OrderRequest],
+    workers: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    policy: RetryPolicy = RetryPolicy(),
+    profile: str = "oltp",
+) -> PoolReport:
+    # Every worker is a separate process with its own engine, so none of
+    # them shares a connection pool or SQLite handle with the parent. The
+    # clock starts once all of them have connected.
+    context = multiprocessing.get_context("spawn")
+    tasks = context.Queue()
+    results = context.Queue()
+    ready = context.Barrier(workers + 1)
+    processes = [
+        context.Process(
+            target=_worker,
+            args=(url, profile, tasks, results, ready, batch_size, policy),
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for request in requests:
+        tasks.put(request)
+    for _ in processes:
+        tasks.put(None)
+
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        pass
+    started = time.perf_counter()
+    stats: List[WorkerStats] = [results.get() for _ in processes]
+    seconds = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    errors = [s.error for s in stats if s.error]
+    if errors:
+        raise RuntimeError(f"worker failed:\n{errors[0]}")
+    return PoolReport(
+        workers=workers,
+        seconds=seconds,
+        placed=sum(s.placed for s in stats),
+        rejected=sum(s.rejected for s in stats),
+        failed=sum(s.failed for s in stats),
+        retries=sum(s.retries for s in stats),
+        batches=sum(s.batches for s in stats),
+    )
+
+
+def format_report(report: PoolReport) -> str:
+    return (
+        f"{report.workers:>3} workers: {report.placed} placed, "
+        f"{report.rejected} rejected, {report.failed} failed, "
+        f"{report.retries} retries in {report.seconds:.2f}s "
+        f"({report.orders_per_sec:,.0f} orders/s)"
+    )
+
+
+def read_requests(path: str) -> List[OrderRequest]:
+    # One JSON object per line: {"product_ids": [...], "quantities": [...]}.
+    with open(path) as f:
+        return [OrderRequest(**json.loads(line)) for line in f if line.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Place queued orders in parallel")
+    parser.add_argument("requests", help="JSON lines file of order requests")
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    report = run_pool(
+        args.url, read_requests(args.requests), args.workers, args.batch_size
+    )
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])